@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, merchants, customers, invoices, recurring_invoices, payment_confirmations
+from app.api.v1 import auth, merchants, customers, invoices, recurring_invoices, payment_confirmations, webhooks, admin
 
 api_router = APIRouter()
 
@@ -17,4 +17,5 @@ api_router.include_router(
     prefix="/payment-confirmations",
     tags=["payment-confirmations"],
 )
-
+api_router.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+
+from app.core.config import settings
+from app.core.request_profiler import ProfiledRoute, get_profiling_state, set_profiling_state
+from app.core.security import verify_admin_key
+from app.schemas.admin import ProfilingStatus, ProfilingUpdate
+
+router = APIRouter(route_class=ProfiledRoute, dependencies=[Depends(verify_admin_key)])
+
+
+def _profiling_status() -> ProfilingStatus:
+    return ProfilingStatus(
+        **get_profiling_state(),
+        interval_ms=settings.PROFILING_INTERVAL_MS,
+        output_dir=settings.PROFILING_DIR,
+    )
+
+
+@router.get("/profiling", response_model=ProfilingStatus)
+def get_profiling():
+    """Current request profiling sample rate, shared by all API workers"""
+    return _profiling_status()
+
+
+@router.put("/profiling", response_model=ProfilingStatus)
+def start_profiling(update: ProfilingUpdate):
+    """Profile a fraction of all requests for a limited time"""
+    set_profiling_state(update.sample_rate, update.duration_seconds)
+    return _profiling_status()
+
+
+@router.delete("/profiling", response_model=ProfilingStatus)
+def stop_profiling():
+    """Stop sampled profiling (X-Profile requests are still profiled)"""
+    set_profiling_state(0.0, 0)
+    return _profiling_status()
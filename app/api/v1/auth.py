@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import create_access_token
+from app.core.request_profiler import ProfiledRoute
 from app.models.merchant import Merchant
 from app.schemas.auth import (
     PhoneRequest,
@@ -11,7 +12,7 @@ from app.schemas.auth import (
 )
 from app.services.otp_service import create_otp, verify_otp, RateLimitError
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("/send-otp", response_model=OTPResponse)
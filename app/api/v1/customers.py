@@ -1,18 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import List
 from uuid import UUID
+from app.core.cache import invalidate_on_commit
 from app.core.database import get_db
 from app.core.security import get_current_merchant
+from app.core.request_profiler import ProfiledRoute
 from app.models.merchant import Merchant
 from app.models.customer import Customer
 from app.models.invoice import Invoice
 from app.schemas.customer import CustomerCreate, CustomerResponse, CustomerUpdate
 from app.schemas.invoice import InvoiceResponse
-from app.utils.enums import InvoiceStatus
+from app.services.cached_reads import billing_tag, customer_tag, get_customer_balance, get_customer_balances
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("", response_model=CustomerResponse, status_code=status.HTTP_201_CREATED)
@@ -46,19 +47,14 @@ def get_all_customers(
     customers = db.query(Customer).filter(
         Customer.merchant_id == current_merchant.id
     ).all()
-    
+
+    # Total pending amount per customer (sum of all UNPAID invoices only), in one cached query
+    pending_by_customer = get_customer_balances(db, current_merchant.id)
+
     result = []
     for customer in customers:
-        # Calculate total pending amount (sum of all UNPAID invoices only)
-        total_pending = db.query(func.coalesce(func.sum(Invoice.amount), 0)).filter(
-            Invoice.customer_id == customer.id,
-            Invoice.merchant_id == current_merchant.id,
-            Invoice.status == InvoiceStatus.UNPAID.value,
-            Invoice.deleted_at.is_(None)
-        ).scalar() or 0.0
-        
         customer_dict = CustomerResponse.model_validate(customer).model_dump(by_alias=True)
-        customer_dict["total_pending_amount"] = float(total_pending)
+        customer_dict["total_pending_amount"] = float(pending_by_customer.get(customer.id, 0))
         result.append(CustomerResponse(**customer_dict))
     
     return result
@@ -82,16 +78,9 @@ def get_customer_by_id(
             detail="Customer not found"
         )
     
-    # Calculate total pending amount (sum of all UNPAID invoices only)
-    total_pending = db.query(func.coalesce(func.sum(Invoice.amount), 0)).filter(
-        Invoice.customer_id == customer_id,
-        Invoice.merchant_id == current_merchant.id,
-        Invoice.status == InvoiceStatus.UNPAID.value,
-        Invoice.deleted_at.is_(None)
-    ).scalar() or 0.0
-    
+    # Total pending amount (sum of all UNPAID invoices only)
     customer_dict = CustomerResponse.model_validate(customer).model_dump(by_alias=True)
-    customer_dict["total_pending_amount"] = float(total_pending)
+    customer_dict["total_pending_amount"] = get_customer_balance(db, current_merchant.id, customer_id)
     
     return CustomerResponse(**customer_dict)
 
@@ -123,19 +112,13 @@ def update_customer(
     for field, value in update_data.items():
         setattr(customer, field, value)
     
+    invalidate_on_commit(db, customer_tag(customer.id))
     db.commit()
     db.refresh(customer)
     
-    # Calculate total pending amount (sum of all UNPAID invoices only)
-    total_pending = db.query(func.coalesce(func.sum(Invoice.amount), 0)).filter(
-        Invoice.customer_id == customer_id,
-        Invoice.merchant_id == current_merchant.id,
-        Invoice.status == InvoiceStatus.UNPAID.value,
-        Invoice.deleted_at.is_(None)
-    ).scalar() or 0.0
-    
+    # Total pending amount (sum of all UNPAID invoices only)
     customer_dict = CustomerResponse.model_validate(customer).model_dump(by_alias=True)
-    customer_dict["total_pending_amount"] = float(total_pending)
+    customer_dict["total_pending_amount"] = get_customer_balance(db, current_merchant.id, customer_id)
     
     return CustomerResponse(**customer_dict)
 
@@ -158,7 +141,18 @@ def delete_customer(
             detail="Customer not found"
         )
     
+    # Invoices, paid or soft-deleted ones included, are kept as history
+    has_invoices = db.query(
+        db.query(Invoice.id).filter(Invoice.customer_id == customer.id).exists()
+    ).scalar()
+    if has_invoices:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Customer has invoices and cannot be deleted"
+        )
+    
     db.delete(customer)
+    invalidate_on_commit(db, customer_tag(customer.id), billing_tag(current_merchant.id))
     db.commit()
     
     return None
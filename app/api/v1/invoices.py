@@ -2,9 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
-from datetime import date, datetime
+from datetime import date, datetime, timezone
+from app.core.cache import invalidate_on_commit
 from app.core.database import get_db
 from app.core.security import get_current_merchant
+from app.core.request_profiler import ProfiledRoute
 from app.models.merchant import Merchant
 from app.models.customer import Customer
 from app.models.invoice import Invoice
@@ -17,11 +19,11 @@ from app.schemas.invoice import (
     InvoiceWithMerchantResponse,
     WhatsAppMessageResponse
 )
-from app.schemas.merchant import MerchantResponse
 from app.utils.enums import InvoiceStatus, WhatsAppDirection, WhatsAppMessageType, WhatsAppMessageStatus
-from app.tasks.whatsapp import send_whatsapp_message
+from app.services.cached_reads import billing_tag, get_public_invoice
+from app.services.outbox_service import enqueue_whatsapp_message
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 
@@ -70,11 +72,12 @@ def create_invoice(
             message_text=f"Invoice #{db_invoice.invoice_number or db_invoice.id} for ₹{invoice.amount}"
         )
         db.add(whatsapp_message)
-        db.flush()  # Flush to get message ID
         
-        # Trigger Celery task to send WhatsApp message
-        send_whatsapp_message.delay(customer.phone, whatsapp_message.message_text)
+        # Queue the WhatsApp send; it is published only after this transaction commits,
+        # merged with other reminders to the customer queued within the digest window
+        enqueue_whatsapp_message(db, whatsapp_message, customer.phone, merchant=current_merchant, coalesce=True)
     
+    invalidate_on_commit(db, billing_tag(current_merchant.id))
     db.commit()
     db.refresh(db_invoice)
     
@@ -119,6 +122,7 @@ def update_invoice(
     for field, value in update_data.items():
         setattr(invoice, field, value)
     
+    invalidate_on_commit(db, billing_tag(current_merchant.id))
     db.commit()
     db.refresh(invoice)
     
@@ -294,6 +298,7 @@ def delete_invoice(
     
     # Soft delete
     invoice.deleted_at = datetime.utcnow()
+    invalidate_on_commit(db, billing_tag(current_merchant.id))
     db.commit()
     
     return None
@@ -322,6 +327,7 @@ def mark_invoice_as_paid(
     invoice.status = InvoiceStatus.PAID.value
     invoice.paid_at = datetime.utcnow()
     
+    invalidate_on_commit(db, billing_tag(current_merchant.id))
     db.commit()
     db.refresh(invoice)
     
@@ -344,10 +350,16 @@ def mark_invoice_as_paid(
 @router.post("/{invoice_id}/send-followup", response_model=WhatsAppMessageResponse, status_code=status.HTTP_201_CREATED)
 def send_followup(
     invoice_id: UUID,
+    send_at: Optional[datetime] = Query(None, description="Send no earlier than this time; defaults to now"),
     current_merchant: Merchant = Depends(get_current_merchant),
     db: Session = Depends(get_db)
 ):
-    """Send a manual follow-up WhatsApp message for an unpaid invoice"""
+    """Send a manual follow-up WhatsApp message for an unpaid invoice
+
+    The send is held until `send_at` and until the merchant's send window opens.
+    It first waits WHATSAPP_DIGEST_WINDOW_SECONDS so other reminders to the
+    customer can be merged with it into one digest.
+    """
     invoice = db.query(Invoice).filter(
         Invoice.id == invoice_id,
         Invoice.merchant_id == current_merchant.id,
@@ -378,10 +390,20 @@ def send_followup(
         message_text=f"Follow-up: Invoice #{invoice.invoice_number or invoice.id} for ₹{invoice.amount} is still pending"
     )
     db.add(whatsapp_message)
-    db.flush()  # Flush to get message ID
     
-    # Trigger Celery task to send WhatsApp message
-    send_whatsapp_message.delay(invoice.customer.phone, whatsapp_message.message_text)
+    if send_at is not None and send_at.tzinfo is not None:
+        send_at = send_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # Queue the WhatsApp send; it is published only after this transaction commits,
+    # merged with other reminders to the customer queued within the digest window
+    enqueue_whatsapp_message(
+        db,
+        whatsapp_message,
+        invoice.customer.phone,
+        merchant=current_merchant,
+        send_at=send_at,
+        coalesce=True,
+    )
     
     db.commit()
     db.refresh(whatsapp_message)
@@ -416,6 +438,7 @@ def pause_reminder(
         )
     
     invoice.pause_reminder = True
+    invalidate_on_commit(db, billing_tag(current_merchant.id))
     db.commit()
     db.refresh(invoice)
     
@@ -462,6 +485,7 @@ def unpause_reminder(
         )
     
     invoice.pause_reminder = False
+    invalidate_on_commit(db, billing_tag(current_merchant.id))
     db.commit()
     db.refresh(invoice)
     
@@ -487,51 +511,12 @@ def get_invoice_with_merchant_public(
     db: Session = Depends(get_db)
 ):
     """Get invoice and merchant details by invoice ID (Public endpoint - no authentication required)"""
-    # Query invoice with merchant relationship loaded (public access)
-    invoice = db.query(Invoice).filter(
-        Invoice.id == invoice_id,
-        Invoice.deleted_at.is_(None)  # Not soft deleted
-    ).first()
+    page = get_public_invoice(db, invoice_id)
     
-    if not invoice:
+    if page is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Invoice not found"
         )
     
-    # Access merchant through relationship
-    merchant = invoice.merchant
-    
-    if not merchant:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Merchant not found for this invoice"
-        )
-    
-    # Build invoice response with customer data
-    invoice_dict = InvoiceResponse.model_validate(invoice).model_dump(by_alias=True)
-    # Load customer if not already loaded
-    if invoice.customer:
-        invoice_dict["customer_name"] = invoice.customer.name
-        invoice_dict["class"] = invoice.customer.class_ if hasattr(invoice.customer, 'class_') else None
-        invoice_dict["section"] = invoice.customer.section
-        invoice_dict["batch"] = invoice.customer.batch
-    else:
-        # Load customer if not already loaded
-        customer = db.query(Customer).filter(Customer.id == invoice.customer_id).first()
-        if customer:
-            invoice_dict["customer_name"] = customer.name
-            invoice_dict["class"] = customer.class_
-            invoice_dict["section"] = customer.section
-            invoice_dict["batch"] = customer.batch
-        else:
-            invoice_dict["customer_name"] = None
-            invoice_dict["class"] = None
-            invoice_dict["section"] = None
-            invoice_dict["batch"] = None
-    
-    return InvoiceWithMerchantResponse(
-        invoice=InvoiceResponse(**invoice_dict),
-        merchant=MerchantResponse.model_validate(merchant)
-    )
-
+    return page
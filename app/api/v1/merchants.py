@@ -1,18 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from datetime import datetime, date
+from app.core.cache import invalidate_on_commit
 from app.core.database import get_db
-from app.core.security import get_current_merchant, create_access_token
+from app.core.security import get_current_merchant, get_current_merchant_profile, create_access_token
+from app.core.request_profiler import ProfiledRoute
 from app.models.merchant import Merchant
-from app.models.invoice import Invoice
-from app.models.payment_confirmation import PaymentConfirmation
 from app.schemas.merchant import MerchantCreate, MerchantResponse, MerchantUpdate, DashboardResponse
 from app.schemas.auth import TokenResponse
+from app.services.cached_reads import get_dashboard_stats, merchant_tag
 from app.services.otp_service import is_otp_verified
-from app.utils.enums import InvoiceStatus
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
@@ -50,9 +48,9 @@ def register_merchant(merchant: MerchantCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=MerchantResponse)
-def get_my_profile(current_merchant: Merchant = Depends(get_current_merchant)):
+def get_my_profile(current_merchant: MerchantResponse = Depends(get_current_merchant_profile)):
     """Get current authenticated merchant profile (protected endpoint)"""
-    return MerchantResponse.model_validate(current_merchant)
+    return current_merchant
 
 
 @router.put("/me", response_model=MerchantResponse)
@@ -69,6 +67,7 @@ def update_my_profile(
     for field, value in update_data.items():
         setattr(current_merchant, field, value)
     
+    invalidate_on_commit(db, merchant_tag(current_merchant.id))
     db.commit()
     db.refresh(current_merchant)
     
@@ -77,52 +76,8 @@ def update_my_profile(
 
 @router.get("/dashboard", response_model=DashboardResponse)
 def get_dashboard(
-    current_merchant: Merchant = Depends(get_current_merchant),
+    current_merchant: MerchantResponse = Depends(get_current_merchant_profile),
     db: Session = Depends(get_db)
 ):
     """Get dashboard statistics for the authenticated merchant"""
-    # Get current month start and end dates
-    today = date.today()
-    month_start = date(today.year, today.month, 1)
-    month_end = date(today.year, today.month + 1, 1) if today.month < 12 else date(today.year + 1, 1, 1)
-    
-    # Base query filter for merchant's invoices (not soft deleted)
-    base_filter = and_(
-        Invoice.merchant_id == current_merchant.id,
-        Invoice.deleted_at.is_(None)
-    )
-    
-    # Total Outstanding: Sum of unpaid invoice amounts
-    total_outstanding_result = db.query(func.coalesce(func.sum(Invoice.amount), 0)).filter(
-        base_filter,
-        Invoice.status == InvoiceStatus.UNPAID.value
-    ).scalar()
-    total_outstanding = float(total_outstanding_result) if total_outstanding_result else 0.0
-    
-    # Paid This Month: Sum of paid invoices in the current month
-    paid_this_month_result = db.query(func.coalesce(func.sum(Invoice.amount), 0)).filter(
-        base_filter,
-        Invoice.status == InvoiceStatus.PAID.value,
-        Invoice.paid_at >= datetime.combine(month_start, datetime.min.time()),
-        Invoice.paid_at < datetime.combine(month_end, datetime.min.time())
-    ).scalar()
-    paid_this_month = float(paid_this_month_result) if paid_this_month_result else 0.0
-    
-    # Unpaid Invoices: Count of unpaid invoices
-    unpaid_invoices = db.query(func.count(Invoice.id)).filter(
-        base_filter,
-        Invoice.status == InvoiceStatus.UNPAID.value
-    ).scalar() or 0
-    
-    # Payment Confirmations Pending: Count of pending payment confirmations
-    payment_confirmations_pending = db.query(func.count(PaymentConfirmation.id)).filter(
-        PaymentConfirmation.merchant_id == current_merchant.id,
-        PaymentConfirmation.status == 'pending'
-    ).scalar() or 0
-    
-    return DashboardResponse(
-        total_outstanding=total_outstanding,
-        paid_this_month=paid_this_month,
-        unpaid_invoices=unpaid_invoices,
-        payment_confirmations_pending=payment_confirmations_pending
-    )
+    return get_dashboard_stats(db, current_merchant.id)
@@ -3,8 +3,10 @@ from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
+from app.core.cache import invalidate_on_commit
 from app.core.database import get_db
 from app.core.security import get_current_merchant
+from app.core.request_profiler import ProfiledRoute
 from app.models.merchant import Merchant
 from app.models.payment_confirmation import PaymentConfirmation
 from app.models.invoice import Invoice
@@ -13,9 +15,10 @@ from app.schemas.payment_confirmation import (
     PaymentConfirmationResponse,
     PaymentConfirmationListResponse,
 )
+from app.services.cached_reads import billing_tag
 from app.utils.enums import InvoiceStatus
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.get("", response_model=List[PaymentConfirmationListResponse])
@@ -55,6 +58,7 @@ def get_payment_confirmations(
             "invoice_id": confirmation.invoice_id,
             "customer_id": confirmation.customer_id,
             "customer_message": confirmation.customer_message,
+            "match_confidence": confirmation.match_confidence,
             "status": confirmation.status,
             "created_at": confirmation.created_at,
             "invoice_date": None,
@@ -153,6 +157,7 @@ def approve_payment_confirmation(
             invoice.status = InvoiceStatus.PAID.value
             invoice.paid_at = datetime.utcnow()
     
+    invalidate_on_commit(db, billing_tag(current_merchant.id))
     db.commit()
     db.refresh(confirmation)
     
@@ -204,6 +209,7 @@ def decline_payment_confirmation(
     confirmation.status = 'rejected'
     confirmation.resolved_at = datetime.utcnow()
     
+    invalidate_on_commit(db, billing_tag(current_merchant.id))
     db.commit()
     db.refresh(confirmation)
     
@@ -1,4 +1,5 @@
 from datetime import date
+from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 
@@ -7,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.security import get_current_merchant
+from app.core.request_profiler import ProfiledRoute
 from app.models.customer import Customer
 from app.models.merchant import Merchant
 from app.models.recurring_invoice import RecurringInvoice
@@ -14,13 +16,16 @@ from app.schemas.recurring_invoice import (
     RecurringInvoiceCreate,
     RecurringInvoiceUpdate,
     RecurringInvoiceResponse,
+    RecurringForecastMonth,
+    RecurringForecastResponse,
 )
+from app.services.recurring_forecast_service import forecast_merchant_revenue
 from app.services.recurring_invoice_service import (
     calculate_initial_next_generation_date,
 )
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post(
@@ -116,6 +121,29 @@ def list_recurring_invoices(
     ]
 
 
+@router.get("/forecast", response_model=RecurringForecastResponse)
+def forecast_recurring_revenue(
+    months: int = Query(12, ge=1, le=36),
+    current_merchant: Merchant = Depends(get_current_merchant),
+    db: Session = Depends(get_db),
+):
+    """Project invoices from active templates per month, starting this month."""
+    forecast = forecast_merchant_revenue(db, current_merchant.id, months)
+
+    return RecurringForecastResponse(
+        months=[
+            RecurringForecastMonth(
+                month=month.month,
+                invoice_count=month.invoice_count,
+                projected_amount=month.projected_amount,
+            )
+            for month in forecast
+        ],
+        total_invoices=sum(month.invoice_count for month in forecast),
+        total_amount=sum((month.projected_amount for month in forecast), Decimal("0")),
+    )
+
+
 @router.get("/{template_id}", response_model=RecurringInvoiceResponse)
 def get_recurring_invoice(
     template_id: UUID,
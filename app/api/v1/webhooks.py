@@ -0,0 +1,55 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.request_profiler import ProfiledRoute
+from app.schemas.webhook import DeliveryStatusEvent, DeliveryStatusResult
+from app.services.delivery_status_service import UnknownProviderMessageError, apply_delivery_status
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+def verify_webhook_secret(x_webhook_secret: Optional[str] = Header(None)) -> None:
+    """Reject callbacks without the shared secret; the endpoint does not exist until one is configured"""
+    expected = settings.WHATSAPP_WEBHOOK_SECRET
+    if not expected:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    if not hmac.compare_digest(x_webhook_secret or "", expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook secret"
+        )
+
+
+@router.post(
+    "/whatsapp/status",
+    response_model=DeliveryStatusResult,
+    dependencies=[Depends(verify_webhook_secret)],
+)
+def whatsapp_delivery_status(
+    event: DeliveryStatusEvent,
+    db: Session = Depends(get_db)
+):
+    """Delivery and read receipts from the WhatsApp provider"""
+    try:
+        updated = apply_delivery_status(db, event.provider_message_id, event.status, event.timestamp)
+    except UnknownProviderMessageError:
+        # 404 makes the provider retry; the sending worker may not have committed the id yet
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found"
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    db.commit()
+    return DeliveryStatusResult(updated=updated)
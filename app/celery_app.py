@@ -1,10 +1,16 @@
 from celery import Celery
+from celery.schedules import crontab
+from kombu import Queue
+
+from app.core import tracing
+from app.core.config import settings
+from app.utils.enums import TaskQueue
 
 celery_app = Celery(
     "payping",
-    broker="redis://redis:6379/0",
-    backend="redis://redis:6379/0",
-    include=["app.tasks.whatsapp"],
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.whatsapp", "app.tasks.inbound", "app.tasks.recurring", "app.tasks.maintenance"],
 )
 
 celery_app.conf.update(
@@ -12,4 +18,56 @@ celery_app.conf.update(
     accept_content=["json"],
     result_serializer="json",
     timezone="Asia/Kolkata",
+    # Queue topology: each queue is served by its own worker pool so that
+    # interactive sends never wait behind a bulk run
+    task_queues=[Queue(queue.value) for queue in TaskQueue],
+    task_default_queue=TaskQueue.INTERACTIVE.value,
+    task_routes={
+        "app.tasks.whatsapp.send_whatsapp_message": {"queue": TaskQueue.INTERACTIVE.value},
+        "app.tasks.whatsapp.drain_parked_whatsapp_messages": {"queue": TaskQueue.MAINTENANCE.value},
+        "app.tasks.inbound.*": {"queue": TaskQueue.MAINTENANCE.value},
+        # One worker process per shard: the maintenance pool is too small
+        "app.tasks.recurring.generate_recurring_invoices_shard": {"queue": TaskQueue.GENERATION.value},
+        "app.tasks.recurring.*": {"queue": TaskQueue.MAINTENANCE.value},
+        "app.tasks.maintenance.*": {"queue": TaskQueue.MAINTENANCE.value},
+    },
+    # Tasks are fire-and-forget; nobody reads their results
+    task_ignore_result=True,
+    # Reserve one task at a time and acknowledge only after it ran, so a
+    # long send never holds back tasks another worker process could take and
+    # a crashed worker's task is redelivered
+    worker_prefetch_multiplier=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    broker_transport_options={"visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT_SECONDS},
 )
+
+# Tasks continue the trace of whoever queued them (app.core.tracing)
+tracing.install_celery_signals()
+
+# Scheduled batch jobs, run by the celery-beat service. Every job takes a
+# Redis lease first, so a run that overlaps a slow previous one (or a manual
+# run of the batch_jobs script) is skipped, and records itself in
+# batch_job_runs.
+celery_app.conf.beat_schedule = {
+    "generate-recurring-invoices": {
+        "task": "app.tasks.recurring.generate_recurring_invoices_job",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "delete-expired-otps": {
+        "task": "app.tasks.maintenance.delete_expired_otps_task",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "prune-batch-job-runs": {
+        "task": "app.tasks.maintenance.prune_batch_job_runs_task",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "classify-inbound-messages": {
+        "task": "app.tasks.inbound.classify_inbound_messages_task",
+        "schedule": float(settings.INBOUND_CLASSIFICATION_INTERVAL_SECONDS),
+    },
+    "match-payment-confirmations": {
+        "task": "app.tasks.inbound.match_payment_confirmations_task",
+        "schedule": crontab(hour=4, minute=0),
+    },
+}
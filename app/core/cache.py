@@ -0,0 +1,395 @@
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Generic, Iterable, Optional, Set, Tuple, TypeVar, Union
+
+import redis
+from prometheus_client import Counter, Gauge
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+KEY_PREFIX = "cache:"
+TAG_PREFIX = "cache:tag:"
+INVALIDATION_CHANNEL = "cache:invalidations"
+
+# Read an entry with the newest invalidation of its tags and Redis' clock
+# (microseconds), in one round trip. An entry is valid only if it was
+# loaded after every invalidation of its tags. The first line of an entry
+# is a JSON header with its tags, load time and expiry.
+_READ_SCRIPT = """
+local raw = redis.call('GET', KEYS[1])
+local now = redis.call('TIME')
+local newest = 0
+if raw then
+  local header = cjson.decode(string.sub(raw, 1, string.find(raw, '\\n', 1, true) - 1))
+  for _, tag in ipairs(header['tags']) do
+    local at = tonumber(redis.call('GET', ARGV[1] .. tag) or '0')
+    if at > newest then
+      newest = at
+    end
+  end
+end
+return {raw or false, string.format('%d', tonumber(now[1]) * 1000000 + tonumber(now[2])), string.format('%d', newest)}
+"""
+
+# Stamp the tags with Redis' clock and tell every worker to drop them from L1
+_INVALIDATE_SCRIPT = """
+local now = redis.call('TIME')
+local at = string.format('%d', tonumber(now[1]) * 1000000 + tonumber(now[2]))
+for _, key in ipairs(KEYS) do
+  redis.call('SET', key, at, 'EX', ARGV[1])
+end
+redis.call('PUBLISH', ARGV[2], ARGV[3])
+return at
+"""
+
+CACHE_REQUESTS = Counter(
+    "payping_cache_requests",
+    "Cache lookups by namespace and where they were answered (l1, l2 or miss)",
+    ["namespace", "result"],
+    registry=registry,
+)
+CACHE_EARLY_REFRESHES = Counter(
+    "payping_cache_early_refreshes",
+    "Entries recomputed before expiry by probabilistic early refresh",
+    ["namespace"],
+    registry=registry,
+)
+CACHE_ERRORS = Counter(
+    "payping_cache_errors",
+    "Redis errors; the cache falls back to the loader",
+    ["namespace"],
+    registry=registry,
+)
+CACHE_HIT_RATIO = Gauge(
+    "payping_cache_hit_ratio",
+    "Fraction of lookups answered by L1 or L2 since the worker started",
+    ["namespace"],
+    registry=registry,
+)
+
+
+class PydanticSerializer(Generic[T]):
+    """JSON serializer for any type Pydantic can validate: schemas, and
+    containers of them or of plain values (Dict[UUID, float])."""
+
+    def __init__(self, type_: Any):
+        self._adapter = TypeAdapter(type_)
+
+    def dumps(self, value: T) -> bytes:
+        return self._adapter.dump_json(value, by_alias=True)
+
+    def loads(self, raw: bytes) -> T:
+        return self._adapter.validate_json(raw)
+
+
+@dataclass
+class _LocalEntry:
+    value: Any
+    tags: Tuple[str, ...]
+    expires: float  # time.monotonic()
+
+
+class TwoTierCache:
+    """Read-through cache: a per-process L1 in front of a shared Redis L2.
+
+    Entries carry tags (merchant:<id>, ...). invalidate() stamps tags in
+    Redis, which makes every L2 entry loaded before the stamp a miss, and
+    broadcasts them over pub/sub so each worker drops its L1 copies. L1
+    entries also expire after CACHE_L1_TTL_SECONDS, which bounds staleness
+    when a broadcast is missed. Every value is computed from a snapshot taken
+    after the Redis clock was read, so an invalidation that lands while a
+    value is being loaded always wins.
+
+    L2 entries are refreshed early with probability growing towards their
+    expiry (XFetch), scaled by how long they took to compute, so one
+    request recomputes a hot entry before it expires instead of all of them
+    at once after it did.
+
+    When Redis is unavailable lookups fall through to the loader (still
+    using L1). L1 values are shared between requests and must not be
+    mutated.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis = redis_client or get_redis()
+        self._read = self.redis.register_script(_READ_SCRIPT)
+        self._invalidate = self.redis.register_script(_INVALIDATE_SCRIPT)
+        self._local: "OrderedDict[str, _LocalEntry]" = OrderedDict()
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        # Tags dropped from L1 recently, to refuse L1 copies of values loaded before
+        self._drops = 0
+        self._recent_drops: Deque[Tuple[int, frozenset]] = deque(maxlen=1000)
+        self._listener_pid: Optional[int] = None
+
+    # L1
+
+    def _local_get(self, key: str) -> Optional[_LocalEntry]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                self._forget(key)
+                return None
+            self._local.move_to_end(key)
+            return entry
+
+    def _local_set(self, key: str, value: Any, tags: Tuple[str, ...], ttl: float, drops_seen: int) -> None:
+        with self._lock:
+            if self._dropped_since(drops_seen, tags):
+                return
+            self._forget(key)
+            self._local[key] = _LocalEntry(value, tags, time.monotonic() + min(ttl, settings.CACHE_L1_TTL_SECONDS))
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._local) > settings.CACHE_L1_MAX_ENTRIES:
+                self._forget(next(iter(self._local)))
+
+    def _forget(self, key: str) -> None:
+        entry = self._local.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def _dropped_since(self, drops_seen: int, tags: Tuple[str, ...]) -> bool:
+        if drops_seen == self._drops:
+            return False
+        if not self._recent_drops or self._recent_drops[0][0] > drops_seen + 1:
+            return True  # Older than what is remembered: assume the worst
+        return any(seq > drops_seen and not dropped.isdisjoint(tags) for seq, dropped in self._recent_drops)
+
+    def drop_local(self, tags: Iterable[str]) -> None:
+        """Remove the L1 entries carrying any of the tags."""
+        tags = frozenset(tags)
+        with self._lock:
+            self._drops += 1
+            self._recent_drops.append((self._drops, tags))
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._forget(key)
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._drops += 1
+            self._recent_drops.clear()
+            self._local.clear()
+            self._by_tag.clear()
+
+    # Invalidation broadcast
+
+    def _ensure_listener(self) -> None:
+        if self._listener_pid != os.getpid():
+            with self._lock:
+                if self._listener_pid != os.getpid():
+                    self._listener_pid = os.getpid()
+                    threading.Thread(target=self._listen, name="cache-invalidations", daemon=True).start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Broadcasts sent while (re)connecting are lost
+                self.clear_local()
+                for message in pubsub.listen():
+                    self.drop_local(json.loads(message["data"]))
+            except (redis.RedisError, ValueError) as exc:
+                logger.warning("Cache invalidation listener reconnecting: %s", exc)
+                time.sleep(1.0)
+
+    def invalidate(self, *tags: str) -> None:
+        """Make everything tagged with any of the tags a miss, in all workers."""
+        if not tags:
+            return
+        self.drop_local(tags)
+        try:
+            self._invalidate(
+                keys=[TAG_PREFIX + tag for tag in tags],
+                args=[settings.CACHE_TAG_TTL_SECONDS, INVALIDATION_CHANNEL, json.dumps(sorted(tags))],
+            )
+        except redis.RedisError:
+            logger.exception("Could not invalidate cache tags %s", ", ".join(tags))
+
+    # Lookups
+
+    def get_or_load(
+        self,
+        namespace: "CacheNamespace[T]",
+        key: str,
+        loader: Callable[[], Optional[T]],
+        tags: Union[Iterable[str], Callable[[T], Iterable[str]]] = (),
+    ) -> Optional[T]:
+        full_key = f"{KEY_PREFIX}{namespace.name}:{key}"
+        self._ensure_listener()
+        drops_seen = self._drops
+
+        entry = self._local_get(full_key)
+        if entry is not None:
+            namespace.record("l1")
+            return entry.value
+
+        raw = now = None
+        try:
+            raw, now, newest = self._read(keys=[full_key], args=[TAG_PREFIX])
+            now = int(now) / 1e6
+        except redis.RedisError as exc:
+            logger.debug("Cache read of %s failed: %s", full_key, exc)
+            CACHE_ERRORS.labels(namespace.name).inc()
+
+        if raw is not None:
+            header, _, payload = raw.partition(b"\n")
+            header = json.loads(header)
+            if header["loaded_at"] <= int(newest) / 1e6:
+                pass  # Loaded before one of its tags was invalidated
+            elif self._refresh_early(header, now):
+                CACHE_EARLY_REFRESHES.labels(namespace.name).inc()
+            else:
+                try:
+                    value = namespace.serializer.loads(payload)
+                except ValidationError:
+                    value = None  # Written by an older version of the schema
+                if value is not None:
+                    namespace.record("l2")
+                    self._local_set(full_key, value, tuple(header["tags"]), header["expires"] - now, drops_seen)
+                    return value
+
+        namespace.record("miss")
+        started = time.perf_counter()
+        value = loader()
+        if value is None:
+            return None  # Not found is not cached
+        delta = time.perf_counter() - started
+        entry_tags = tuple(tags(value) if callable(tags) else tags)
+
+        if now is not None:
+            header = {"tags": entry_tags, "loaded_at": now, "expires": now + namespace.ttl_seconds, "delta": delta}
+            try:
+                self.redis.set(
+                    full_key,
+                    json.dumps(header).encode() + b"\n" + namespace.serializer.dumps(value),
+                    ex=namespace.ttl_seconds,
+                )
+            except redis.RedisError as exc:
+                logger.debug("Cache write of %s failed: %s", full_key, exc)
+                CACHE_ERRORS.labels(namespace.name).inc()
+        self._local_set(full_key, value, entry_tags, namespace.ttl_seconds, drops_seen)
+        return value
+
+    @staticmethod
+    def _refresh_early(header: Dict[str, Any], now: float) -> bool:
+        # XFetch: now - delta * beta * ln(rand) >= expiry
+        gap = -header["delta"] * settings.CACHE_XFETCH_BETA * math.log(1.0 - random.random())
+        return now + gap >= header["expires"]
+
+    def delete(self, namespace: "CacheNamespace[Any]", key: str) -> None:
+        full_key = f"{KEY_PREFIX}{namespace.name}:{key}"
+        with self._lock:
+            self._forget(full_key)
+        try:
+            self.redis.delete(full_key)
+        except redis.RedisError:
+            logger.exception("Could not delete cache entry %s", full_key)
+
+
+_cache: Optional[TwoTierCache] = None
+
+
+def get_cache() -> TwoTierCache:
+    """Return the process-wide cache."""
+    global _cache
+    if _cache is None:
+        _cache = TwoTierCache()
+    return _cache
+
+
+class CacheNamespace(Generic[T]):
+    """A family of cache entries of one type, with one TTL and its own hit
+    ratio on /metrics (payping_cache_hit_ratio{namespace=...})."""
+
+    def __init__(self, name: str, type_: Any, ttl_seconds: int):
+        if ttl_seconds > settings.CACHE_TAG_TTL_SECONDS:
+            # Invalidation stamps must outlive the entries they invalidate
+            raise ValueError(f"Cache namespace {name}: TTL exceeds CACHE_TAG_TTL_SECONDS")
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.serializer: PydanticSerializer[T] = PydanticSerializer(type_)
+        self.lookups = {"l1": 0, "l2": 0, "miss": 0}
+        CACHE_HIT_RATIO.labels(name).set_function(self.hit_ratio)
+
+    def record(self, result: str) -> None:
+        self.lookups[result] += 1
+        CACHE_REQUESTS.labels(self.name, result).inc()
+
+    def hit_ratio(self) -> float:
+        total = sum(self.lookups.values())
+        return (self.lookups["l1"] + self.lookups["l2"]) / total if total else 0.0
+
+    def get_or_load(
+        self,
+        key: Any,
+        loader: Callable[[], Optional[T]],
+        tags: Union[Iterable[str], Callable[[T], Iterable[str]]] = (),
+    ) -> Optional[T]:
+        """The cached value for key, or loader()'s, cached unless it is None.
+
+        ``tags`` may be a function of the loaded value, for entries whose
+        tags are only known once loaded.
+        """
+        if not settings.CACHE_ENABLED:
+            return loader()
+        return get_cache().get_or_load(self, str(key), loader, tags)
+
+    def delete(self, key: Any) -> None:
+        if settings.CACHE_ENABLED:
+            get_cache().delete(self, str(key))
+
+
+def invalidate(*tags: str) -> None:
+    if settings.CACHE_ENABLED:
+        get_cache().invalidate(*tags)
+
+
+_PENDING_TAGS = "cache_invalidations"
+
+
+def invalidate_on_commit(db: Session, *tags: str) -> None:
+    """Invalidate the tags once the session's transaction commits.
+
+    Invalidating before the commit would let a concurrent request cache the
+    old rows again.
+    """
+    db.info.setdefault(_PENDING_TAGS, set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    tags = session.info.pop(_PENDING_TAGS, None)
+    if tags:
+        invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_TAGS, None)
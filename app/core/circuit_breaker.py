@@ -0,0 +1,115 @@
+from typing import Optional
+
+import redis
+
+from app.core.redis import get_redis
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+# Count a failure; open the breaker when the threshold is reached within the
+# window, or immediately if it was open/half-open (a failed probe).
+# Returns 1 if this call opened the breaker.
+_RECORD_FAILURE_SCRIPT = """
+local state_key, failures_key, open_key, probe_key, opened_total_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local threshold = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local reset_timeout = tonumber(ARGV[3])
+
+local failures = redis.call('INCR', failures_key)
+if failures == 1 then
+  redis.call('EXPIRE', failures_key, window)
+end
+
+local state = redis.call('GET', state_key)
+if state == 'open' or failures >= threshold then
+  redis.call('SET', state_key, 'open')
+  redis.call('SET', open_key, '1', 'EX', reset_timeout)
+  redis.call('DEL', probe_key, failures_key)
+  if state ~= 'open' then
+    redis.call('INCR', opened_total_key)
+    return 1
+  end
+end
+return 0
+"""
+
+# Close the breaker. Returns 1 if it was not already closed.
+_RECORD_SUCCESS_SCRIPT = """
+local state_key, failures_key, open_key, probe_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local state = redis.call('GET', state_key)
+if state == 'open' then
+  redis.call('DEL', state_key, failures_key, open_key, probe_key)
+  return 1
+end
+return 0
+"""
+
+
+class RedisCircuitBreaker:
+    """Circuit breaker whose state is shared through Redis.
+
+    Closed: requests flow, failures are counted over a sliding window.
+    Open: requests fail fast for `reset_timeout` seconds.
+    Half-open: once the timeout lapses a single probe request is let through;
+    its success closes the breaker, its failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        failure_window: int,
+        reset_timeout: int,
+        redis_client: Optional[redis.Redis] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+        self.redis = redis_client or get_redis()
+
+        prefix = f"circuit:{name}"
+        self.state_key = f"{prefix}:state"
+        self.failures_key = f"{prefix}:failures"
+        self.open_key = f"{prefix}:open"
+        self.probe_key = f"{prefix}:probe"
+        self.opened_total_key = f"{prefix}:opened_total"
+
+        self._record_failure = self.redis.register_script(_RECORD_FAILURE_SCRIPT)
+        self._record_success = self.redis.register_script(_RECORD_SUCCESS_SCRIPT)
+
+    def state(self) -> str:
+        state, still_open = self.redis.mget(self.state_key, self.open_key)
+        if state is None:
+            return CLOSED
+        return OPEN if still_open else HALF_OPEN
+
+    def allow_request(self) -> bool:
+        state = self.state()
+        if state == CLOSED:
+            return True
+        if state == OPEN:
+            return False
+        # Half-open: only one probe in flight at a time
+        return bool(self.redis.set(self.probe_key, "1", nx=True, ex=self.reset_timeout))
+
+    def record_success(self) -> bool:
+        """Record a successful call. Returns True if this closed the breaker."""
+        keys = [self.state_key, self.failures_key, self.open_key, self.probe_key]
+        return bool(self._record_success(keys=keys))
+
+    def record_failure(self) -> bool:
+        """Record a failed call. Returns True if this opened the breaker."""
+        keys = [self.state_key, self.failures_key, self.open_key, self.probe_key, self.opened_total_key]
+        args = [self.failure_threshold, self.failure_window, self.reset_timeout]
+        return bool(self._record_failure(keys=keys, args=args))
+
+    def failures(self) -> int:
+        return int(self.redis.get(self.failures_key) or 0)
+
+    def opened_total(self) -> int:
+        return int(self.redis.get(self.opened_total_key) or 0)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -22,6 +22,39 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "PayPing API"
     PROJECT_VERSION: str = "1.0.0"
+    DEBUG: bool = False  # Adds per-request timing and SQL count headers to responses
+    
+    # Opt-in slow query log (0 disables); a sampled fraction of slow SELECTs gets EXPLAIN (ANALYZE, BUFFERS)
+    SLOW_QUERY_THRESHOLD_MS: int = 0
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0
+    SLOW_QUERY_LOG_PATH: str = "slow_queries.jsonl"
+
+    # Tracing from API request through the outbox and Celery to the provider call
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0  # Fraction of new traces recorded; incoming traceparents keep their flag
+    TRACING_EXPORTER: str = "file"  # "file" (JSONL) or "otlp" (OTLP/HTTP JSON to a collector)
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://jaeger:4318/v1/traces"
+
+    # Opt-in capture of anonymized request metadata, replayed by benchmarks/replay_traffic.py
+    REQUEST_CAPTURE_ENABLED: bool = False
+    REQUEST_CAPTURE_SAMPLE_RATE: float = 1.0
+    REQUEST_CAPTURE_DIR: str = "request_captures"
+    REQUEST_CAPTURE_MAX_BYTES: int = 50_000_000  # Per file before it is rotated
+    REQUEST_CAPTURE_BACKUP_COUNT: int = 10  # Rotated files kept per process
+    REQUEST_CAPTURE_HASH_KEY: Optional[str] = None  # Key for merchant id hashes; SECRET_KEY when unset
+
+    # Operator endpoints under /api/v1/admin (disabled when unset), and request profiling through them
+    ADMIN_API_KEY: Optional[str] = None  # Expected in X-Admin-Key
+    PROFILING_INTERVAL_MS: float = 2.0  # Stack sampling interval of a profiled request
+    PROFILING_DIR: str = "profiles"
+    
+    # Two-tier read cache: in-process L1 in front of Redis, invalidated by tag
+    CACHE_ENABLED: bool = True
+    CACHE_L1_MAX_ENTRIES: int = 10000  # Per worker process
+    CACHE_L1_TTL_SECONDS: float = 10.0  # Bounds staleness when an invalidation broadcast is missed
+    CACHE_XFETCH_BETA: float = 1.0  # Above 1 refreshes hot entries earlier
+    CACHE_TAG_TTL_SECONDS: int = 86400  # Invalidation stamps are kept this long; caps entry TTLs
     
     # Supabase
     SUPABASE_ACCESS_KEY: str
@@ -31,9 +64,84 @@ class Settings(BaseSettings):
     S3_ENDPOINT: str
     S3_REGION: str
     
+    # Redis
+    REDIS_URL: str = "redis://redis:6379/0"
+    
+    # Celery
+    CELERY_BROKER_URL: str = "redis://redis:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://redis:6379/0"
+    CELERY_WORKER_PREFETCH_MULTIPLIER: int = 1
+    CELERY_VISIBILITY_TIMEOUT_SECONDS: int = 3600
+    
+    # WhatsApp provider ("simulated" or "aisensy")
+    WHATSAPP_PROVIDER: str = "simulated"
+    WHATSAPP_PROVIDER_TIMEOUT_SECONDS: float = 10.0
+    WHATSAPP_SIMULATED_LATENCY_SECONDS: float = 5.0
+    AISENSY_API_URL: str = "https://backend.aisensy.com/campaign/t1/api/v2"
+    AISENSY_API_KEY: Optional[str] = None
+    AISENSY_CAMPAIGN_NAME: str = "payping_invoice_template_1"
+    WHATSAPP_WEBHOOK_SECRET: Optional[str] = None  # Expected in X-Webhook-Secret on delivery callbacks; unset disables them
+    
+    # WhatsApp provider protection (shared across all workers through Redis)
+    WHATSAPP_RATE_LIMIT_PER_SECOND: float = 20.0
+    WHATSAPP_RATE_LIMIT_BURST: int = 20
+    WHATSAPP_RATE_LIMIT_MAX_WAIT_SECONDS: float = 30.0
+    WHATSAPP_BREAKER_FAILURE_THRESHOLD: int = 5
+    WHATSAPP_BREAKER_FAILURE_WINDOW_SECONDS: int = 60
+    WHATSAPP_BREAKER_RESET_TIMEOUT_SECONDS: int = 30
+    WHATSAPP_PARKED_DRAIN_BATCH_SIZE: int = 100
+    
+    # Scheduled batch jobs (Celery beat); a run holds a Redis lease renewed by a heartbeat
+    BATCH_JOB_LEASE_SECONDS: int = 60
+    INBOUND_CLASSIFICATION_INTERVAL_SECONDS: int = 60
+    BATCH_JOB_RUN_RETENTION_DAYS: int = 30  # Every-minute jobs add ~1,440 runs a day each
+    
+    # Recurring invoice generation (templates per committed chunk)
+    RECURRING_GENERATION_CHUNK_SIZE: int = 1000
+    RECURRING_GENERATION_SHARDS: int = 1  # Merchant shards generated in parallel
+    # "process" (local pool) or "celery" (the generation workers, whose
+    # concurrency must be at least RECURRING_GENERATION_SHARDS)
+    RECURRING_GENERATION_EXECUTOR: str = "process"
+    RECURRING_BACKFILL_MAX_PERIODS: int = 24  # Missed periods generated per template in one backfill run
+    
+    # Reminders to the same customer queued within this window are merged into one digest (0 disables)
+    WHATSAPP_DIGEST_WINDOW_SECONDS: int = 300
+    
+    # Replay of sends that exhausted their retries
+    DEAD_LETTER_REPLAY_BATCH_SIZE: int = 50
+    DEAD_LETTER_REPLAY_RATE_PER_SECOND: float = 5.0
+    
+    # Inbound message intent classification
+    INTENT_CLASSIFIER: str = "app.services.intent_classifier.KeywordIntentClassifier"
+    INTENT_BATCH_SIZE: int = 100
+    INTENT_CACHE_SIZE: int = 10000
+    # Payment claims classified below this confidence don't create a confirmation
+    INTENT_CONFIRMATION_MIN_CONFIDENCE: float = 0.75
+    
+    # Payment confirmation matching
+    PAYMENT_MATCH_MIN_CONFIDENCE: float = 0.5
+    
+    # Transactional outbox relay
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_RETRY_DELAY_SECONDS: int = 5
+    
+    # Delayed sends (Redis sorted set)
+    DEFAULT_TIMEZONE: str = "Asia/Kolkata"
+    SCHEDULED_SEND_BATCH_SIZE: int = 500
+    SCHEDULED_SEND_POLL_INTERVAL_SECONDS: float = 1.0
+    
+    # Per-merchant fair scheduling of outbox dispatch
+    FAIR_SHARE_PLAN_WEIGHTS: Dict[str, int] = {"trial": 1, "starter": 2, "pro": 4}
+    FAIR_SHARE_QUANTUM: int = 10  # Rows claimed per merchant per weight unit in one relay batch
+    FAIR_SHARE_QUEUES: List[str] = ["bulk"]  # Broker queues kept short so fairness holds
+    FAIR_SHARE_MAX_QUEUE_DEPTH: int = 200
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
+        # .env is shared with docker-compose and Traefik (LETSENCRYPT_EMAIL, ...)
+        extra = "ignore"
 
 
 settings = Settings()
@@ -1,9 +1,16 @@
+from contextlib import contextmanager
+from typing import Iterator
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core import slow_query_log, sql_stats, tracing
 
 engine = create_engine(settings.DATABASE_URL)
+sql_stats.install(engine)
+slow_query_log.install(engine)
+tracing.install(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -17,3 +24,22 @@ def get_db():
     finally:
         db.close()
 
+
+
+@contextmanager
+def rollback_only_session() -> Iterator[Session]:
+    """Session for dry runs: nothing it does is ever committed.
+
+    Everything runs in one outer transaction that is rolled back at the end;
+    the session's own commits only release savepoints, so code that commits
+    as it goes behaves normally until then.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
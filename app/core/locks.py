@@ -0,0 +1,89 @@
+import threading
+import uuid
+from typing import Optional
+
+import redis
+
+from app.core.redis import get_redis
+
+
+# Extend the lease only if we still own it. Returns 1 on success.
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Delete the lease only if we still own it. Returns 1 on success.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LockNotAcquiredError(Exception):
+    """Another process holds the lease."""
+    pass
+
+
+class RedisLease:
+    """Mutual exclusion across processes and hosts through a Redis key with a TTL.
+
+    The holder keeps the lease alive with a heartbeat thread that renews it
+    every ttl/3 seconds. If the holder dies the lease expires after `ttl`
+    seconds and another process can take over; nothing has to be cleaned up.
+    Renewal and release check a random token, so a holder whose lease has
+    expired can never extend or delete someone else's.
+    """
+
+    def __init__(self, name: str, ttl: float, redis_client: Optional[redis.Redis] = None):
+        self.key = f"lock:{name}"
+        self.ttl_ms = int(ttl * 1000)
+        self.redis = redis_client or get_redis()
+        self.token = uuid.uuid4().hex
+        self._renew = self.redis.register_script(_RENEW_SCRIPT)
+        self._release = self.redis.register_script(_RELEASE_SCRIPT)
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+        self.lost = False
+
+    def acquire(self) -> bool:
+        return bool(self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    def renew(self) -> bool:
+        return bool(self._renew(keys=[self.key], args=[self.token, self.ttl_ms]))
+
+    def release(self) -> bool:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        return bool(self._release(keys=[self.key], args=[self.token]))
+
+    def _beat(self):
+        interval = self.ttl_ms / 3000
+        while not self._stop.wait(interval):
+            try:
+                if not self.renew():
+                    self.lost = True
+                    return
+            except redis.RedisError:
+                # Keep trying; the lease survives until its TTL runs out
+                continue
+
+    def start_heartbeat(self) -> None:
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name=f"lease-{self.key}", daemon=True)
+        self._heartbeat.start()
+
+    def __enter__(self) -> "RedisLease":
+        if not self.acquire():
+            raise LockNotAcquiredError(f"{self.key} is held by another process")
+        self.start_heartbeat()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
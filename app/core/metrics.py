@@ -0,0 +1,13 @@
+from prometheus_client import CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+
+
+# Registry served on /metrics
+registry = CollectorRegistry()
+
+
+def render_metrics() -> bytes:
+    """Render all registered metrics in the Prometheus text format."""
+    return generate_latest(registry)
+
+
+__all__ = ["registry", "render_metrics", "CONTENT_TYPE_LATEST"]
@@ -0,0 +1,65 @@
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+from app.core.sql_stats import SQLStats, track_sql
+
+
+@dataclass
+class JobProfile:
+    """Where a batch job spent its time, filled in by profile_phase()."""
+    phases: Dict[str, float] = field(default_factory=dict)  # Phase name -> seconds
+    sql: SQLStats = field(default_factory=SQLStats)
+    elapsed_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+
+    @property
+    def unaccounted_seconds(self) -> float:
+        return max(0.0, self.elapsed_seconds - sum(self.phases.values()))
+
+
+_current: ContextVar[Optional[JobProfile]] = ContextVar("job_profile", default=None)
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+    """Add the block's wall time to the active profile's phase; no-op otherwise.
+
+    Phases must not nest, or the inner time is counted twice.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phases[name] = profile.phases.get(name, 0.0) + time.perf_counter() - started
+
+
+@contextmanager
+def profile_job() -> Iterator[JobProfile]:
+    """Collect phase timings, SQL statements and peak RSS for the block."""
+    profile = JobProfile()
+    token = _current.set(profile)
+    started = time.perf_counter()
+    try:
+        with track_sql() as sql:
+            profile.sql = sql
+            yield profile
+    finally:
+        profile.elapsed_seconds = time.perf_counter() - started
+        profile.peak_rss_bytes = peak_rss_bytes()
+        _current.reset(token)
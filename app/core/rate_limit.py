@@ -0,0 +1,74 @@
+import time
+from typing import Optional
+
+import redis
+
+from app.core.redis import get_redis
+
+
+# Token bucket refilled continuously at `rate` tokens/sec up to `capacity`.
+# Uses the Redis server clock so every worker sees the same bucket.
+# Returns 0 if a token was taken, otherwise milliseconds until one is free.
+_TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+
+local wait = 0
+if tokens >= requested then
+  tokens = tokens - requested
+else
+  wait = math.ceil((requested - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class RedisTokenBucket:
+    """Cluster-wide rate limiter shared by every process using the same key."""
+
+    def __init__(
+        self,
+        key: str,
+        rate: float,
+        capacity: int,
+        redis_client: Optional[redis.Redis] = None,
+    ):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self.redis = redis_client or get_redis()
+        self._script = self.redis.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """Take tokens if available. Returns 0, or seconds to wait before retrying."""
+        wait_ms = self._script(keys=[self.key], args=[self.rate, self.capacity, tokens])
+        return int(wait_ms) / 1000
+
+    def acquire(self, timeout: float, tokens: int = 1) -> bool:
+        """Block until tokens are taken or `timeout` seconds pass."""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
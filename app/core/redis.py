@@ -0,0 +1,29 @@
+import redis
+
+from app.core.config import settings
+
+
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client (connections are pooled)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+_broker_client = None
+
+
+def get_broker_redis() -> redis.Redis:
+    """Return a client for the Celery broker, which may be a different
+    database or host than REDIS_URL; read queue depths through it."""
+    global _broker_client
+    if _broker_client is None:
+        if settings.CELERY_BROKER_URL == settings.REDIS_URL:
+            _broker_client = get_redis()
+        else:
+            _broker_client = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+    return _broker_client
@@ -0,0 +1,255 @@
+import hashlib
+import hmac
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import socket
+import threading
+import time
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.request_context import current_request, route_label
+from app.utils import enums
+
+logger = logging.getLogger(__name__)
+
+# Health checks and scrapes are not traffic worth replaying
+_SKIPPED_ROUTES = {"/health", "/metrics"}
+# Larger bodies (uploads) are recorded without their shape
+_MAX_BODY_BYTES = 64 * 1024
+
+# Values kept verbatim in captures: enumerations and flags carry no personal
+# data and replaying them matters (status=UNPAID lists a different set)
+_KNOWN_VALUES = {
+    str(member.value).lower()
+    for value in vars(enums).values()
+    if isinstance(value, type) and issubclass(value, Enum) and value is not Enum
+    for member in value
+} | {"pending", "approved", "rejected", "true", "false"}
+
+_UUID = re.compile(r"^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$", re.IGNORECASE)
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}")
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def shape(value: Any, on: Optional[date] = None) -> Any:
+    """A value with anything identifying replaced by a placeholder.
+
+    Enumerations, flags and small integers (pagination) are kept. Dates become
+    their offset in days from the day of the request (``<date:-30>``), so a
+    replay can rebuild the same range. Everything else becomes its kind:
+    ``<uuid>``, ``<int>``, ``<number>``, ``<datetime>`` or ``<str>``.
+    """
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value if isinstance(value, int) and abs(value) < 10000 else "<number>"
+    if isinstance(value, list):
+        return f"<{len(value)} items>"
+    if isinstance(value, dict):
+        return "<object>"
+    text = str(value)
+    if text.lower() in _KNOWN_VALUES:
+        return text
+    if _UUID.match(text):
+        return "<uuid>"
+    if _DATE.match(text):
+        try:
+            return f"<date:{(date.fromisoformat(text) - (on or date.today())).days:+d}>"
+        except ValueError:
+            return "<str>"
+    if _DATETIME.match(text):
+        return "<datetime>"
+    if _NUMBER.match(text):
+        if text.isdigit() and len(text) <= 4:
+            return int(text)
+        return "<int>" if text.lstrip("-").isdigit() else "<number>"
+    return "<str>"
+
+
+def merchant_hash(merchant_id: Optional[str]) -> Optional[str]:
+    """Keyed hash of a merchant id: stable across captures, not reversible without the key."""
+    if not merchant_id:
+        return None
+    key = (settings.REQUEST_CAPTURE_HASH_KEY or settings.SECRET_KEY).encode()
+    return hmac.new(key, merchant_id.encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def anonymize(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn what the middleware saw into a capture record."""
+    on = datetime.utcfromtimestamp(raw["ts"]).date()
+    record = {
+        "ts": raw["ts"],
+        "method": raw["method"],
+        "route": raw["route"],
+        "path_params": {name: shape(value, on) for name, value in raw["path_params"].items()},
+        "query": {name: shape(value, on) for name, value in parse_qsl(raw["query_string"], keep_blank_values=True)},
+        "body": None,
+        "merchant": merchant_hash(raw["merchant_id"]),
+        "status": raw["status"],
+        "duration_ms": raw["duration_ms"],
+        "sample_rate": raw["sample_rate"],
+    }
+    if raw["body"]:
+        try:
+            body = json.loads(raw["body"])
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            record["body"] = {name: shape(value, on) for name, value in body.items()}
+        elif body is not None:
+            record["body"] = shape(body, on)
+    return record
+
+
+class CaptureWriter:
+    """Appends capture records to rotating JSONL files on a background thread.
+
+    Each process writes its own file (requests-<host>-<pid>.jsonl in the
+    capture directory), so uvicorn workers never rotate each other's files.
+    Like the slow query log, the thread is started per process on first use
+    and records are dropped rather than slowing requests down when it falls
+    behind.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, backup_count: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._queue: Optional["queue.Queue[Dict[str, Any]]"] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _worker_queue(self) -> "queue.Queue[Dict[str, Any]]":
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=10000)
+                    threading.Thread(
+                        target=self._run, args=(self._queue,), name="request-capture", daemon=True
+                    ).start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def submit(self, raw: Dict[str, Any]) -> None:
+        try:
+            self._worker_queue().put_nowait(raw)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Wait until everything submitted so far is written."""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def _run(self, records: "queue.Queue[Dict[str, Any]]") -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            os.path.join(self.directory, f"requests-{socket.gethostname()}-{os.getpid()}.jsonl"),
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding="utf-8",
+        )
+        while True:
+            raw = records.get()
+            try:
+                line = json.dumps(anonymize(raw), default=str)
+                handler.handle(logging.makeLogRecord({"msg": line, "args": None}))
+            except Exception:
+                logger.exception("Could not write a request capture record")
+            finally:
+                records.task_done()
+
+
+_capture_writer: Optional[CaptureWriter] = None
+
+
+def _writer() -> CaptureWriter:
+    global _capture_writer
+    if _capture_writer is None:
+        _capture_writer = CaptureWriter(
+            settings.REQUEST_CAPTURE_DIR,
+            max_bytes=settings.REQUEST_CAPTURE_MAX_BYTES,
+            backup_count=settings.REQUEST_CAPTURE_BACKUP_COUNT,
+        )
+    return _capture_writer
+
+
+def _json_body(scope: Scope) -> bool:
+    for key, value in scope["headers"]:
+        if key == b"content-type":
+            return b"json" in value
+    return False
+
+
+class RequestCaptureMiddleware:
+    """Capture anonymized metadata of sampled requests for traffic replay.
+
+    Off unless REQUEST_CAPTURE_ENABLED. For REQUEST_CAPTURE_SAMPLE_RATE of
+    the requests it records the route template, the shape of the path,
+    query and JSON body parameters (see shape()), a keyed hash of the
+    merchant, the status and the duration. Identifiers, names, phone numbers
+    and amounts never reach the file. benchmarks/replay_traffic.py replays
+    the captures against a staging instance.
+
+    Must run inside RequestMetricsMiddleware, which opens the request context
+    the merchant is read from.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        sample_rate = settings.REQUEST_CAPTURE_SAMPLE_RATE
+        if scope["type"] != "http" or not settings.REQUEST_CAPTURE_ENABLED or random.random() >= sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        started = time.perf_counter()
+        status = 500
+        body = bytearray() if _json_body(scope) else None
+
+        async def receive_with_capture() -> Message:
+            message = await receive()
+            if body is not None and message["type"] == "http.request" and len(body) <= _MAX_BODY_BYTES:
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_with_capture(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_with_capture, send_with_capture)
+        finally:
+            route = route_label(scope)
+            if route not in _SKIPPED_ROUTES:
+                request = current_request()
+                # Shaping and hashing happen on the writer thread
+                _writer().submit({
+                    "ts": round(started_at, 3),
+                    "method": scope["method"],
+                    "route": route,
+                    "path_params": dict(scope.get("path_params") or {}),
+                    "query_string": scope.get("query_string", b"").decode("latin-1"),
+                    "body": bytes(body) if body and len(body) <= _MAX_BODY_BYTES else None,
+                    "merchant_id": request.merchant_id if request else None,
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "sample_rate": sample_rate,
+                })
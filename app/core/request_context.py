@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+from starlette.types import Scope
+
+# Label for requests that matched no route, so unknown paths cannot blow up
+# metric label cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_label(scope: Scope) -> str:
+    """The matched route's path template (/api/v1/invoices/{invoice_id})."""
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+@dataclass
+class RequestContext:
+    """What is known about the HTTP request being served.
+
+    One object per request, shared by reference: sync dependencies run in
+    the thread pool with a copy of the context, so they fill in attributes
+    (merchant_id) instead of setting context variables.
+    """
+    method: str
+    scope: Dict[str, Any] = field(repr=False)
+    merchant_id: Optional[str] = None
+
+    @property
+    def route(self) -> str:
+        # The router adds the matched route to the scope once it has routed
+        return route_label(self.scope)
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request() -> Optional[RequestContext]:
+    return _current.get()
+
+
+def set_request_merchant(merchant_id: Any) -> None:
+    context = _current.get()
+    if context is not None:
+        context.merchant_id = str(merchant_id)
+
+
+@contextmanager
+def request_context(scope: Scope) -> Iterator[RequestContext]:
+    context = RequestContext(method=scope.get("method", ""), scope=scope)
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
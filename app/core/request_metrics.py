@@ -0,0 +1,78 @@
+import time
+
+from prometheus_client import Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+from app.core.request_context import request_context, route_label
+from app.core.sql_stats import track_sql
+
+
+REQUEST_DURATION = Histogram(
+    "payping_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    registry=registry,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "payping_http_request_db_seconds",
+    "Time spent executing SQL per HTTP request",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=registry,
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "payping_http_request_sql_statements",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+    registry=registry,
+)
+
+class RequestMetricsMiddleware:
+    """Record latency, SQL time and SQL statement count of every HTTP request.
+
+    Also opens the request context (app.core.request_context) that the
+    slow query log reads the route and merchant from. SQL is counted
+    through the engine events in app.core.sql_stats, so sync endpoints
+    running in the thread pool are included. With ``debug_headers`` each
+    response also carries its own numbers:
+    ``Server-Timing: app;dur=…, db;dur=…`` and ``X-SQL-Statements``.
+    """
+
+    def __init__(self, app: ASGIApp, debug_headers: bool = False):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        with request_context(scope), track_sql() as sql:
+            async def send_with_metrics(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if self.debug_headers:
+                        elapsed_ms = (time.perf_counter() - started) * 1000
+                        headers = MutableHeaders(scope=message)
+                        headers.append(
+                            "Server-Timing",
+                            f"app;dur={elapsed_ms:.1f}, db;dur={sql.seconds * 1000:.1f}",
+                        )
+                        headers.append("X-SQL-Statements", str(sql.statements))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            finally:
+                method = scope["method"]
+                route = route_label(scope)
+                REQUEST_DURATION.labels(method, route, str(status)).observe(time.perf_counter() - started)
+                REQUEST_DB_SECONDS.labels(method, route).observe(sql.seconds)
+                REQUEST_SQL_STATEMENTS.labels(method, route).observe(sql.statements)
@@ -0,0 +1,365 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import replace
+from datetime import datetime
+from types import FrameType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+import redis
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.request_context import route_label
+from app.core.security import is_admin_key
+
+logger = logging.getLogger(__name__)
+
+# Sampling state set through the admin API, shared by all workers
+PROFILING_STATE_KEY = "profiling:requests"
+# How long a worker trusts its copy of the state before reading Redis again
+_STATE_REFRESH_SECONDS = 2.0
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Where a sample's time goes: the innermost frame from one of these packages
+_CATEGORIES = (
+    ("pydantic_core/", "pydantic"),
+    ("pydantic/", "pydantic"),
+    ("sqlalchemy/", "sqlalchemy"),
+    ("psycopg2/", "sqlalchemy"),
+    ("app/", "app"),
+)
+CATEGORIES = ("pydantic", "sqlalchemy", "app", "other", "waiting")
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+def _location(filename: str) -> str:
+    for marker in ("site-packages/", "dist-packages/"):
+        if marker in filename:
+            return filename.rsplit(marker, 1)[1]
+    if filename.startswith(_PROJECT_ROOT):
+        return os.path.relpath(filename, _PROJECT_ROOT)
+    return os.path.basename(filename)
+
+
+@functools.lru_cache(maxsize=None)
+def _label(code) -> str:
+    return f"{code.co_qualname} ({_location(code.co_filename)})"
+
+
+@functools.lru_cache(maxsize=None)
+def _category(code) -> Optional[str]:
+    location = _location(code.co_filename)
+    for prefix, category in _CATEGORIES:
+        if location.startswith(prefix):
+            return category
+    return None
+
+
+def categorize(codes: List[Any]) -> str:
+    """Category of a stack of code objects (outermost first): its innermost
+    pydantic, SQLAlchemy or app frame decides, so json.dumps called from a
+    service is app time and a psycopg2 wait under a query is SQLAlchemy time."""
+    for code in reversed(codes):
+        category = None if isinstance(code, str) else _category(code)
+        if category is not None:
+            return category
+    return "other"
+
+
+class RequestProfile:
+    """Wall-clock stack samples of one request, taken by a sampler thread.
+
+    A sample is taken every PROFILING_INTERVAL_MS from whichever thread works
+    for the request at that moment: the event loop thread while the request's
+    task runs on it, or a thread pool thread inside a sync endpoint or its
+    response validation (attributed by ProfiledRoute). Otherwise the request
+    is waiting (I/O, or a sync dependency in the pool) and the sample is the
+    task's await chain, marked [waiting].
+    """
+
+    def __init__(self, profile_id: str, scope: Scope, root: Any, interval: float):
+        self.profile_id = profile_id
+        self.scope = scope
+        self.root = root  # Code object of the frame stacks are cut below
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.threads: Set[int] = set()
+        self.stacks: Counter = Counter()
+        self.seconds: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.status = 500
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        """Attribute the calling thread to the request for the block."""
+        ident = threading.get_ident()
+        self.threads.add(ident)
+        try:
+            yield
+        finally:
+            self.threads.discard(ident)
+
+    def start(self) -> None:
+        _samplers.add(self._sampler)
+        self._sampler.start()
+
+    def stop(self, status: int) -> None:
+        self.status = status
+        self.elapsed = time.perf_counter() - self.started
+        self._stopped.set()
+
+    def _codes(self, frame: Optional[FrameType]) -> List[Any]:
+        codes = []
+        while frame is not None:
+            if frame.f_code is self.root or frame.f_code is _ATTRIBUTED_CODE:
+                break
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        return codes
+
+    def _waiting_codes(self) -> List[Any]:
+        # Task.get_stack() returns a single frame for a suspended task, so
+        # follow the await chain from the task's coroutine instead
+        codes = []
+        awaitable = self.task.get_coro() if self.task else None
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                break
+            if frame.f_code is self.root:
+                codes = []
+            else:
+                codes.append(frame.f_code)
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        return codes
+
+    def _sample(self, weight: float) -> None:
+        threads = set(self.threads)
+        if asyncio.current_task(self.loop) is self.task:
+            threads.add(self.loop_thread)
+        frames = sys._current_frames()
+        stacks = []
+        for ident in threads:
+            codes = self._codes(frames.get(ident))
+            if codes and ident != self.loop_thread:
+                # Hang pool work under the await that is waiting for it
+                codes = self._waiting_codes() + ["[thread pool]"] + codes
+            if codes:
+                stacks.append((codes, categorize(codes)))
+        if not stacks:
+            stacks.append((self._waiting_codes() + ["[waiting]"], "waiting"))
+        for codes, category in stacks:
+            self.stacks[";".join(code if isinstance(code, str) else _label(code) for code in codes)] += 1
+            self.seconds[category] += weight / len(stacks)
+        self.samples += 1
+
+    def _run(self) -> None:
+        try:
+            last = time.perf_counter()
+            while not self._stopped.wait(self.interval):
+                now = time.perf_counter()
+                self._sample(now - last)
+                last = now
+            self._write()
+        except Exception:
+            logger.exception("Request profile %s failed", self.profile_id)
+        finally:
+            _samplers.discard(self._sampler)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "ts": datetime.utcnow().isoformat(),
+            "method": self.scope.get("method"),
+            "route": route_label(self.scope),
+            "status": self.status,
+            "duration_ms": round(self.elapsed * 1000, 1),
+            "samples": self.samples,
+            "interval_ms": round(self.interval * 1000, 2),
+            "categories_ms": {category: round(self.seconds[category] * 1000, 1) for category in CATEGORIES},
+        }
+
+    def _write(self) -> None:
+        directory = settings.PROFILING_DIR
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{self.profile_id}.folded"), "w", encoding="utf-8") as folded:
+            for stack, count in self.stacks.most_common():
+                folded.write(f"{stack} {count}\n")
+        with _index_lock, open(os.path.join(directory, "profiles.jsonl"), "a", encoding="utf-8") as index:
+            index.write(json.dumps(self.summary()) + "\n")
+
+
+_samplers: Set[threading.Thread] = set()
+_index_lock = threading.Lock()
+
+
+def flush(timeout: float = 5.0) -> None:
+    """Wait until the profiles of finished requests are written."""
+    for sampler in list(_samplers):
+        sampler.join(timeout)
+
+
+def _run_attributed(profile: RequestProfile, call: Callable[..., Any], args: Any, kwargs: Any) -> Any:
+    with profile.thread():
+        return call(*args, **kwargs)
+
+
+# Thread pool stacks start below this frame
+_ATTRIBUTED_CODE = _run_attributed.__code__
+
+
+def _attributed(call: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(call)
+    def attributed(*args: Any, **kwargs: Any) -> Any:
+        profile = _active.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        return _run_attributed(profile, call, args, kwargs)
+
+    return attributed
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoint and response validation, which FastAPI
+    runs in the thread pool, are attributed to the request being profiled.
+
+    Costs one context variable lookup per call when the request is not
+    profiled. Routers opt in with APIRouter(route_class=ProfiledRoute).
+    """
+
+    def get_route_handler(self):
+        dependant = self.dependant
+        if inspect.iscoroutinefunction(dependant.call):
+            return super().get_route_handler()
+        if self.secure_cloned_response_field is not None:
+            # The clone is only used by this route's handler
+            field = self.secure_cloned_response_field
+            field.validate = _attributed(field.validate)
+        self.dependant = replace(dependant, call=_attributed(dependant.call))
+        try:
+            return super().get_route_handler()
+        finally:
+            self.dependant = dependant
+
+
+_state_rate = 0.0
+_state_checked = float("-inf")
+
+
+def get_profiling_state() -> Dict[str, Any]:
+    """Sample rate set through the admin API and seconds until it expires."""
+    client = get_redis()
+    raw = client.get(PROFILING_STATE_KEY)
+    if raw is None:
+        return {"sample_rate": 0.0, "expires_in_seconds": None}
+    return {"sample_rate": json.loads(raw)["sample_rate"], "expires_in_seconds": max(client.ttl(PROFILING_STATE_KEY), 0)}
+
+
+def set_profiling_state(sample_rate: float, duration_seconds: int) -> None:
+    if sample_rate > 0:
+        get_redis().set(PROFILING_STATE_KEY, json.dumps({"sample_rate": sample_rate}), ex=duration_seconds)
+    else:
+        get_redis().delete(PROFILING_STATE_KEY)
+    global _state_checked
+    _state_checked = float("-inf")
+
+
+def _sample_rate() -> float:
+    """The shared sample rate, read from Redis at most every few seconds."""
+    global _state_rate, _state_checked
+    now = time.monotonic()
+    if now - _state_checked >= _STATE_REFRESH_SECONDS:
+        _state_checked = now
+        try:
+            _state_rate = get_profiling_state()["sample_rate"]
+        except redis.RedisError as exc:
+            logger.warning("Could not read the profiling state: %s", exc)
+            _state_rate = 0.0
+    return _state_rate
+
+
+def _requested(scope: Scope) -> bool:
+    profile = admin_key = None
+    for key, value in scope["headers"]:
+        if key == b"x-profile":
+            profile = value
+        elif key == b"x-admin-key":
+            admin_key = value
+    return profile == b"1" and admin_key is not None and is_admin_key(admin_key.decode("latin-1"))
+
+
+class RequestProfilerMiddleware:
+    """Sample the stacks of selected requests into flamegraph input.
+
+    A request is profiled when it carries ``X-Profile: 1`` with a valid
+    ``X-Admin-Key`` (the response then names its profile in
+    ``X-Profile-Id``), or at random at the rate set through
+    /api/v1/admin/profiling. Each profile is written to PROFILING_DIR as
+    folded stacks (<profile id>.folded, for flamegraph.pl or speedscope) and
+    summarized in profiles.jsonl with the time spent in Pydantic, SQLAlchemy,
+    our own code, everything else, and waiting.
+
+    Does nothing unless ADMIN_API_KEY is set; otherwise unprofiled requests
+    cost a header scan and a cached sample rate check. Must be the innermost
+    middleware: stacks start below it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.ADMIN_API_KEY:
+            await self.app(scope, receive, send)
+            return
+        requested = _requested(scope)
+        if not requested:
+            rate = _sample_rate()
+            if rate <= 0 or random.random() >= rate:
+                await self.app(scope, receive, send)
+                return
+
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{secrets.token_hex(4)}"
+        profile = RequestProfile(
+            profile_id, scope, RequestProfilerMiddleware.__call__.__code__, settings.PROFILING_INTERVAL_MS / 1000
+        )
+        status = 500
+
+        async def send_with_profile(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if requested:
+                    MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        token = _active.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profile.stop(status)
+            _active.reset(token)
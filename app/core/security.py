@@ -1,12 +1,16 @@
+import hmac
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Union
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.request_context import set_request_merchant
 from app.models.merchant import Merchant
+from app.schemas.merchant import MerchantResponse
+from app.services.cached_reads import get_merchant_profile
 
 
 security = HTTPBearer()
@@ -34,11 +38,8 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 
-def get_current_merchant(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> Merchant:
-    """Get the current authenticated merchant from JWT token"""
+def _credentials_phone(credentials: HTTPAuthorizationCredentials) -> str:
+    """Phone of the merchant the bearer token was issued to"""
     token = credentials.credentials
     payload = verify_token(token)
     
@@ -56,8 +57,10 @@ def get_current_merchant(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    merchant = db.query(Merchant).filter(Merchant.phone == phone).first()
+    return phone
+
+
+def _check_merchant(merchant: Optional[Union[Merchant, MerchantResponse]]) -> None:
     if merchant is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,5 +76,49 @@ def get_current_merchant(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    set_request_merchant(merchant.id)
+
+
+def get_current_merchant(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Merchant:
+    """Get the current authenticated merchant from JWT token"""
+    phone = _credentials_phone(credentials)
+    merchant = db.query(Merchant).filter(Merchant.phone == phone).first()
+    _check_merchant(merchant)
     return merchant
 
+
+def get_current_merchant_profile(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> MerchantResponse:
+    """Get the current authenticated merchant's profile from the cache.
+
+    For read-only endpoints: no ORM object, and no query when cached. A
+    deactivation made outside the API takes effect when the entry expires.
+    """
+    profile = get_merchant_profile(db, _credentials_phone(credentials))
+    _check_merchant(profile)
+    return profile
+
+
+def is_admin_key(value: Optional[str]) -> bool:
+    """Whether value is the configured ADMIN_API_KEY (never true when none is set)"""
+    expected = settings.ADMIN_API_KEY
+    return bool(expected and value) and hmac.compare_digest(value, expected)
+
+
+def verify_admin_key(x_admin_key: Optional[str] = Header(None)) -> None:
+    """Admit operators presenting ADMIN_API_KEY in X-Admin-Key"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin key"
+        )
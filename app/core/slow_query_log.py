@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.request_context import current_request
+
+logger = logging.getLogger(__name__)
+
+# Connections opened by the log itself (EXPLAIN) carry this execution option
+# so their statements are never logged or explained again
+_SKIP_OPTION = "slow_query_log_skip"
+
+# Only plain reads are explained: EXPLAIN ANALYZE executes the statement
+_EXPLAINABLE = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_LOCKING = re.compile(r"\bFOR\s+(UPDATE|NO KEY UPDATE|SHARE|KEY SHARE)\b", re.IGNORECASE)
+
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement with parameters and literals normalized, so executions of
+    the same query (whatever the values or IN-list length) group together."""
+    normalized = _LITERAL.sub("?", _PARAMETER.sub("?", statement))
+    normalized = _IN_LIST.sub("(...)", " ".join(normalized.split()))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def redact(parameters: Any) -> Any:
+    """Parameter names and value types only; values may be personal data."""
+    if isinstance(parameters, dict):
+        return {name: redact(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        # executemany: the row count is what matters
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} rows>"
+        return [redact(value) for value in parameters]
+    if parameters is None:
+        return None
+    return f"<{type(parameters).__name__}>"
+
+
+class SlowQueryLog:
+    """Records statements slower than a threshold, with sampled query plans.
+
+    Slow statements are logged and appended to a JSONL file
+    (SLOW_QUERY_LOG_PATH) with redacted parameters and the route and
+    merchant of the request that ran them. A sampled fraction of slow
+    SELECTs is re-run with EXPLAIN (ANALYZE, BUFFERS) on a separate
+    connection and the plan stored with the record. File writes and EXPLAINs
+    happen on a background thread, started per process on first use (forked
+    Celery and pool workers do not inherit it); when it falls behind, records
+    are dropped rather than slowing requests down.
+    """
+
+    def __init__(self, engine: Engine, threshold_ms: float, explain_sample_rate: float, path: str):
+        self.engine = engine
+        self.threshold = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.path = path
+        self.dropped = 0
+        self._queue: Optional["queue.Queue[Tuple[Dict[str, Any], Any, bool]]"] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _worker_queue(self) -> "queue.Queue[Tuple[Dict[str, Any], Any, bool]]":
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=1000)
+                    threading.Thread(
+                        target=self._run, args=(self._queue,), name="slow-query-log", daemon=True
+                    ).start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("slow_query_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if elapsed < self.threshold or conn.get_execution_options().get(_SKIP_OPTION):
+            return
+
+        request = current_request()
+        record = {
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(elapsed * 1000, 1),
+            "fingerprint": fingerprint(statement),
+            "statement": statement,
+            "parameters": redact(parameters),
+            "route": f"{request.method} {request.route}" if request else None,
+            "merchant_id": request.merchant_id if request else None,
+        }
+        logger.warning(
+            "Slow query %s (%.0f ms) route=%s merchant=%s: %s",
+            record["fingerprint"], record["duration_ms"], record["route"], record["merchant_id"],
+            " ".join(statement.split())[:500],
+        )
+
+        explain = (
+            not executemany
+            and _EXPLAINABLE.match(statement)
+            and not _LOCKING.search(statement)
+            and random.random() < self.explain_sample_rate
+        )
+        try:
+            # The real parameters travel only as far as the EXPLAIN
+            self._worker_queue().put_nowait((record, parameters if explain else None, bool(explain)))
+        except queue.Full:
+            self.dropped += 1
+
+    def _explain(self, statement: str, parameters: Any) -> Dict[str, Any]:
+        with self.engine.connect().execution_options(**{_SKIP_OPTION: True}) as connection:
+            try:
+                result = connection.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+                )
+                plan = result.scalar()
+            finally:
+                connection.rollback()
+        return plan[0] if isinstance(plan, list) else plan
+
+    def _run(self, records: "queue.Queue[Tuple[Dict[str, Any], Any, bool]]") -> None:
+        while True:
+            record, parameters, explain = records.get()
+            if explain:
+                try:
+                    record["plan"] = self._explain(record["statement"], parameters)
+                except Exception as exc:
+                    record["explain_error"] = f"{type(exc).__name__}: {exc}"[:500]
+            try:
+                with open(self.path, "a", encoding="utf-8") as store:
+                    store.write(json.dumps(record, default=str) + "\n")
+            except OSError:
+                logger.exception("Could not write the slow query log to %s", self.path)
+
+
+_log: Optional[SlowQueryLog] = None
+
+
+def install(engine: Engine) -> Optional[SlowQueryLog]:
+    """Start logging slow statements on the engine; off when the threshold is 0."""
+    global _log
+    if settings.SLOW_QUERY_THRESHOLD_MS <= 0 or _log is not None:
+        return _log
+    _log = SlowQueryLog(
+        engine,
+        threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+        explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        path=settings.SLOW_QUERY_LOG_PATH,
+    )
+    event.listen(engine, "before_cursor_execute", _log.before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _log.after_cursor_execute)
+    return _log
@@ -0,0 +1,55 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class SQLStats:
+    """SQL statements executed while tracking, and the time spent in them."""
+    statements: int = 0
+    seconds: float = 0.0
+
+
+_current: ContextVar[Optional[SQLStats]] = ContextVar("sql_stats", default=None)
+
+
+@contextmanager
+def track_sql() -> Iterator[SQLStats]:
+    """Count statements executed in this context (request, job) until exit.
+
+    The stats object travels with the context, so work handed to a thread
+    pool with a copied context (FastAPI sync endpoints) is counted too.
+    """
+    stats = SQLStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("sql_stats_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("sql_stats_started")
+    if not started:
+        return
+    stats.statements += 1
+    stats.seconds += time.perf_counter() - started.pop()
+
+
+def install(engine: Engine) -> None:
+    """Listen to the engine's cursor executions; a no-op outside track_sql()."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,502 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import requests
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.request_context import current_request, route_label
+from app.core.slow_query_log import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# W3C Trace Context: version-trace_id-parent_id-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+_EXPORT_BATCH_SIZE = 512
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """The part of a span that crosses process boundaries."""
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: Any) -> Optional[SpanContext]:
+    if not isinstance(value, str):
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if not match or match.group(1) == _INVALID_TRACE_ID or match.group(2) == _INVALID_SPAN_ID:
+        return None
+    return SpanContext(match.group(1), match.group(2), bool(int(match.group(3), 16) & 1))
+
+
+@dataclass
+class Span:
+    """One timed step of a trace. Times are Unix timestamps, so spans
+    recorded by different processes line up on one timeline."""
+    name: str
+    context: SpanContext
+    parent_id: Optional[str] = None
+    start_time: float = field(default_factory=time.time)
+    end_time: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def recording(self) -> bool:
+        return self.context.sampled
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.recording:
+            self.attributes[key] = value
+
+    def end(self, end_time: Optional[float] = None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = end_time if end_time is not None else time.time()
+        if self.recording:
+            _exporter().submit(self)
+
+    def to_dict(self, service: str) -> Dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": service,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round((self.end_time - self.start_time) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# Stands in for a span when tracing is off or no trace is active
+_NON_RECORDING = Span("", SpanContext(_INVALID_TRACE_ID, _INVALID_SPAN_ID, sampled=False))
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_service_name = "payping"
+
+
+def configure(service_name: str) -> None:
+    """Name the process in exported spans (payping-api, payping-worker, ...)."""
+    global _service_name
+    _service_name = service_name
+
+
+def current_span() -> Span:
+    return _current.get() or _NON_RECORDING
+
+
+def _child_of(name: str, parent: SpanContext, attributes: Mapping[str, Any]) -> Span:
+    return Span(
+        name=name,
+        context=SpanContext(parent.trace_id, secrets.token_hex(8), parent.sampled),
+        parent_id=parent.span_id,
+        attributes=dict(attributes) if parent.sampled else {},
+    )
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.error = f"{type(exc).__name__}: {exc}"[:500]
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+
+def start_trace(name: str, parent: Optional[SpanContext] = None, **attributes: Any) -> Span:
+    """A span continuing ``parent``, or the root of a new trace.
+
+    New traces are sampled at TRACING_SAMPLE_RATE; a propagated parent keeps
+    its own decision. The span is not made current; see trace().
+    """
+    if not settings.TRACING_ENABLED:
+        return _NON_RECORDING
+    if parent is None:
+        sampled = random.random() < settings.TRACING_SAMPLE_RATE
+        context = SpanContext(secrets.token_hex(16), secrets.token_hex(8), sampled)
+        return Span(name, context, attributes=dict(attributes) if sampled else {})
+    return _child_of(name, parent, attributes)
+
+
+@contextmanager
+def trace(name: str, parent: Optional[SpanContext] = None, **attributes: Any) -> Iterator[Span]:
+    """Run the block in a span that may start a new trace (entry points:
+    HTTP requests, Celery tasks)."""
+    started = start_trace(name, parent, **attributes)
+    if started is _NON_RECORDING:
+        yield started
+        return
+    with _activate(started):
+        yield started
+
+
+@contextmanager
+def span(name: str, parent: Optional[SpanContext] = None, **attributes: Any) -> Iterator[Span]:
+    """Run the block in a child of ``parent`` or of the current span.
+
+    Never starts a trace: without a parent the block runs untraced, so
+    background loops (the relay, pollers) only record work that belongs to
+    a traced request.
+    """
+    if parent is None and _current.get() is not None:
+        parent = _current.get().context
+    if parent is None or not settings.TRACING_ENABLED:
+        yield _NON_RECORDING
+        return
+    with _activate(_child_of(name, parent, attributes)) as child:
+        yield child
+
+
+def record_span(
+    name: str,
+    parent: SpanContext,
+    start_time: float,
+    end_time: float,
+    **attributes: Any,
+) -> None:
+    """Record a span after the fact, e.g. time a message spent waiting."""
+    if not settings.TRACING_ENABLED or not parent.sampled:
+        return
+    child = _child_of(name, parent, attributes)
+    child.start_time = start_time
+    child.end(end_time)
+
+
+def inject() -> Dict[str, str]:
+    """HTTP headers that continue the current trace in another service."""
+    current = _current.get()
+    if current is None or not settings.TRACING_ENABLED:
+        return {}
+    return {"traceparent": current.context.traceparent}
+
+
+def message_headers() -> Dict[str, Any]:
+    """Trace headers for a queued message (outbox row, Celery task, Redis item).
+
+    ``sent_at`` lets the consumer record how long the message waited.
+    """
+    headers: Dict[str, Any] = inject()
+    if headers:
+        headers["sent_at"] = time.time()
+    return headers
+
+
+def extract(headers: Optional[Mapping[str, Any]]) -> Optional[SpanContext]:
+    if not headers:
+        return None
+    return parse_traceparent(headers.get("traceparent"))
+
+
+def record_wait(name: str, headers: Optional[Mapping[str, Any]], **attributes: Any) -> None:
+    """Record the time since a message was queued with message_headers().
+
+    Across hosts this includes their clock skew.
+    """
+    parent = extract(headers)
+    sent_at = headers.get("sent_at") if headers else None
+    if parent is None or not isinstance(sent_at, (int, float)):
+        return
+    record_span(name, parent, sent_at, max(time.time(), sent_at), **attributes)
+
+
+class SpanExporter(ABC):
+    """Ships finished spans in batches from a background thread.
+
+    The thread is started per process on first use (forked Celery and pool
+    workers do not inherit it). When it falls behind, spans are dropped
+    rather than slowing down the traced work; what is queued at exit is
+    flushed for up to a few seconds.
+    """
+
+    def __init__(self):
+        self.dropped = 0
+        self._queue: Optional["queue.Queue[Dict[str, Any]]"] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _worker_queue(self) -> "queue.Queue[Dict[str, Any]]":
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=10000)
+                    threading.Thread(
+                        target=self._run, args=(self._queue,), name="span-exporter", daemon=True
+                    ).start()
+                    self._pid = os.getpid()
+                    atexit.register(self.flush)
+        return self._queue
+
+    def submit(self, finished: Span) -> None:
+        try:
+            self._worker_queue().put_nowait(finished.to_dict(_service_name))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        while self._queue is not None and self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    @abstractmethod
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        """Ship one batch of finished spans."""
+
+    def _run(self, spans: "queue.Queue[Dict[str, Any]]") -> None:
+        while True:
+            batch = [spans.get()]
+            while len(batch) < _EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(spans.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.export(batch)
+            except Exception:
+                logger.exception("Could not export %d spans", len(batch))
+            finally:
+                for _ in batch:
+                    spans.task_done()
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends spans to a JSONL file, one span per line."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as store:
+            for item in spans:
+                store.write(json.dumps(item, default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(item: Dict[str, Any]) -> Dict[str, Any]:
+    otlp = {
+        "traceId": item["trace_id"],
+        "spanId": item["span_id"],
+        "name": item["name"],
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(int(item["start_time"] * 1e9)),
+        "endTimeUnixNano": str(int(item["end_time"] * 1e9)),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)} for key, value in item["attributes"].items()
+        ],
+        "status": {"code": 2, "message": item["error"]} if item["error"] else {"code": 1},
+    }
+    if item["parent_id"]:
+        otlp["parentSpanId"] = item["parent_id"]
+    return otlp
+
+
+class OTLPSpanExporter(SpanExporter):
+    """Posts spans to an OpenTelemetry collector (OTLP/HTTP, JSON encoding)."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        super().__init__()
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        by_service: Dict[str, List[Dict[str, Any]]] = {}
+        for item in spans:
+            by_service.setdefault(item["service"], []).append(_otlp_span(item))
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                    "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": otlp_spans}],
+                }
+                for service, otlp_spans in by_service.items()
+            ]
+        }
+        response = requests.post(self.endpoint, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+
+_span_exporter: Optional[SpanExporter] = None
+
+
+def _exporter() -> SpanExporter:
+    global _span_exporter
+    if _span_exporter is None:
+        if settings.TRACING_EXPORTER == "otlp":
+            _span_exporter = OTLPSpanExporter(settings.TRACING_OTLP_ENDPOINT)
+        else:
+            _span_exporter = FileSpanExporter(settings.TRACING_FILE_PATH)
+    return _span_exporter
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current.get()
+    conn.info.setdefault("trace_started", []).append(
+        time.time() if current is not None and current.recording else None
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("trace_started")
+    if not started:
+        return
+    start_time = started.pop()
+    current = _current.get()
+    if start_time is None or current is None:
+        return
+    record_span(
+        "db.query",
+        current.context,
+        start_time,
+        time.time(),
+        statement=" ".join(statement.split())[:1000],
+        fingerprint=fingerprint(statement),
+        executemany=executemany,
+    )
+
+
+def install(engine: Engine) -> None:
+    """Record a db.query span for every statement run inside a traced span."""
+    if not settings.TRACING_ENABLED or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class TracingMiddleware:
+    """Trace every HTTP request, continuing the caller's ``traceparent``.
+
+    Runs inside RequestMetricsMiddleware so the span can carry the route and
+    merchant from the request context. Sampled responses carry the trace id
+    in ``X-Trace-Id``.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        parent = extract({
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+            if key == b"traceparent"
+        })
+        with trace(f"HTTP {scope['method']}", parent=parent, method=scope["method"], path=scope["path"]) as request_span:
+            async def send_with_trace(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("status", message["status"])
+                    if request_span.recording:
+                        MutableHeaders(scope=message).append("X-Trace-Id", request_span.context.trace_id)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = route_label(scope)
+                request_span.name = f"HTTP {scope['method']} {route}"
+                request_span.set_attribute("route", route)
+                request = current_request()
+                if request is not None and request.merchant_id:
+                    request_span.set_attribute("merchant_id", request.merchant_id)
+
+
+# Celery tasks in flight in this worker process: task id -> (span, token)
+_task_spans: Dict[str, Tuple[Span, Any]] = {}
+
+
+def _task_headers(task) -> Dict[str, Any]:
+    # Custom message headers become attributes of the task request; eagerly
+    # applied tasks only have them under request.headers
+    nested = task.request.headers or {}
+    return {
+        key: getattr(task.request, key, None) or nested.get(key)
+        for key in ("traceparent", "sent_at")
+    }
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    if not settings.TRACING_ENABLED:
+        return
+    headers = _task_headers(task)
+    queue_name = (task.request.delivery_info or {}).get("routing_key")
+    record_wait("celery.queue_wait", headers, task=task.name, queue=queue_name, retries=task.request.retries)
+    started = start_trace(
+        f"celery.task {task.name}", parent=extract(headers),
+        task=task.name, queue=queue_name, retries=task.request.retries,
+    )
+    _task_spans[task_id] = (started, _current.set(started))
+
+
+def _task_failure(task_id=None, exception=None, **kwargs):
+    entry = _task_spans.get(task_id)
+    if entry is not None:
+        entry[0].error = f"{type(exception).__name__}: {exception}"[:500]
+
+
+def _task_postrun(task_id=None, state=None, **kwargs):
+    entry = _task_spans.pop(task_id, None)
+    if entry is None:
+        return
+    finished, token = entry
+    finished.set_attribute("state", state)
+    _current.reset(token)
+    finished.end()
+
+
+def _configure_worker(**kwargs):
+    configure("payping-worker")
+
+
+def install_celery_signals() -> None:
+    """Trace every task a worker runs, continuing the publisher's trace."""
+    from celery import signals
+
+    signals.worker_init.connect(_configure_worker, weak=False)
+    signals.worker_process_init.connect(_configure_worker, weak=False)
+    signals.task_prerun.connect(_task_prerun, weak=False)
+    signals.task_failure.connect(_task_failure, weak=False)
+    signals.task_postrun.connect(_task_postrun, weak=False)
@@ -1,7 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from app.core.database import engine, Base
 from app.core.config import settings
+from app.core.metrics import registry, render_metrics, CONTENT_TYPE_LATEST
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.request_capture import RequestCaptureMiddleware
+from app.core.request_profiler import RequestProfilerMiddleware
+from app.core import tracing
 from app.api.v1 import api_router
+from app.services.provider_guard import ProviderGuardCollector
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -12,9 +18,25 @@ app = FastAPI(
     version=settings.PROJECT_VERSION
 )
 
+# Sampled stack profiles of selected requests (ADMIN_API_KEY; see /api/v1/admin/profiling)
+app.add_middleware(RequestProfilerMiddleware)
+
+# Anonymized request metadata for traffic replay (REQUEST_CAPTURE_ENABLED)
+app.add_middleware(RequestCaptureMiddleware)
+
+# Trace requests through the outbox and Celery to the provider (TRACING_ENABLED)
+tracing.configure("payping-api")
+app.add_middleware(tracing.TracingMiddleware)
+
+# Per-route latency, SQL time and SQL statement count, exported on /metrics
+app.add_middleware(RequestMetricsMiddleware, debug_headers=settings.DEBUG)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# WhatsApp provider circuit breaker state, read from Redis at scrape time
+registry.register(ProviderGuardCollector())
+
 
 @app.get("/")
 def root():
@@ -29,3 +51,8 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
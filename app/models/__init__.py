@@ -5,6 +5,9 @@ from app.models.invoice import Invoice
 from app.models.recurring_invoice import RecurringInvoice
 from app.models.whatsapp_message import WhatsAppMessage
 from app.models.payment_confirmation import PaymentConfirmation
+from app.models.outbox_message import OutboxMessage
+from app.models.dead_letter_message import DeadLetterMessage
+from app.models.batch_job_run import BatchJobRun
 
 __all__ = [
     "Merchant",
@@ -14,4 +17,7 @@ __all__ = [
     "RecurringInvoice",
     "WhatsAppMessage",
     "PaymentConfirmation",
+    "OutboxMessage",
+    "DeadLetterMessage",
+    "BatchJobRun",
 ]
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Text, TIMESTAMP, Integer, Float, Index, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+import uuid
+
+
+class BatchJobRun(Base):
+    """One run of a scheduled batch job, with its outcome and watermark."""
+    __tablename__ = "batch_job_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_name = Column(String(100), nullable=False)
+    status = Column(String(20), default='RUNNING', nullable=False)
+    host = Column(String(255))
+
+    started_at = Column(TIMESTAMP, nullable=False)
+    finished_at = Column(TIMESTAMP)
+    duration_seconds = Column(Float)
+
+    rows_processed = Column(Integer, default=0, nullable=False)
+    # Where the next run should pick up (job-defined, e.g. the last date processed)
+    watermark = Column(String(255))
+    error = Column(Text)
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('RUNNING', 'SUCCEEDED', 'FAILED')",
+            name='batch_job_runs_status_check'
+        ),
+        Index("idx_batch_job_runs_job_started", "job_name", "started_at"),
+    )
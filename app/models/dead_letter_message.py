@@ -0,0 +1,42 @@
+from sqlalchemy import Column, String, Text, TIMESTAMP, ForeignKey, Integer, Index, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+import uuid
+
+
+class DeadLetterMessage(Base):
+    """A Celery task that exhausted its retries, kept for inspection and replay."""
+    __tablename__ = "dead_letter_messages"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    merchant_id = Column(UUID(as_uuid=True), ForeignKey("merchants.id", ondelete="CASCADE"), nullable=True)
+    whatsapp_message_id = Column(UUID(as_uuid=True), ForeignKey("whatsapp_messages.id", ondelete="SET NULL"), nullable=True)
+
+    task_name = Column(String(255), nullable=False)
+    args = Column(JSONB, nullable=False, default=list)
+    kwargs = Column(JSONB, nullable=False, default=dict)
+    queue = Column(String(50))
+
+    error_type = Column(String(100), nullable=False)
+    error = Column(Text)
+    attempts = Column(JSONB, nullable=False, default=list)  # [{"at": ..., "error_type": ..., "error": ...}]
+    attempt_count = Column(Integer, default=0, nullable=False)
+
+    status = Column(String(20), default='PENDING', nullable=False)
+    replay_count = Column(Integer, default=0, nullable=False)
+    replayed_at = Column(TIMESTAMP)
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('PENDING', 'REPLAYED', 'DISCARDED')",
+            name='dead_letter_messages_status_check'
+        ),
+        Index("idx_dead_letter_messages_status_merchant", "status", "merchant_id", "created_at"),
+    )
+
+    # Relationships
+    whatsapp_message = relationship("WhatsAppMessage")
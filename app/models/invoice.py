@@ -8,6 +8,8 @@ from sqlalchemy import (
     Boolean,
     Numeric,
     Date,
+    Index,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
@@ -27,6 +29,8 @@ class Invoice(Base):
         ForeignKey("recurring_invoices.id", ondelete="SET NULL"),
         nullable=True,
     )
+    # Generation date of a recurring invoice; one invoice per template and period
+    period_date = Column(Date, nullable=True)
     
     invoice_number = Column(String(50))
     description = Column(Text)
@@ -47,6 +51,15 @@ class Invoice(Base):
             "status IN ('UNPAID', 'PAID')",
             name='invoices_status_check'
         ),
+        Index(
+            "uq_invoices_recurring_period",
+            "recurring_invoice_id",
+            "period_date",
+            unique=True,
+            postgresql_where=text("period_date IS NOT NULL"),
+        ),
+        # Invoice lists are filtered by merchant and ordered by creation time
+        Index("idx_invoices_merchant_created_at", "merchant_id", "created_at"),
     )
 
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, TIMESTAMP, CheckConstraint, Boolean
+from sqlalchemy import Column, String, Text, TIMESTAMP, CheckConstraint, Boolean, Time
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -23,6 +23,10 @@ class Merchant(Base):
     upi_qr_s3_url = Column(Text)
     is_active = Column(Boolean, default=True, nullable=False)
     plan = Column(String(20), default='trial', nullable=False)
+    # Daily window (local time in `timezone`) in which WhatsApp messages may be sent
+    send_window_start = Column(Time, nullable=True)
+    send_window_end = Column(Time, nullable=True)
+    timezone = Column(String(50), default='Asia/Kolkata', nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
     __table_args__ = (
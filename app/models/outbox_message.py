@@ -0,0 +1,49 @@
+from sqlalchemy import Column, String, Text, TIMESTAMP, ForeignKey, Integer, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from app.core.database import Base
+import uuid
+
+
+class OutboxMessage(Base):
+    """A Celery task waiting to be published to the broker.
+
+    Rows are written in the same transaction as the business change that
+    triggers them and deleted by the outbox relay once published.
+    """
+    __tablename__ = "outbox_messages"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    merchant_id = Column(UUID(as_uuid=True), ForeignKey("merchants.id", ondelete="CASCADE"), nullable=True)
+
+    task_name = Column(String(255), nullable=False)
+    args = Column(JSONB, nullable=False, default=list)
+    kwargs = Column(JSONB, nullable=False, default=dict)
+    headers = Column(JSONB, nullable=False, default=dict)  # Trace context passed on to the Celery task
+    queue = Column(String(50))
+
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    available_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    scheduled_for = Column(TIMESTAMP, nullable=True)  # Handed to the send scheduler if in the future
+    coalesce_key = Column(String(100), nullable=True)  # Rows sharing a key are merged into one digest
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_outbox_messages_available_at", "available_at", "created_at"),
+        # Head of each merchant's backlog, read by the relay's fair-share claim
+        Index(
+            "idx_outbox_messages_merchant_ready",
+            "merchant_id",
+            "available_at",
+            "created_at",
+            postgresql_where=text("coalesce_key IS NULL"),
+        ),
+        Index(
+            "idx_outbox_messages_coalesce_key",
+            "coalesce_key",
+            "available_at",
+            postgresql_where=text("coalesce_key IS NOT NULL"),
+        ),
+    )
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, String, Text, TIMESTAMP, ForeignKey, CheckConstraint, Numeric
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref
 from app.core.database import Base
 import uuid
 
@@ -18,6 +18,7 @@ class PaymentConfirmation(Base):
     customer_message = Column(Text)
     detected_intent = Column(String(100))
     llm_confidence = Column(Numeric(3, 2))
+    match_confidence = Column(Numeric(3, 2))  # Set when invoice_id was matched automatically
 
     status = Column(String(20), default='pending', nullable=False)
     
@@ -33,6 +34,7 @@ class PaymentConfirmation(Base):
 
     # Relationships
     merchant = relationship("Merchant", backref="payment_confirmations")
-    customer = relationship("Customer", backref="payment_confirmations")
+    # The database applies ON DELETE when a customer is deleted
+    customer = relationship("Customer", backref=backref("payment_confirmations", passive_deletes=True))
     invoice = relationship("Invoice", backref="payment_confirmations")
     whatsapp_message = relationship("WhatsAppMessage", backref="payment_confirmations")
@@ -11,7 +11,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref
 from app.core.database import Base
 import uuid
 
@@ -55,7 +55,8 @@ class RecurringInvoice(Base):
 
     # Relationships
     merchant = relationship("Merchant", backref="recurring_invoices")
-    customer = relationship("Customer", backref="recurring_invoices")
+    # The database applies ON DELETE when a customer is deleted
+    customer = relationship("Customer", backref=backref("recurring_invoices", passive_deletes=True))
     invoices = relationship(
         "Invoice",
         back_populates="recurring_invoice",
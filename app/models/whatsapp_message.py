@@ -1,7 +1,7 @@
 from sqlalchemy import Column, String, Text, TIMESTAMP, ForeignKey, CheckConstraint, Numeric
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref
 from app.core.database import Base
 import uuid
 
@@ -14,6 +14,8 @@ class WhatsAppMessage(Base):
     merchant_id = Column(UUID(as_uuid=True), ForeignKey("merchants.id", ondelete="CASCADE"), nullable=False)
     customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id", ondelete="SET NULL"), nullable=True)
     invoice_id = Column(UUID(as_uuid=True), ForeignKey("invoices.id", ondelete="SET NULL"), nullable=True)
+    # Set on reminders that were merged into a digest message instead of being sent
+    digest_message_id = Column(UUID(as_uuid=True), ForeignKey("whatsapp_messages.id", ondelete="SET NULL"), nullable=True)
     
     direction = Column(String(20), nullable=False)
     message_type = Column(String(20))
@@ -34,16 +36,18 @@ class WhatsAppMessage(Base):
             name='whatsapp_messages_direction_check'
         ),
         CheckConstraint(
-            "message_type IN ('invoice', 'followup', 'customer_message') OR message_type IS NULL",
+            "message_type IN ('invoice', 'followup', 'customer_message', 'digest') OR message_type IS NULL",
             name='whatsapp_messages_type_check'
         ),
         CheckConstraint(
-            "status IN ('PENDING', 'SENT', 'DELIVERED', 'READ', 'FAILED', 'RECEIVED')",
+            "status IN ('PENDING', 'SENT', 'DELIVERED', 'READ', 'FAILED', 'RECEIVED', 'CANCELLED')",
             name='whatsapp_messages_status_check'
         ),
     )
 
     # Relationships
     merchant = relationship("Merchant", backref="whatsapp_messages")
-    customer = relationship("Customer", backref="whatsapp_messages")
+    # The database applies ON DELETE when a customer is deleted
+    customer = relationship("Customer", backref=backref("whatsapp_messages", passive_deletes=True))
+    digest = relationship("WhatsAppMessage", remote_side=[id], backref="digested_messages")
 
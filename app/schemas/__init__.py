@@ -33,6 +33,14 @@ from app.schemas.payment_confirmation import (
     PaymentConfirmationResponse,
     PaymentConfirmationListResponse,
 )
+from app.schemas.webhook import (
+    DeliveryStatusEvent,
+    DeliveryStatusResult,
+)
+from app.schemas.admin import (
+    ProfilingUpdate,
+    ProfilingStatus,
+)
 
 __all__ = [
     "MerchantCreate",
@@ -58,5 +66,9 @@ __all__ = [
     "RecurringInvoiceResponse",
     "PaymentConfirmationResponse",
     "PaymentConfirmationListResponse",
+    "DeliveryStatusEvent",
+    "DeliveryStatusResult",
+    "ProfilingUpdate",
+    "ProfilingStatus",
 ]
 
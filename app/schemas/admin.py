@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ProfilingUpdate(BaseModel):
+    sample_rate: float = Field(..., gt=0, le=1)  # Fraction of requests profiled
+    duration_seconds: int = Field(300, ge=1, le=3600)  # Sampling turns itself off afterwards
+
+
+class ProfilingStatus(BaseModel):
+    sample_rate: float
+    expires_in_seconds: Optional[int] = None
+    interval_ms: float
+    output_dir: str
@@ -55,6 +55,7 @@ class WhatsAppMessageResponse(BaseModel):
     status: str
     message_text: Optional[str]
     provider_message_id: Optional[str]
+    digest_message_id: Optional[UUID] = None
     detected_intent: Optional[str]
     llm_confidence: Optional[Decimal]
     created_at: datetime
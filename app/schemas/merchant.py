@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 
 class MerchantCreate(BaseModel):
@@ -31,6 +32,20 @@ class MerchantUpdate(BaseModel):
     company_logo_s3_url: Optional[str] = None
     upi_id: Optional[str] = Field(None, max_length=100)
     upi_qr_s3_url: Optional[str] = None
+    send_window_start: Optional[time] = Field(None, description="Local time reminders may start going out")
+    send_window_end: Optional[time] = Field(None, description="Local time reminders stop going out")
+    timezone: Optional[str] = Field(None, max_length=50, description="IANA timezone, e.g. Asia/Kolkata")
+
+    @field_validator("timezone")
+    @classmethod
+    def validate_timezone(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            raise ValueError("timezone cannot be null")
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone: {value}")
+        return value
 
 
 class MerchantResponse(BaseModel):
@@ -49,6 +64,9 @@ class MerchantResponse(BaseModel):
     upi_qr_s3_url: Optional[str]
     is_active: bool
     plan: str
+    send_window_start: Optional[time] = None
+    send_window_end: Optional[time] = None
+    timezone: Optional[str] = None
     created_at: datetime
 
     class Config:
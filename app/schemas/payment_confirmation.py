@@ -14,6 +14,7 @@ class PaymentConfirmationResponse(BaseModel):
     customer_message: Optional[str]
     detected_intent: Optional[str]
     llm_confidence: Optional[Decimal]
+    match_confidence: Optional[Decimal] = None
     status: str
     created_at: datetime
     resolved_at: Optional[datetime]
@@ -32,6 +33,7 @@ class PaymentConfirmationListResponse(BaseModel):
     invoice_id: Optional[UUID]
     customer_id: Optional[UUID]
     customer_message: Optional[str]
+    match_confidence: Optional[Decimal] = None
     status: str
     created_at: datetime
     
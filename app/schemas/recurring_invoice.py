@@ -1,6 +1,6 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field, model_validator
@@ -80,3 +80,15 @@ class RecurringInvoiceResponse(BaseModel):
         from_attributes = True
 
 
+
+
+class RecurringForecastMonth(BaseModel):
+    month: date = Field(..., description="First day of the month")
+    invoice_count: int
+    projected_amount: Decimal
+
+
+class RecurringForecastResponse(BaseModel):
+    months: List[RecurringForecastMonth]
+    total_invoices: int
+    total_amount: Decimal
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+from app.utils.enums import WhatsAppMessageStatus
+
+
+class DeliveryStatusEvent(BaseModel):
+    provider_message_id: str
+    status: WhatsAppMessageStatus  # DELIVERED, READ or FAILED
+    timestamp: Optional[datetime] = None
+
+
+class DeliveryStatusResult(BaseModel):
+    updated: bool
@@ -0,0 +1,131 @@
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.locks import LockNotAcquiredError, RedisLease
+from app.models.batch_job_run import BatchJobRun
+from app.utils.enums import BatchJobRunStatus
+
+
+@dataclass
+class JobRun:
+    """What a running job reads and reports back.
+
+    ``previous_watermark`` is the watermark of the last successful run; the
+    job sets ``watermark`` to where the next run should start (left unset,
+    the previous one is kept) and ``rows_processed``.
+    """
+    name: str
+    previous_watermark: Optional[str] = None
+    watermark: Optional[str] = None
+    rows_processed: int = 0
+
+
+def last_watermark(db: Session, job_name: str) -> Optional[str]:
+    return (
+        db.query(BatchJobRun.watermark)
+        .filter(
+            BatchJobRun.job_name == job_name,
+            BatchJobRun.status == BatchJobRunStatus.SUCCEEDED.value,
+        )
+        .order_by(BatchJobRun.started_at.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+@contextmanager
+def tracked_job_run(job_name: str, lease_seconds: Optional[float] = None) -> Iterator[JobRun]:
+    """Run a batch job under a Redis lease and record it in batch_job_runs.
+
+    Raises LockNotAcquiredError if another run of the job holds the lease,
+    so overlapping runs (beat, a manual run, a slow previous run) never
+    execute together. History is written in its own session, so it survives
+    the job's rollback.
+    """
+    if lease_seconds is None:
+        lease_seconds = settings.BATCH_JOB_LEASE_SECONDS
+
+    with RedisLease(f"batch:{job_name}", lease_seconds) as lease:
+        db = SessionLocal()
+        try:
+            run = JobRun(name=job_name, previous_watermark=last_watermark(db, job_name))
+            record = BatchJobRun(
+                job_name=job_name,
+                status=BatchJobRunStatus.RUNNING.value,
+                host=socket.gethostname(),
+                started_at=datetime.utcnow(),
+            )
+            db.add(record)
+            db.commit()
+
+            started = time.perf_counter()
+            try:
+                yield run
+            except BaseException as exc:
+                record.status = BatchJobRunStatus.FAILED.value
+                record.error = f"{type(exc).__name__}: {exc}"[:2000]
+                raise
+            else:
+                record.status = BatchJobRunStatus.SUCCEEDED.value
+                record.watermark = run.watermark if run.watermark is not None else run.previous_watermark
+                if lease.lost:
+                    record.error = "Lease was lost during the run; another run may have overlapped"
+            finally:
+                record.finished_at = datetime.utcnow()
+                record.duration_seconds = time.perf_counter() - started
+                record.rows_processed = run.rows_processed
+                db.commit()
+        finally:
+            db.close()
+
+
+def run_tracked_job(job_name: str, job: Callable[[Session, JobRun], None]) -> Optional[JobRun]:
+    """Run ``job(db, run)`` with its own session under tracked_job_run.
+
+    Returns None, without running the job, if another run holds the lease.
+    """
+    try:
+        with tracked_job_run(job_name) as run:
+            db = SessionLocal()
+            try:
+                job(db, run)
+            finally:
+                db.close()
+    except LockNotAcquiredError:
+        return None
+    return run
+
+
+def prune_job_runs(db: Session, retention_days: Optional[int] = None) -> int:
+    """Delete run history older than ``retention_days`` and commit.
+
+    Each job's last successful run is kept whatever its age, since the next
+    run reads its watermark from it. Returns the number of rows deleted.
+    """
+    if retention_days is None:
+        retention_days = settings.BATCH_JOB_RUN_RETENTION_DAYS
+    latest_successes = (
+        select(BatchJobRun.id)
+        .where(BatchJobRun.status == BatchJobRunStatus.SUCCEEDED.value)
+        .distinct(BatchJobRun.job_name)
+        .order_by(BatchJobRun.job_name, BatchJobRun.started_at.desc())
+    )
+    deleted = (
+        db.query(BatchJobRun)
+        .filter(
+            BatchJobRun.started_at < datetime.utcnow() - timedelta(days=retention_days),
+            BatchJobRun.id.not_in(latest_successes),
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
@@ -0,0 +1,167 @@
+from datetime import date, datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheNamespace
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.merchant import Merchant
+from app.models.payment_confirmation import PaymentConfirmation
+from app.schemas.invoice import InvoiceResponse, InvoiceWithMerchantResponse
+from app.schemas.merchant import DashboardResponse, MerchantResponse
+from app.utils.enums import InvoiceStatus
+
+
+merchant_profiles: CacheNamespace[MerchantResponse] = CacheNamespace(
+    "merchant_profile", MerchantResponse, ttl_seconds=300
+)
+public_invoices: CacheNamespace[InvoiceWithMerchantResponse] = CacheNamespace(
+    "public_invoice", InvoiceWithMerchantResponse, ttl_seconds=300
+)
+# Sums over many invoices: shorter TTLs, so a missed invalidation heals quickly
+dashboard_stats: CacheNamespace[DashboardResponse] = CacheNamespace(
+    "dashboard", DashboardResponse, ttl_seconds=60
+)
+customer_balances: CacheNamespace[Dict[UUID, float]] = CacheNamespace(
+    "customer_balances", Dict[UUID, float], ttl_seconds=60
+)
+customer_balance: CacheNamespace[float] = CacheNamespace(
+    "customer_balance", float, ttl_seconds=60
+)
+
+
+# Entries are tagged with what they were computed from, and every write
+# path invalidates the matching tags once it commits (invalidate_on_commit):
+# merchant: the merchant's profile fields; billing: the merchant's invoices
+# and payment confirmations; customer: the customer's fields on invoices.
+
+def merchant_tag(merchant_id: UUID) -> str:
+    return f"merchant:{merchant_id}"
+
+
+def billing_tag(merchant_id: UUID) -> str:
+    return f"billing:{merchant_id}"
+
+
+def customer_tag(customer_id: UUID) -> str:
+    return f"customer:{customer_id}"
+
+
+def get_merchant_profile(db: Session, phone: str) -> Optional[MerchantResponse]:
+    """Profile of the merchant logged in with this phone, None if there is none."""
+    def load() -> Optional[MerchantResponse]:
+        merchant = db.query(Merchant).filter(Merchant.phone == phone).first()
+        return MerchantResponse.model_validate(merchant) if merchant else None
+
+    return merchant_profiles.get_or_load(phone, load, tags=lambda profile: [merchant_tag(profile.id)])
+
+
+def get_dashboard_stats(db: Session, merchant_id: UUID) -> DashboardResponse:
+    def load() -> DashboardResponse:
+        # Current month start and end dates
+        today = date.today()
+        month_start = date(today.year, today.month, 1)
+        month_end = date(today.year, today.month + 1, 1) if today.month < 12 else date(today.year + 1, 1, 1)
+
+        # Base query filter for merchant's invoices (not soft deleted)
+        base_filter = and_(
+            Invoice.merchant_id == merchant_id,
+            Invoice.deleted_at.is_(None)
+        )
+
+        # Total Outstanding: Sum of unpaid invoice amounts
+        total_outstanding = db.query(func.coalesce(func.sum(Invoice.amount), 0)).filter(
+            base_filter,
+            Invoice.status == InvoiceStatus.UNPAID.value
+        ).scalar()
+
+        # Paid This Month: Sum of paid invoices in the current month
+        paid_this_month = db.query(func.coalesce(func.sum(Invoice.amount), 0)).filter(
+            base_filter,
+            Invoice.status == InvoiceStatus.PAID.value,
+            Invoice.paid_at >= datetime.combine(month_start, datetime.min.time()),
+            Invoice.paid_at < datetime.combine(month_end, datetime.min.time())
+        ).scalar()
+
+        # Unpaid Invoices: Count of unpaid invoices
+        unpaid_invoices = db.query(func.count(Invoice.id)).filter(
+            base_filter,
+            Invoice.status == InvoiceStatus.UNPAID.value
+        ).scalar() or 0
+
+        # Payment Confirmations Pending: Count of pending payment confirmations
+        payment_confirmations_pending = db.query(func.count(PaymentConfirmation.id)).filter(
+            PaymentConfirmation.merchant_id == merchant_id,
+            PaymentConfirmation.status == 'pending'
+        ).scalar() or 0
+
+        return DashboardResponse(
+            total_outstanding=float(total_outstanding or 0),
+            paid_this_month=float(paid_this_month or 0),
+            unpaid_invoices=unpaid_invoices,
+            payment_confirmations_pending=payment_confirmations_pending
+        )
+
+    return dashboard_stats.get_or_load(merchant_id, load, tags=[billing_tag(merchant_id)])
+
+
+def get_customer_balances(db: Session, merchant_id: UUID) -> Dict[UUID, float]:
+    """Total of the UNPAID invoices of each of the merchant's customers that has any."""
+    def load() -> Dict[UUID, float]:
+        rows = db.query(Invoice.customer_id, func.sum(Invoice.amount)).filter(
+            Invoice.merchant_id == merchant_id,
+            Invoice.status == InvoiceStatus.UNPAID.value,
+            Invoice.deleted_at.is_(None)
+        ).group_by(Invoice.customer_id).all()
+        return {customer_id: float(total) for customer_id, total in rows}
+
+    return customer_balances.get_or_load(merchant_id, load, tags=[billing_tag(merchant_id)])
+
+
+def get_customer_balance(db: Session, merchant_id: UUID, customer_id: UUID) -> float:
+    """Total of the customer's UNPAID invoices."""
+    def load() -> float:
+        total = db.query(func.coalesce(func.sum(Invoice.amount), 0)).filter(
+            Invoice.customer_id == customer_id,
+            Invoice.merchant_id == merchant_id,
+            Invoice.status == InvoiceStatus.UNPAID.value,
+            Invoice.deleted_at.is_(None)
+        ).scalar()
+        return float(total or 0)
+
+    return customer_balance.get_or_load(customer_id, load, tags=[billing_tag(merchant_id)])
+
+
+def get_public_invoice(db: Session, invoice_id: UUID) -> Optional[InvoiceWithMerchantResponse]:
+    """Invoice with its merchant's details for the public payment page, None if it does not exist."""
+    def load() -> Optional[InvoiceWithMerchantResponse]:
+        invoice = db.query(Invoice).filter(
+            Invoice.id == invoice_id,
+            Invoice.deleted_at.is_(None)  # Not soft deleted
+        ).first()
+        if invoice is None or invoice.merchant is None:
+            return None
+
+        invoice_dict = InvoiceResponse.model_validate(invoice).model_dump(by_alias=True)
+        customer = invoice.customer or db.query(Customer).filter(Customer.id == invoice.customer_id).first()
+        invoice_dict["customer_name"] = customer.name if customer else None
+        invoice_dict["class"] = customer.class_ if customer else None
+        invoice_dict["section"] = customer.section if customer else None
+        invoice_dict["batch"] = customer.batch if customer else None
+        return InvoiceWithMerchantResponse(
+            invoice=InvoiceResponse(**invoice_dict),
+            merchant=MerchantResponse.model_validate(invoice.merchant)
+        )
+
+    return public_invoices.get_or_load(
+        invoice_id,
+        load,
+        tags=lambda page: [
+            billing_tag(page.invoice.merchant_id),
+            merchant_tag(page.invoice.merchant_id),
+            customer_tag(page.invoice.customer_id),
+        ],
+    )
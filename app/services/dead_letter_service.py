@@ -0,0 +1,168 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+from uuid import UUID
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Query, Session
+
+from app.core.redis import get_redis
+from app.models.dead_letter_message import DeadLetterMessage
+from app.models.whatsapp_message import WhatsAppMessage
+from app.utils.enums import DeadLetterStatus, WhatsAppMessageStatus
+
+
+# Attempt history of a task while Celery is still retrying it; retries keep
+# the task id, so the list collects every failed attempt
+ATTEMPTS_KEY = "deadletter:attempts:{task_id}"
+ATTEMPTS_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _describe(exc: BaseException) -> Dict[str, Any]:
+    return {
+        "at": datetime.utcnow().isoformat(),
+        "error_type": type(exc).__name__,
+        "error": str(exc)[:1000],
+    }
+
+
+def record_send_attempt(task_id: str, exc: BaseException) -> None:
+    """Append a failed attempt to the task's history in Redis."""
+    key = ATTEMPTS_KEY.format(task_id=task_id)
+    redis_client = get_redis()
+    redis_client.rpush(key, json.dumps(_describe(exc)))
+    redis_client.expire(key, ATTEMPTS_TTL_SECONDS)
+
+
+def pop_send_attempts(task_id: str) -> List[Dict[str, Any]]:
+    key = ATTEMPTS_KEY.format(task_id=task_id)
+    redis_client = get_redis()
+    attempts = [json.loads(item) for item in redis_client.lrange(key, 0, -1)]
+    redis_client.delete(key)
+    return attempts
+
+
+def mark_whatsapp_message(
+    db: Session,
+    whatsapp_message_id: Optional[Union[str, UUID]],
+    status: WhatsAppMessageStatus,
+    provider_message_id: Optional[str] = None,
+) -> None:
+    """Update the delivery status of an outbound message row, if there is one.
+
+    Messages merged into a digest follow the digest's status.
+    """
+    if not whatsapp_message_id:
+        return
+    values: Dict[str, Any] = {"status": status.value, "updated_at": datetime.utcnow()}
+    db.query(WhatsAppMessage).filter(WhatsAppMessage.digest_message_id == whatsapp_message_id).update(
+        values, synchronize_session=False
+    )
+    if provider_message_id:
+        values["provider_message_id"] = provider_message_id
+    db.query(WhatsAppMessage).filter(WhatsAppMessage.id == whatsapp_message_id).update(
+        values, synchronize_session=False
+    )
+
+
+def record_dead_letter(
+    db: Session,
+    task_name: str,
+    args: Sequence[Any],
+    kwargs: Dict[str, Any],
+    queue: Optional[str],
+    exc: BaseException,
+    attempts: List[Dict[str, Any]],
+) -> DeadLetterMessage:
+    """Store a task that exhausted its retries and mark its message FAILED.
+
+    The caller is responsible for committing.
+    """
+    whatsapp_message_id = kwargs.get("whatsapp_message_id")
+    merchant_id = None
+    if whatsapp_message_id:
+        merchant_id = (
+            db.query(WhatsAppMessage.merchant_id)
+            .filter(WhatsAppMessage.id == whatsapp_message_id)
+            .scalar()
+        )
+        mark_whatsapp_message(db, whatsapp_message_id, WhatsAppMessageStatus.FAILED)
+
+    final = _describe(exc)
+    dead_letter = DeadLetterMessage(
+        merchant_id=merchant_id,
+        whatsapp_message_id=whatsapp_message_id if merchant_id else None,
+        task_name=task_name,
+        args=list(args),
+        kwargs=dict(kwargs),
+        queue=queue,
+        error_type=final["error_type"],
+        error=final["error"],
+        attempts=attempts,
+        attempt_count=len(attempts),
+    )
+    db.add(dead_letter)
+    return dead_letter
+
+
+def query_dead_letters(
+    db: Session,
+    merchant_id: Optional[UUID] = None,
+    error: Optional[str] = None,
+    status: Optional[DeadLetterStatus] = DeadLetterStatus.PENDING,
+    since: Optional[datetime] = None,
+) -> Query:
+    """Dead letters matching the filters, oldest first.
+
+    ``error`` matches the exception type or a substring of its message.
+    """
+    query = db.query(DeadLetterMessage)
+    if status is not None:
+        query = query.filter(DeadLetterMessage.status == status.value)
+    if merchant_id is not None:
+        query = query.filter(DeadLetterMessage.merchant_id == merchant_id)
+    if error:
+        query = query.filter(or_(
+            DeadLetterMessage.error_type == error,
+            DeadLetterMessage.error.ilike(f"%{error}%"),
+        ))
+    if since is not None:
+        query = query.filter(DeadLetterMessage.created_at >= since)
+    return query.order_by(DeadLetterMessage.created_at, DeadLetterMessage.id)
+
+
+def replay_dead_letters(db: Session, dead_letters: Sequence[DeadLetterMessage]) -> int:
+    """Queue dead letters again through the outbox and commit.
+
+    The original WhatsApp message row is reused: the task still carries its
+    id, and the row goes back to PENDING until the send succeeds or fails
+    again (which records a new dead letter).
+    """
+    # Imported here: the outbox imports the send task, which records dead letters
+    from app.services.outbox_service import enqueue_task
+
+    now = datetime.utcnow()
+    for dead_letter in dead_letters:
+        enqueue_task(
+            db,
+            dead_letter.task_name,
+            args=dead_letter.args,
+            kwargs=dead_letter.kwargs,
+            merchant_id=dead_letter.merchant_id,
+            queue=dead_letter.queue,
+        )
+        mark_whatsapp_message(db, dead_letter.whatsapp_message_id, WhatsAppMessageStatus.PENDING)
+        dead_letter.status = DeadLetterStatus.REPLAYED.value
+        dead_letter.replay_count += 1
+        dead_letter.replayed_at = now
+
+    db.commit()
+    return len(dead_letters)
+
+
+def discard_dead_letters(db: Session, dead_letters: Sequence[DeadLetterMessage]) -> int:
+    """Mark dead letters as handled without sending them, and commit."""
+    for dead_letter in dead_letters:
+        dead_letter.status = DeadLetterStatus.DISCARDED.value
+    db.commit()
+    return len(dead_letters)
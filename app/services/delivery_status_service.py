@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.whatsapp_message import WhatsAppMessage
+from app.utils.enums import WhatsAppMessageStatus
+
+
+# Statuses a provider callback may move a message out of. Callbacks can
+# arrive out of order (a read receipt before the delivery receipt), so a
+# message never moves back to an earlier status.
+_ADVANCES_FROM: Dict[WhatsAppMessageStatus, Tuple[str, ...]] = {
+    WhatsAppMessageStatus.DELIVERED: (WhatsAppMessageStatus.SENT.value,),
+    WhatsAppMessageStatus.READ: (WhatsAppMessageStatus.SENT.value, WhatsAppMessageStatus.DELIVERED.value),
+    WhatsAppMessageStatus.FAILED: (WhatsAppMessageStatus.SENT.value,),
+}
+
+
+class UnknownProviderMessageError(Exception):
+    """No outbound message has this provider message id (yet)."""
+    pass
+
+
+def apply_delivery_status(
+    db: Session,
+    provider_message_id: str,
+    status: WhatsAppMessageStatus,
+    at: Optional[datetime] = None,
+) -> bool:
+    """Apply a delivery or read receipt from the provider.
+
+    Returns False when the message already has this or a later status.
+    Messages merged into a digest follow the digest's status.
+    """
+    if status not in _ADVANCES_FROM:
+        raise ValueError(f"Providers cannot report status {status.value}")
+    if at is not None and at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)  # Timestamps are stored as naive UTC
+    values = {"status": status.value, "updated_at": at or datetime.utcnow()}
+
+    message_id = db.execute(
+        update(WhatsAppMessage)
+        .where(
+            WhatsAppMessage.provider_message_id == provider_message_id,
+            WhatsAppMessage.status.in_(_ADVANCES_FROM[status]),
+        )
+        .values(values)
+        .returning(WhatsAppMessage.id)
+    ).scalar()
+    if message_id is None:
+        known = db.query(WhatsAppMessage.id).filter(
+            WhatsAppMessage.provider_message_id == provider_message_id
+        ).first()
+        if known is None:
+            # The callback can beat the worker's commit of the provider id; the provider retries
+            raise UnknownProviderMessageError(provider_message_id)
+        return False
+
+    db.execute(
+        update(WhatsAppMessage)
+        .where(
+            WhatsAppMessage.digest_message_id == message_id,
+            WhatsAppMessage.status.in_(_ADVANCES_FROM[status]),
+        )
+        .values(values)
+    )
+    return True
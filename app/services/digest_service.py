@@ -0,0 +1,192 @@
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core import tracing
+from app.models.invoice import Invoice
+from app.models.outbox_message import OutboxMessage
+from app.models.whatsapp_message import WhatsAppMessage
+from app.services.outbox_service import enqueue_task
+from app.utils.enums import InvoiceStatus, WhatsAppDirection, WhatsAppMessageStatus, WhatsAppMessageType
+
+
+@dataclass
+class CoalesceResult:
+    digests: int = 0
+    merged: int = 0
+    released: int = 0
+    cancelled: int = 0
+
+
+def build_digest_text(invoices: Sequence[Invoice]) -> str:
+    """One message listing every pending invoice and the total due."""
+    lines = [f"You have {len(invoices)} pending invoices:"]
+    for invoice in invoices:
+        line = f"- Invoice #{invoice.invoice_number or invoice.id}: ₹{invoice.amount}"
+        if invoice.due_date:
+            line += f" due {invoice.due_date.isoformat()}"
+        lines.append(line)
+    total = sum((Decimal(invoice.amount) for invoice in invoices), Decimal("0"))
+    lines.append(f"Total due: ₹{total}")
+    return "\n".join(lines)
+
+
+def _cancel_settled(
+    db: Session,
+    rows: List[OutboxMessage],
+    messages: Dict[str, WhatsAppMessage],
+    invoices: Dict[uuid.UUID, Invoice],
+) -> List[OutboxMessage]:
+    """Drop the sends of reminders whose invoice was paid or deleted while
+    they waited, and return the group's remaining rows.
+
+    A group with a message of unknown invoice is returned unchanged.
+    """
+    sources = [messages.get(row.kwargs.get("whatsapp_message_id")) for row in rows]
+    if any(source is None or source.invoice_id is None for source in sources):
+        return rows
+
+    remaining = []
+    for row, source in zip(rows, sources):
+        if source.invoice_id in invoices:
+            remaining.append(row)
+        else:
+            source.status = WhatsAppMessageStatus.CANCELLED.value
+            db.delete(row)
+    return remaining
+
+
+def _merge_group(
+    db: Session,
+    rows: List[OutboxMessage],
+    messages: Dict[str, WhatsAppMessage],
+    invoices: Dict[uuid.UUID, Invoice],
+) -> bool:
+    """Replace the group's outbox rows with a single digest send.
+
+    Returns False when the group cannot be merged (fewer than two messages
+    with an unpaid invoice); its rows are then released unchanged.
+    """
+    sources = [messages.get(row.kwargs.get("whatsapp_message_id")) for row in rows]
+    if any(source is None or source.invoice_id not in invoices for source in sources):
+        return False
+
+    # An invoice can be queued twice (invoice and follow-up); list it once
+    group_invoices = list(OrderedDict(
+        (source.invoice_id, invoices[source.invoice_id]) for source in sources
+    ).values())
+    if len(group_invoices) < 2:
+        return False
+
+    first = sources[0]
+    digest = WhatsAppMessage(
+        id=uuid.uuid4(),
+        merchant_id=first.merchant_id,
+        customer_id=first.customer_id,
+        direction=WhatsAppDirection.OUTBOUND.value,
+        message_type=WhatsAppMessageType.DIGEST.value,
+        status=WhatsAppMessageStatus.PENDING.value,
+        message_text=build_digest_text(group_invoices),
+    )
+    db.add(digest)
+    # Without a relationship the flush does not know the digest row must
+    # exist before the merged messages point to it
+    db.flush()
+    for source in sources:
+        source.digest_message_id = digest.id
+
+    # The digest is sent as part of the first reminder's trace
+    for row in rows:
+        tracing.record_wait("outbox.wait", row.headers, task=row.task_name, queue=row.queue)
+    scheduled = [row.scheduled_for for row in rows if row.scheduled_for is not None]
+    with tracing.span("outbox.coalesce", parent=tracing.extract(rows[0].headers), merged=len(rows)):
+        enqueue_task(
+            db,
+            rows[0].task_name,
+            args=[rows[0].args[0], digest.message_text],
+            kwargs={"whatsapp_message_id": str(digest.id)},
+            merchant_id=first.merchant_id,
+            queue=rows[0].queue,
+            scheduled_for=max(scheduled) if scheduled else None,
+        )
+    for row in rows:
+        db.delete(row)
+    return True
+
+
+def coalesce_due_messages(db: Session, limit: int = 500) -> CoalesceResult:
+    """Merge pending reminders to the same customer into digest messages.
+
+    A coalescing group (merchant and customer) is due once its oldest row's
+    window has elapsed; every row in the group is merged at that point, even
+    those queued later in the window. Groups of one are handed back to the
+    relay as they are. Reminders of invoices paid or deleted during the
+    window are cancelled instead of sent, so a digest only lists invoices
+    still due. Rows are locked with SKIP LOCKED so this can run in every
+    relay process. Commits.
+    """
+    result = CoalesceResult()
+    due_keys = [
+        key
+        for (key,) in db.query(OutboxMessage.coalesce_key)
+        .filter(OutboxMessage.coalesce_key.isnot(None))
+        .group_by(OutboxMessage.coalesce_key)
+        .having(func.min(OutboxMessage.available_at) <= datetime.utcnow())
+        .limit(limit)
+        .all()
+    ]
+    if not due_keys:
+        return result
+
+    rows: List[OutboxMessage] = (
+        db.query(OutboxMessage)
+        .filter(OutboxMessage.coalesce_key.in_(due_keys))
+        .order_by(OutboxMessage.created_at)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    groups: Dict[str, List[OutboxMessage]] = {}
+    for row in rows:
+        groups.setdefault(row.coalesce_key, []).append(row)
+
+    message_ids = [row.kwargs.get("whatsapp_message_id") for row in rows if len(groups[row.coalesce_key]) > 1]
+    messages = {
+        str(message.id): message
+        for message in db.query(WhatsAppMessage).filter(WhatsAppMessage.id.in_(message_ids)).all()
+    } if message_ids else {}
+    invoice_ids = {message.invoice_id for message in messages.values() if message.invoice_id}
+    # Only invoices still due; reminders of the others are cancelled
+    invoices = {
+        invoice.id: invoice
+        for invoice in db.query(Invoice).filter(
+            Invoice.id.in_(invoice_ids),
+            Invoice.status == InvoiceStatus.UNPAID.value,
+            Invoice.deleted_at.is_(None),
+        ).all()
+    } if invoice_ids else {}
+
+    now = datetime.utcnow()
+    for group in groups.values():
+        if len(group) > 1:
+            remaining = _cancel_settled(db, group, messages, invoices)
+            result.cancelled += len(group) - len(remaining)
+            group = remaining
+        if len(group) > 1 and _merge_group(db, group, messages, invoices):
+            result.digests += 1
+            result.merged += len(group)
+            continue
+
+        for row in group:
+            row.coalesce_key = None
+            row.available_at = now
+        result.released += len(group)
+
+    db.commit()
+    return result
@@ -0,0 +1,33 @@
+from typing import Dict, Hashable, List, Sequence, Tuple, TypeVar
+
+from app.core.config import settings
+from app.utils.enums import MerchantPlan
+
+
+T = TypeVar("T")
+
+
+def plan_weight(plan: str) -> int:
+    """Share of dispatch slots a merchant's plan gets relative to other plans."""
+    return max(1, settings.FAIR_SHARE_PLAN_WEIGHTS.get(plan or MerchantPlan.TRIAL.value, 1))
+
+
+def fair_share_order(
+    items_by_tenant: Dict[Hashable, Sequence[T]],
+    weights: Dict[Hashable, int],
+) -> List[T]:
+    """Interleave per-tenant backlogs by weighted fair queueing.
+
+    Each tenant's n-th item gets virtual start time n / weight, and items are
+    emitted in virtual-time order. A tenant with weight 4 therefore gets four
+    slots for every one a weight-1 tenant gets, and no tenant's head waits
+    behind another tenant's backlog. Ties go to tenants earlier in
+    ``items_by_tenant``; callers insert tenants oldest-head-first.
+    """
+    keyed: List[Tuple[float, int, int, T]] = []
+    for tenant_rank, (tenant, items) in enumerate(items_by_tenant.items()):
+        weight = max(1, weights.get(tenant, 1))
+        for position, item in enumerate(items):
+            keyed.append((position / weight, tenant_rank, position, item))
+    keyed.sort(key=lambda entry: entry[:3])
+    return [entry[3] for entry in keyed]
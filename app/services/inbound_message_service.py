@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import invalidate_on_commit
+from app.core.config import settings
+from app.models.payment_confirmation import PaymentConfirmation
+from app.models.whatsapp_message import WhatsAppMessage
+from app.services.cached_reads import billing_tag
+from app.services.intent_classifier import (
+    IntentClassifier,
+    get_intent_classifier,
+    normalize_text,
+)
+from app.services.payment_matching_service import match_confirmations
+from app.utils.enums import PaymentIntent, WhatsAppDirection
+
+
+@dataclass
+class ClassificationResult:
+    classified: int = 0
+    confirmations_created: int = 0
+    confirmations_matched: int = 0
+    batches: int = 0
+
+
+def _claim_unclassified_messages(db: Session, batch_size: int) -> List[WhatsAppMessage]:
+    """Lock the next micro-batch of inbound messages that have no intent yet.
+
+    SKIP LOCKED lets several workers run the pipeline concurrently without
+    classifying the same message twice.
+    """
+    return (
+        db.query(WhatsAppMessage)
+        .filter(
+            WhatsAppMessage.direction == WhatsAppDirection.INBOUND.value,
+            WhatsAppMessage.detected_intent.is_(None),
+        )
+        .order_by(WhatsAppMessage.created_at.asc(), WhatsAppMessage.id.asc())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def classify_inbound_messages(
+    db: Session,
+    classifier: Optional[IntentClassifier] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> ClassificationResult:
+    """Classify pending inbound WhatsApp messages in micro-batches.
+
+    Fills detected_intent/llm_confidence on each message and creates a pending
+    PaymentConfirmation when the customer claims to have paid with at least
+    INTENT_CONFIRMATION_MIN_CONFIDENCE. Confirmations
+    not tied to an invoice are matched to an open one. Each batch is
+    committed on its own.
+    """
+    if classifier is None:
+        classifier = get_intent_classifier()
+    if batch_size is None:
+        batch_size = settings.INTENT_BATCH_SIZE
+    min_confidence = Decimal(str(settings.INTENT_CONFIRMATION_MIN_CONFIDENCE))
+
+    result = ClassificationResult()
+
+    while max_batches is None or result.batches < max_batches:
+        messages = _claim_unclassified_messages(db, batch_size)
+        if not messages:
+            break
+
+        predictions = classifier.classify_batch(
+            [normalize_text(message.message_text) for message in messages]
+        )
+
+        unmatched: List[PaymentConfirmation] = []
+        for message, prediction in zip(messages, predictions):
+            message.detected_intent = prediction.intent
+            message.llm_confidence = prediction.confidence
+
+            if (
+                prediction.intent == PaymentIntent.PAID.value
+                and prediction.confidence >= min_confidence
+            ):
+                confirmation = PaymentConfirmation(
+                    merchant_id=message.merchant_id,
+                    customer_id=message.customer_id,
+                    invoice_id=message.invoice_id,
+                    whatsapp_message_id=message.id,
+                    customer_message=message.message_text,
+                    detected_intent=prediction.intent,
+                    llm_confidence=prediction.confidence,
+                    status='pending',
+                )
+                db.add(confirmation)
+                invalidate_on_commit(db, billing_tag(message.merchant_id))
+                if confirmation.invoice_id is None:
+                    unmatched.append(confirmation)
+                result.confirmations_created += 1
+
+        result.confirmations_matched += match_confirmations(db, unmatched)
+
+        db.commit()
+
+        result.classified += len(messages)
+        result.batches += 1
+
+        if len(messages) < batch_size:
+            break
+
+    return result
@@ -0,0 +1,187 @@
+import re
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from importlib import import_module
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.utils.enums import PaymentIntent
+
+
+@dataclass(frozen=True)
+class IntentPrediction:
+    intent: str
+    confidence: Decimal
+
+
+UNKNOWN_PREDICTION = IntentPrediction(PaymentIntent.UNKNOWN.value, Decimal("0.00"))
+
+
+_NON_WORD_RE = re.compile(r"[^\w#\s]+")
+_DIGITS_RE = re.compile(r"\d+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Normalize a customer message for classification and caching.
+
+    Lowercases, strips punctuation and collapses whitespace. Digit runs are
+    replaced with '#' so that "paid 5000" and "paid 4500" share a cache entry;
+    amounts do not affect intent.
+    """
+    if not text:
+        return ""
+    text = text.lower()
+    text = _DIGITS_RE.sub("#", text)
+    text = _NON_WORD_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class IntentClassifier(ABC):
+    """Base class for inbound message intent classifiers.
+
+    Implementations receive a batch of normalized texts and must return one
+    prediction per text, in the same order.
+    """
+
+    @abstractmethod
+    def classify_batch(self, texts: Sequence[str]) -> List[IntentPrediction]:
+        """One prediction per text, in the same order."""
+
+
+# (intent, weight, pattern) - patterns are matched against normalized text
+_KEYWORD_RULES: List[Tuple[PaymentIntent, float, str]] = [
+    # Payment claims
+    (PaymentIntent.PAID, 2.0, r"\b(already |have |has |just )?paid\b"),
+    (PaymentIntent.PAID, 2.0, r"\bpayment (is )?(done|made|completed|sent|successful)\b"),
+    (PaymentIntent.PAID, 1.5, r"\b(sent|transferred|deposited) (the )?(money|amount|payment|fees?)\b"),
+    (PaymentIntent.PAID, 1.5, r"\b(utr|txn|transaction id|transaction no|ref no|upi ref)\b"),
+    (PaymentIntent.PAID, 1.0, r"\b(gpay|google pay|phonepe|paytm|bhim|neft|imps|upi)\b"),
+    (PaymentIntent.PAID, 1.0, r"\b(done|cleared|settled)\b"),
+    (PaymentIntent.PAID, 2.0, r"\b(kar diya|kr diya|bhej diya|de diya|jama kar diya)\b"),
+    # Promises to pay later
+    (PaymentIntent.WILL_PAY_LATER, 2.0, r"\b(will|shall|i ll|ill|going to) (pay|send|transfer|clear)\b"),
+    (PaymentIntent.WILL_PAY_LATER, 2.0, r"\bpay (it )?(later|soon|tomorrow|next)\b"),
+    (PaymentIntent.WILL_PAY_LATER, 1.5, r"\b(tomorrow|next week|next month|by (monday|tuesday|wednesday|thursday|friday|saturday|sunday)|end of (the )?month|after salary)\b"),
+    (PaymentIntent.WILL_PAY_LATER, 1.5, r"\b(some time|more time|few days|extension)\b"),
+    (PaymentIntent.WILL_PAY_LATER, 2.0, r"\b(kar dunga|kr dunga|bhej dunga|de dunga|kal)\b"),
+    # Disputes
+    (PaymentIntent.DISPUTE, 2.5, r"\b(dispute|disputed|wrong|incorrect|mistake|overcharged|not mine)\b"),
+    (PaymentIntent.DISPUTE, 2.0, r"\b(never (took|received|ordered|used)|did not (take|receive|order)|didn t (take|receive|order))\b"),
+    (PaymentIntent.DISPUTE, 1.5, r"\b(refund|cancel|cancelled|why (is|am|this))\b"),
+]
+
+# A negated payment claim ("not paid yet", "payment not done", "paid nahi")
+# is not a claim. Negations are looked for just before each payment keyword
+# and, for Hindi, just after it.
+_NEGATION_RE = re.compile(
+    r"\b(not|never|haven t|havent|hasn t|hasnt|didn t|didnt|isn t|isnt|wasn t|wasnt|yet to|nahi|nhi|nahin)\b"
+)
+_TRAILING_NEGATION_RE = re.compile(r"^ (nahi|nhi|nahin)\b")
+_NEGATION_WINDOW_WORDS = 4
+
+
+def _is_negated(text: str, match: "re.Match[str]") -> bool:
+    before = " ".join(text[:match.start()].split()[-_NEGATION_WINDOW_WORDS:])
+    return bool(_NEGATION_RE.search(before) or _TRAILING_NEGATION_RE.match(text[match.end():]))
+
+
+class KeywordIntentClassifier(IntentClassifier):
+    """Offline rule/keyword classifier.
+
+    Scores each intent by the weights of the patterns it matches and picks the
+    highest. Confidence grows with the winning score and shrinks when other
+    intents also matched.
+    """
+
+    def __init__(self, rules: Optional[List[Tuple[PaymentIntent, float, str]]] = None):
+        self.rules = [
+            (intent.value, weight, re.compile(pattern))
+            for intent, weight, pattern in (rules or _KEYWORD_RULES)
+        ]
+
+    def classify(self, text: str) -> IntentPrediction:
+        if not text:
+            return UNKNOWN_PREDICTION
+
+        scores: Dict[str, float] = {}
+        for intent, weight, pattern in self.rules:
+            if intent == PaymentIntent.PAID.value:
+                matched = any(not _is_negated(text, match) for match in pattern.finditer(text))
+            else:
+                matched = pattern.search(text) is not None
+            if matched:
+                scores[intent] = scores.get(intent, 0.0) + weight
+
+        if not scores:
+            return UNKNOWN_PREDICTION
+
+        intent, best = max(scores.items(), key=lambda item: item[1])
+        total = sum(scores.values())
+        confidence = min(0.99, (best / total) * min(1.0, 0.5 + best / 5))
+        return IntentPrediction(intent, Decimal(str(round(confidence, 2))))
+
+    def classify_batch(self, texts: Sequence[str]) -> List[IntentPrediction]:
+        return [self.classify(text) for text in texts]
+
+
+class CachingIntentClassifier(IntentClassifier):
+    """Wraps a classifier with an LRU cache keyed on normalized text.
+
+    Each batch is de-duplicated and only cache misses are sent to the
+    wrapped classifier.
+    """
+
+    def __init__(self, classifier: IntentClassifier, max_size: int = 10000):
+        self.classifier = classifier
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, IntentPrediction]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def classify_batch(self, texts: Sequence[str]) -> List[IntentPrediction]:
+        results: Dict[str, IntentPrediction] = {}
+        pending: List[str] = []
+        for text in texts:
+            if text in results:
+                self.hits += 1
+            elif text in self._cache:
+                self._cache.move_to_end(text)
+                results[text] = self._cache[text]
+                self.hits += 1
+            else:
+                results[text] = UNKNOWN_PREDICTION
+                pending.append(text)
+                self.misses += 1
+
+        if pending:
+            for text, prediction in zip(pending, self.classifier.classify_batch(pending)):
+                results[text] = prediction
+                self._cache[text] = prediction
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return [results[text] for text in texts]
+
+
+_classifier: Optional[IntentClassifier] = None
+
+
+def load_intent_classifier(path: str) -> IntentClassifier:
+    """Instantiate a classifier from a dotted path such as 'pkg.module.Class'."""
+    module_name, _, class_name = path.rpartition(".")
+    classifier_class = getattr(import_module(module_name), class_name)
+    return classifier_class()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Return the process-wide configured classifier (cached across batches)."""
+    global _classifier
+    if _classifier is None:
+        _classifier = CachingIntentClassifier(
+            load_intent_classifier(settings.INTENT_CLASSIFIER),
+            max_size=settings.INTENT_CACHE_SIZE,
+        )
+    return _classifier
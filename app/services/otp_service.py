@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from app.models.auth import OTP
 from app.core.config import settings
+from app.core.profiling import profile_phase
 
 
 class RateLimitError(Exception):
@@ -102,3 +103,16 @@ def is_otp_verified(db: Session, phone: str) -> bool:
     
     return otp is not None
 
+
+
+def delete_expired_otps(db: Session) -> int:
+    """Delete expired OTPs from the database"""
+    with profile_phase("delete"):
+        deleted_count = db.query(OTP).filter(
+            OTP.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+    
+    with profile_phase("commit"):
+        db.commit()
+    
+    return deleted_count
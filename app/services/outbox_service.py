@@ -0,0 +1,306 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import redis
+from sqlalchemy import case, func, literal, select, true, union_all
+from sqlalchemy.orm import Session
+
+from app.celery_app import celery_app
+from app.core import tracing
+from app.core.config import settings
+from app.core.redis import get_broker_redis
+from app.models.merchant import Merchant
+from app.models.outbox_message import OutboxMessage
+from app.models.whatsapp_message import WhatsAppMessage
+from app.services.fair_scheduler import fair_share_order, plan_weight
+from app.services.send_scheduler import next_send_time, schedule_task
+from app.tasks.whatsapp import send_whatsapp_message
+from app.utils.enums import TaskQueue
+
+
+def enqueue_task(
+    db: Session,
+    task_name: str,
+    args: Optional[Sequence[Any]] = None,
+    kwargs: Optional[Dict[str, Any]] = None,
+    merchant_id: Optional[UUID] = None,
+    queue: Optional[str] = None,
+    scheduled_for: Optional[datetime] = None,
+    coalesce_key: Optional[str] = None,
+    available_at: Optional[datetime] = None,
+    headers: Optional[Dict[str, Any]] = None,
+) -> OutboxMessage:
+    """Add a Celery task to the outbox as part of the caller's transaction.
+
+    Nothing is sent to the broker here; the outbox relay publishes the task
+    after the transaction commits, or hands it to the send scheduler when
+    ``scheduled_for`` (naive UTC) is in the future. Rows with a
+    ``coalesce_key`` are left to the digest stage instead of the relay. The
+    caller is responsible for committing.
+
+    The row carries the current trace context in ``headers`` (unless given),
+    which the relay passes on to the Celery task.
+    """
+    with tracing.span("outbox.enqueue", task=task_name, queue=queue):
+        outbox_message = OutboxMessage(
+            merchant_id=merchant_id,
+            task_name=task_name,
+            args=list(args or []),
+            kwargs=dict(kwargs or {}),
+            headers=dict(headers) if headers is not None else tracing.message_headers(),
+            queue=queue,
+            scheduled_for=scheduled_for,
+            coalesce_key=coalesce_key,
+            # Naive UTC like the relay's claim; the database's NOW() is in its session timezone
+            available_at=available_at or datetime.utcnow(),
+        )
+        db.add(outbox_message)
+    return outbox_message
+
+
+def whatsapp_outbox_values(
+    whatsapp_message_id: UUID,
+    merchant_id: UUID,
+    customer_id: Optional[UUID],
+    message_text: str,
+    phone: str,
+    queue: TaskQueue = TaskQueue.INTERACTIVE,
+    send_window: Optional[Tuple[Optional[time], Optional[time], Optional[str]]] = None,
+    send_at: Optional[datetime] = None,
+    coalesce: bool = False,
+) -> Dict[str, Any]:
+    """Column values of the outbox row that sends one outbound message.
+
+    ``send_window`` is the merchant's (start, end, timezone). Used directly
+    for multi-row inserts; enqueue_whatsapp_message wraps it for single sends.
+    """
+    now = datetime.utcnow()
+    scheduled_for = send_at
+    if send_window is not None:
+        window_opens = next_send_time(send_at or now, *send_window)
+        if window_opens is not None:
+            scheduled_for = window_opens
+
+    coalesce_key = None
+    available_at = now
+    if coalesce and customer_id and settings.WHATSAPP_DIGEST_WINDOW_SECONDS > 0:
+        coalesce_key = f"{merchant_id}:{customer_id}"
+        available_at = now + timedelta(seconds=settings.WHATSAPP_DIGEST_WINDOW_SECONDS)
+
+    return {
+        "merchant_id": merchant_id,
+        "task_name": send_whatsapp_message.name,
+        "args": [phone, message_text],
+        "kwargs": {"whatsapp_message_id": str(whatsapp_message_id)},
+        "queue": queue.value,
+        "scheduled_for": scheduled_for,
+        "coalesce_key": coalesce_key,
+        "available_at": available_at,
+    }
+
+
+def enqueue_whatsapp_message(
+    db: Session,
+    whatsapp_message: WhatsAppMessage,
+    phone: str,
+    queue: TaskQueue = TaskQueue.INTERACTIVE,
+    merchant: Optional[Merchant] = None,
+    send_at: Optional[datetime] = None,
+    coalesce: bool = False,
+) -> OutboxMessage:
+    """Queue a send_whatsapp_message task for an outbound message.
+
+    User-triggered sends go to the interactive queue; bulk fan-outs should
+    pass TaskQueue.BULK so they never delay them. The send is held until
+    ``send_at`` (naive UTC) and, when ``merchant`` is given, until the
+    merchant's send window opens. With ``coalesce`` the send waits
+    WHATSAPP_DIGEST_WINDOW_SECONDS so other reminders to the same customer
+    can be merged with it into one digest.
+    """
+    # The task reports delivery back to this row, so give it an id before flush
+    if whatsapp_message.id is None:
+        whatsapp_message.id = uuid.uuid4()
+
+    send_window = None
+    if merchant is not None:
+        send_window = (merchant.send_window_start, merchant.send_window_end, merchant.timezone)
+
+    values = whatsapp_outbox_values(
+        whatsapp_message.id,
+        whatsapp_message.merchant_id,
+        whatsapp_message.customer_id,
+        whatsapp_message.message_text,
+        phone,
+        queue=queue,
+        send_window=send_window,
+        send_at=send_at,
+        coalesce=coalesce,
+    )
+    return enqueue_task(db, **values)
+
+
+def _ready_heads(merchant_filter, limit: int, now: datetime):
+    """The first ``limit`` publishable rows matching ``merchant_filter``, numbered in order."""
+    order = (OutboxMessage.available_at, OutboxMessage.created_at)
+    return (
+        select(
+            OutboxMessage.id.label("id"),
+            func.row_number().over(order_by=order).label("position"),
+        )
+        .where(
+            merchant_filter,
+            OutboxMessage.available_at <= now,
+            OutboxMessage.coalesce_key.is_(None),
+        )
+        .order_by(*order)
+        .limit(limit)
+    )
+
+
+def claim_outbox_batch(
+    db: Session, batch_size: int
+) -> List[Tuple[OutboxMessage, Optional[str]]]:
+    """Lock the next publishable outbox rows together with each merchant's plan.
+
+    Rows are ranked per merchant and at most FAIR_SHARE_QUANTUM x plan weight
+    rows are taken from any one merchant, heads of every merchant's backlog
+    first, so one merchant's 10,000 reminders cannot fill the batch. Only
+    the head of each merchant's backlog is read (a LATERAL index probe per
+    merchant), so a claim costs the same however large the backlog is. SKIP
+    LOCKED lets any number of relays run side by side, each claiming a
+    disjoint batch.
+    """
+    now = datetime.utcnow()
+    quantum = settings.FAIR_SHARE_QUANTUM
+    max_weight = max([1, *settings.FAIR_SHARE_PLAN_WEIGHTS.values()])
+    weight = case(settings.FAIR_SHARE_PLAN_WEIGHTS, value=Merchant.plan, else_=1)
+
+    merchant_heads = _ready_heads(OutboxMessage.merchant_id == Merchant.id, quantum * max_weight, now).lateral()
+    unowned_heads = _ready_heads(OutboxMessage.merchant_id.is_(None), quantum, now).subquery()
+    candidates = union_all(
+        select(merchant_heads.c.id, merchant_heads.c.position, weight.label("weight"))
+        .select_from(Merchant)
+        .join(merchant_heads, true()),
+        select(unowned_heads.c.id, unowned_heads.c.position, literal(1).label("weight")),
+    ).subquery()
+
+    return (
+        db.query(OutboxMessage, Merchant.plan)
+        .join(candidates, candidates.c.id == OutboxMessage.id)
+        .outerjoin(Merchant, Merchant.id == OutboxMessage.merchant_id)
+        .filter(candidates.c.position <= quantum * candidates.c.weight)
+        .order_by(candidates.c.position, OutboxMessage.available_at)
+        .limit(batch_size)
+        .with_for_update(of=OutboxMessage, skip_locked=True)
+        .all()
+    )
+
+
+def _broker_capacity(queues: Set[str]) -> Dict[str, int]:
+    """Free slots in the fair-share broker queues among ``queues``.
+
+    Keeping those queues short is what makes the fair order matter: the
+    backlog waits in the outbox, where it is interleaved per merchant, not in
+    the broker's FIFO. If the broker can't be read the capacity is unknown
+    and nothing is returned; publishing then fails and takes the retry path.
+    """
+    broker = get_broker_redis()
+    try:
+        return {
+            queue: settings.FAIR_SHARE_MAX_QUEUE_DEPTH - broker.llen(queue)
+            for queue in queues
+            if queue in settings.FAIR_SHARE_QUEUES
+        }
+    except redis.RedisError:
+        return {}
+
+
+@dataclass
+class RelayResult:
+    claimed: int = 0
+    published: int = 0
+    failed: int = 0
+    deferred: int = 0
+    scheduled: int = 0
+
+
+def relay_outbox_batch(db: Session, batch_size: Optional[int] = None) -> RelayResult:
+    """Publish one batch of outbox rows to the broker.
+
+    Rows are published in weighted fair order across merchants. Rows for a
+    fair-share queue that is already full are left in the outbox for a later
+    batch. Published rows are deleted. If the broker is unreachable the
+    remaining rows are pushed back by OUTBOX_RETRY_DELAY_SECONDS and stay in
+    the outbox. Rows scheduled for later move to the Redis send schedule
+    instead of the broker. Delivery is at-least-once: a crash between publish
+    and commit republishes. Traced rows record how long they waited in the
+    outbox and pass their trace on in the task's message headers.
+    """
+    if batch_size is None:
+        batch_size = settings.OUTBOX_BATCH_SIZE
+
+    result = RelayResult()
+    claimed = claim_outbox_batch(db, batch_size)
+    result.claimed = len(claimed)
+
+    now = datetime.utcnow()
+    rows_by_merchant: Dict[Optional[UUID], List[OutboxMessage]] = {}
+    weights: Dict[Optional[UUID], int] = {}
+    for row, plan in claimed:
+        if row.scheduled_for is not None and row.scheduled_for > now:
+            # Delayed sends wait in Redis, not in worker memory as ETA tasks
+            tracing.record_wait("outbox.wait", row.headers, task=row.task_name, queue=row.queue)
+            parent = tracing.extract(row.headers)
+            with tracing.span("outbox.schedule", parent=parent, due_at=row.scheduled_for.isoformat()):
+                schedule_task(
+                    row.task_name, row.args, row.kwargs, row.queue, row.scheduled_for,
+                    headers=tracing.message_headers(),
+                )
+            db.delete(row)
+            result.scheduled += 1
+            continue
+        rows_by_merchant.setdefault(row.merchant_id, []).append(row)
+        weights[row.merchant_id] = plan_weight(plan)
+
+    rows = fair_share_order(rows_by_merchant, weights)
+    capacity = _broker_capacity({row.queue or celery_app.conf.task_default_queue for row in rows})
+
+    broker_error: Optional[Exception] = None
+    for row in rows:
+        queue = row.queue or celery_app.conf.task_default_queue
+        if capacity.get(queue, 1) <= 0:
+            result.deferred += 1
+            continue
+
+        if broker_error is None:
+            try:
+                tracing.record_wait("outbox.wait", row.headers, task=row.task_name, queue=queue)
+                parent = tracing.extract(row.headers)
+                with tracing.span("outbox.publish", parent=parent, task=row.task_name, queue=queue):
+                    celery_app.send_task(
+                        row.task_name,
+                        args=row.args,
+                        kwargs=row.kwargs,
+                        queue=row.queue,
+                        headers=tracing.message_headers(),
+                        retry=False,
+                    )
+                db.delete(row)
+                result.published += 1
+                if queue in capacity:
+                    capacity[queue] -= 1
+                continue
+            except Exception as exc:
+                broker_error = exc
+
+        # Broker is down; don't wait on it for every remaining row
+        row.attempts += 1
+        row.last_error = str(broker_error)
+        row.available_at = datetime.utcnow() + timedelta(seconds=settings.OUTBOX_RETRY_DELAY_SECONDS)
+        result.failed += 1
+
+    db.commit()
+    return result
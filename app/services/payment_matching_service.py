@@ -0,0 +1,280 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.invoice import Invoice
+from app.models.payment_confirmation import PaymentConfirmation
+from app.utils.enums import InvoiceStatus
+
+
+# Score weights; a perfect match (same customer, exact amount, brand new) scores 1.0
+CUSTOMER_WEIGHT = 0.5
+AMOUNT_WEIGHT = 0.35
+RECENCY_WEIGHT = 0.15
+# Amounts within this fraction of the invoice amount earn partial credit
+AMOUNT_TOLERANCE = Decimal("0.02")
+RECENCY_HALF_LIFE_DAYS = 30
+
+# Largest value that fits Invoice.amount NUMERIC(10,2); longer digit runs are
+# references (UTR, phone numbers), not amounts.
+_MAX_AMOUNT = Decimal("99999999.99")
+_AMOUNT_RE = re.compile(r"(?<![\w.])(\d{1,3}(?:,\d{2,3})+|\d{1,8})(\.\d{1,2})?(?![\d,])")
+# Dates such as 12/03, 12-03-2026, 12.03.2026 or 2026-03-12; their parts are
+# not amounts. A lone "12.03" stays an amount.
+_DATE_RE = re.compile(
+    r"(?<![\w.,/-])(?:\d{4}-\d{1,2}-\d{1,2}"
+    r"|\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?"
+    r"|\d{1,2}\.\d{1,2}\.\d{2,4})(?![\w/-])"
+)
+
+
+def extract_amounts(text: Optional[str]) -> List[Decimal]:
+    """Extract candidate rupee amounts mentioned in a customer message."""
+    if not text:
+        return []
+
+    amounts: List[Decimal] = []
+    for whole, fraction in _AMOUNT_RE.findall(_DATE_RE.sub(" ", text)):
+        try:
+            amount = Decimal(whole.replace(",", "") + (fraction or ""))
+        except InvalidOperation:
+            continue
+        if 0 < amount <= _MAX_AMOUNT and amount not in amounts:
+            amounts.append(amount)
+    return amounts
+
+
+@dataclass(frozen=True)
+class CandidateInvoice:
+    id: UUID
+    customer_id: UUID
+    amount: Decimal
+    created_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class InvoiceMatch:
+    invoice_id: UUID
+    confidence: Decimal
+
+
+class MerchantInvoiceIndex:
+    """In-memory index over one merchant's open invoices.
+
+    Built once per batch so matching a confirmation is a couple of dict
+    lookups instead of a query per message.
+    """
+
+    def __init__(self, invoices: Iterable[CandidateInvoice]):
+        self.by_customer: Dict[UUID, List[CandidateInvoice]] = defaultdict(list)
+        self.by_amount: Dict[Decimal, List[CandidateInvoice]] = defaultdict(list)
+        for invoice in invoices:
+            self.by_customer[invoice.customer_id].append(invoice)
+            self.by_amount[invoice.amount].append(invoice)
+
+    def candidates(
+        self, customer_id: Optional[UUID], amounts: Sequence[Decimal]
+    ) -> List[CandidateInvoice]:
+        """Open invoices that could match a confirmation.
+
+        A known sender only ever matches their own invoices; amounts are
+        looked up across the merchant only when the sender is unknown.
+        """
+        if customer_id is not None:
+            return list(self.by_customer.get(customer_id, ()))
+
+        found: Dict[UUID, CandidateInvoice] = {}
+        for amount in amounts:
+            for invoice in self.by_amount.get(amount, ()):
+                found[invoice.id] = invoice
+        return list(found.values())
+
+
+def build_invoice_indexes(
+    db: Session, merchant_ids: Iterable[UUID]
+) -> Dict[UUID, MerchantInvoiceIndex]:
+    """Load open invoices for all given merchants with a single query."""
+    merchant_ids = list(set(merchant_ids))
+    if not merchant_ids:
+        return {}
+
+    rows = db.query(
+        Invoice.merchant_id,
+        Invoice.id,
+        Invoice.customer_id,
+        Invoice.amount,
+        Invoice.created_at,
+    ).filter(
+        Invoice.merchant_id.in_(merchant_ids),
+        Invoice.status == InvoiceStatus.UNPAID.value,
+        Invoice.deleted_at.is_(None),
+    ).all()
+
+    grouped: Dict[UUID, List[CandidateInvoice]] = defaultdict(list)
+    for merchant_id, invoice_id, customer_id, amount, created_at in rows:
+        grouped[merchant_id].append(
+            CandidateInvoice(invoice_id, customer_id, amount, created_at)
+        )
+
+    return {merchant_id: MerchantInvoiceIndex(grouped.get(merchant_id, ())) for merchant_id in merchant_ids}
+
+
+def _score(
+    invoice: CandidateInvoice,
+    customer_id: Optional[UUID],
+    amounts: Sequence[Decimal],
+    now: datetime,
+) -> float:
+    score = 0.0
+    if customer_id is not None and invoice.customer_id == customer_id:
+        score += CUSTOMER_WEIGHT
+
+    best_amount = 0.0
+    for amount in amounts:
+        if amount == invoice.amount:
+            best_amount = 1.0
+            break
+        if abs(amount - invoice.amount) <= invoice.amount * AMOUNT_TOLERANCE:
+            best_amount = 0.5
+    score += AMOUNT_WEIGHT * best_amount
+
+    if invoice.created_at is not None:
+        age_days = max((now - invoice.created_at).total_seconds() / 86400, 0.0)
+        score += RECENCY_WEIGHT * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+    return score
+
+
+def rank_candidates(
+    index: MerchantInvoiceIndex,
+    customer_id: Optional[UUID],
+    message: Optional[str],
+    now: Optional[datetime] = None,
+) -> List[Tuple[CandidateInvoice, float]]:
+    """Rank a merchant's open invoices for a confirmation, best first."""
+    if now is None:
+        now = datetime.utcnow()
+    amounts = extract_amounts(message)
+    ranked = [
+        (invoice, _score(invoice, customer_id, amounts, now))
+        for invoice in index.candidates(customer_id, amounts)
+    ]
+    ranked.sort(key=lambda item: item[1], reverse=True)
+    return ranked
+
+
+def match_confirmation(
+    index: MerchantInvoiceIndex,
+    customer_id: Optional[UUID],
+    message: Optional[str],
+    now: Optional[datetime] = None,
+) -> Optional[InvoiceMatch]:
+    """Pick the best open invoice for a confirmation, if any is plausible.
+
+    Confidence is the best score discounted by how close the runner-up is,
+    so a customer with several similar open invoices gets a low-confidence
+    match rather than a confident wrong one.
+    """
+    ranked = rank_candidates(index, customer_id, message, now)
+    if not ranked:
+        return None
+
+    best_invoice, best = ranked[0]
+    confidence = best
+    if len(ranked) > 1 and best > 0:
+        runner_up = ranked[1][1]
+        confidence = best * min(1.0, 0.5 + (best - runner_up) / best)
+
+    confidence = round(min(confidence, 0.99), 2)
+    if confidence < settings.PAYMENT_MATCH_MIN_CONFIDENCE:
+        return None
+    return InvoiceMatch(best_invoice.id, Decimal(str(confidence)))
+
+
+def match_confirmations(
+    db: Session, confirmations: Sequence[PaymentConfirmation]
+) -> int:
+    """Attach the best matching invoice to each confirmation (no commit).
+
+    Builds one invoice index per merchant in the batch. Returns the number of
+    confirmations that were matched.
+    """
+    if not confirmations:
+        return 0
+
+    indexes = build_invoice_indexes(db, (c.merchant_id for c in confirmations))
+    now = datetime.utcnow()
+    matched = 0
+
+    for confirmation in confirmations:
+        match = match_confirmation(
+            indexes[confirmation.merchant_id],
+            confirmation.customer_id,
+            confirmation.customer_message,
+            now,
+        )
+        if match:
+            confirmation.invoice_id = match.invoice_id
+            confirmation.match_confidence = match.confidence
+            matched += 1
+        elif confirmation.match_confidence is not None:
+            # A previous automatic match no longer holds (invoice paid or deleted)
+            confirmation.invoice_id = None
+            confirmation.match_confidence = None
+
+    return matched
+
+
+@dataclass
+class MatchingResult:
+    processed: int = 0
+    matched: int = 0
+    batches: int = 0
+
+
+def match_pending_confirmations(
+    db: Session, batch_size: int = 500
+) -> MatchingResult:
+    """Re-run matching over all pending confirmations.
+
+    Covers confirmations with no invoice and ones that were matched
+    automatically before; invoices set from the message context are kept.
+    Each batch is committed on its own.
+    """
+    result = MatchingResult()
+    last_id = None
+
+    while True:
+        query = db.query(PaymentConfirmation).filter(
+            PaymentConfirmation.status == 'pending',
+            or_(
+                PaymentConfirmation.invoice_id.is_(None),
+                PaymentConfirmation.match_confidence.isnot(None),
+            ),
+        )
+        if last_id is not None:
+            query = query.filter(PaymentConfirmation.id > last_id)
+
+        confirmations = query.order_by(PaymentConfirmation.id).limit(batch_size).all()
+        if not confirmations:
+            break
+
+        result.matched += match_confirmations(db, confirmations)
+        result.processed += len(confirmations)
+        result.batches += 1
+        last_id = confirmations[-1].id
+
+        db.commit()
+
+        if len(confirmations) < batch_size:
+            break
+
+    return result
@@ -0,0 +1,150 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.celery_app import celery_app
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, RedisCircuitBreaker
+from app.core import tracing
+from app.core.config import settings
+from app.core.rate_limit import RedisTokenBucket
+from app.core.redis import get_redis
+
+
+PROVIDER_NAME = "whatsapp"
+PARKED_MESSAGES_KEY = f"parked:{PROVIDER_NAME}"
+
+_breaker: Optional[RedisCircuitBreaker] = None
+_rate_limiter: Optional[RedisTokenBucket] = None
+
+
+def get_provider_breaker() -> RedisCircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        _breaker = RedisCircuitBreaker(
+            PROVIDER_NAME,
+            failure_threshold=settings.WHATSAPP_BREAKER_FAILURE_THRESHOLD,
+            failure_window=settings.WHATSAPP_BREAKER_FAILURE_WINDOW_SECONDS,
+            reset_timeout=settings.WHATSAPP_BREAKER_RESET_TIMEOUT_SECONDS,
+        )
+    return _breaker
+
+
+def get_provider_rate_limiter() -> RedisTokenBucket:
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RedisTokenBucket(
+            f"ratelimit:{PROVIDER_NAME}",
+            rate=settings.WHATSAPP_RATE_LIMIT_PER_SECOND,
+            capacity=settings.WHATSAPP_RATE_LIMIT_BURST,
+        )
+    return _rate_limiter
+
+
+def park_message(
+    task_name: str,
+    args: Sequence[Any],
+    kwargs: Dict[str, Any],
+    queue: Optional[str],
+) -> int:
+    """Hold a send while the breaker is open. Returns the number parked."""
+    item = json.dumps({
+        "task": task_name,
+        "args": list(args),
+        "kwargs": kwargs,
+        "queue": queue,
+        "headers": tracing.message_headers(),
+    })
+    return get_redis().rpush(PARKED_MESSAGES_KEY, item)
+
+
+def parked_count() -> int:
+    return get_redis().llen(PARKED_MESSAGES_KEY)
+
+
+@dataclass
+class DrainResult:
+    state: str
+    released: int = 0
+    remaining: int = 0
+
+
+def drain_parked_messages(batch_size: Optional[int] = None) -> DrainResult:
+    """Release parked sends back to their queues according to breaker state.
+
+    Closed: everything is released, batch by batch, stopping if the breaker
+    opens again. Half-open: a single message is released as the probe.
+    Open: nothing is released.
+    """
+    if batch_size is None:
+        batch_size = settings.WHATSAPP_PARKED_DRAIN_BATCH_SIZE
+
+    breaker = get_provider_breaker()
+    redis_client = get_redis()
+    result = DrainResult(state=breaker.state())
+
+    while result.state != OPEN:
+        count = 1 if result.state == HALF_OPEN else batch_size
+        items: List[bytes] = redis_client.lpop(PARKED_MESSAGES_KEY, count) or []
+        for raw in items:
+            item = json.loads(raw)
+            headers = item.get("headers")
+            tracing.record_wait("parked.wait", headers, task=item["task"], queue=item["queue"])
+            with tracing.span("parked.release", parent=tracing.extract(headers), task=item["task"]):
+                celery_app.send_task(
+                    item["task"],
+                    args=item["args"],
+                    kwargs=item["kwargs"],
+                    queue=item["queue"],
+                    headers=tracing.message_headers(),
+                )
+        result.released += len(items)
+
+        if result.state == HALF_OPEN or len(items) < count:
+            break
+        result.state = breaker.state()
+
+    result.remaining = parked_count()
+    return result
+
+
+class ProviderGuardCollector:
+    """Prometheus collector reading breaker state from Redis at scrape time."""
+
+    def collect(self):
+        breaker = get_provider_breaker()
+        current = breaker.state()
+
+        state = GaugeMetricFamily(
+            "payping_provider_circuit_state",
+            "Circuit breaker state (1 for the current state)",
+            labels=["provider", "state"],
+        )
+        for name in (CLOSED, OPEN, HALF_OPEN):
+            state.add_metric([PROVIDER_NAME, name], 1 if name == current else 0)
+        yield state
+
+        failures = GaugeMetricFamily(
+            "payping_provider_circuit_failures",
+            "Failures counted in the current breaker window",
+            labels=["provider"],
+        )
+        failures.add_metric([PROVIDER_NAME], breaker.failures())
+        yield failures
+
+        opened = CounterMetricFamily(
+            "payping_provider_circuit_opened",
+            "Times the circuit breaker has opened",
+            labels=["provider"],
+        )
+        opened.add_metric([PROVIDER_NAME], breaker.opened_total())
+        yield opened
+
+        parked = GaugeMetricFamily(
+            "payping_provider_parked_messages",
+            "Messages parked while the circuit breaker is open",
+            labels=["provider"],
+        )
+        parked.add_metric([PROVIDER_NAME], parked_count())
+        yield parked
@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.recurring_invoice import RecurringInvoice
+
+
+@dataclass
+class TemplateColumns:
+    """Active recurring templates as parallel arrays, one entry per template."""
+    next_generation_dates: np.ndarray  # datetime64[D]
+    days_of_month: np.ndarray  # int64
+    amounts_paise: np.ndarray  # int64, amount x 100 so totals stay exact
+    end_dates: np.ndarray  # datetime64[D], NaT when open-ended
+
+    def __len__(self) -> int:
+        return len(self.days_of_month)
+
+
+@dataclass
+class MonthlyForecast:
+    month: date  # First day of the month
+    invoice_count: int
+    projected_amount: Decimal
+
+
+def load_template_columns(db: Session, merchant_id: UUID) -> TemplateColumns:
+    """Read the merchant's active templates straight into column arrays."""
+    rows = (
+        db.query(
+            RecurringInvoice.next_generation_date,
+            RecurringInvoice.day_of_month,
+            RecurringInvoice.amount,
+            RecurringInvoice.end_date,
+        )
+        .filter(
+            RecurringInvoice.merchant_id == merchant_id,
+            RecurringInvoice.is_active.is_(True),
+        )
+        .all()
+    )
+    next_dates, days, amounts, end_dates = zip(*rows) if rows else ((), (), (), ())
+    return TemplateColumns(
+        next_generation_dates=np.array(next_dates, dtype="datetime64[D]"),
+        days_of_month=np.array(days, dtype=np.int64),
+        amounts_paise=np.array([int(amount * 100) for amount in amounts], dtype=np.int64),
+        end_dates=np.array([d if d is not None else "NaT" for d in end_dates], dtype="datetime64[D]"),
+    )
+
+
+def forecast_monthly_revenue(
+    templates: TemplateColumns, today: date, months: int = 12
+) -> List[MonthlyForecast]:
+    """Project invoices generated over the next ``months`` calendar months.
+
+    Mirrors the generator: an overdue template generates today, and every
+    later period falls on day_of_month of the following month, clamped to
+    the month's last day (calculate_next_generation_date). Periods after
+    end_date are dropped. All templates and months are computed at once as
+    a templates x months grid.
+    """
+    today_d = np.datetime64(today, "D")
+    current_month = today_d.astype("datetime64[M]")
+    month_starts = current_month + np.arange(months)
+
+    counts = np.zeros(months, dtype=np.int64)
+    totals = np.zeros(months, dtype=np.int64)
+
+    if len(templates):
+        # First generation date and its month; later periods step a month at a time
+        first_dates = np.maximum(templates.next_generation_dates, today_d)
+        first_months = first_dates.astype("datetime64[M]")
+        period_months = first_months[:, None] + np.arange(months)[None, :]
+
+        month_first_day = period_months.astype("datetime64[D]")
+        days_in_month = ((period_months + 1).astype("datetime64[D]") - month_first_day).astype(np.int64)
+        days = np.minimum(templates.days_of_month[:, None], days_in_month)
+        period_dates = month_first_day + (days - 1)
+        period_dates[:, 0] = first_dates
+
+        horizon_end = current_month + months
+        valid = period_months < horizon_end
+        has_end = ~np.isnat(templates.end_dates)
+        valid &= ~has_end[:, None] | (period_dates <= templates.end_dates[:, None])
+
+        buckets = (period_months - current_month).astype(np.int64)[valid]
+        amounts = np.broadcast_to(templates.amounts_paise[:, None], valid.shape)[valid]
+        counts = np.bincount(buckets, minlength=months)[:months]
+        totals = np.bincount(buckets, weights=amounts, minlength=months)[:months].round().astype(np.int64)
+
+    return [
+        MonthlyForecast(
+            month=month.astype("datetime64[D]").item(),
+            invoice_count=int(count),
+            projected_amount=Decimal(int(total)) / 100,
+        )
+        for month, count, total in zip(month_starts, counts, totals)
+    ]
+
+
+def forecast_merchant_revenue(
+    db: Session, merchant_id: UUID, months: int = 12, today: Optional[date] = None
+) -> List[MonthlyForecast]:
+    if today is None:
+        today = date.today()
+    return forecast_monthly_revenue(load_template_columns(db, merchant_id), today, months)
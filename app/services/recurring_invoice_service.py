@@ -1,19 +1,33 @@
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 import calendar
-from typing import List
-
-from sqlalchemy.orm import Session, joinedload
-
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Text, cast, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core import tracing
+from app.core.cache import invalidate_on_commit
+from app.core.config import settings
+from app.core.profiling import profile_phase
+from app.models.customer import Customer
 from app.models.invoice import Invoice
+from app.models.merchant import Merchant
+from app.models.outbox_message import OutboxMessage
 from app.models.recurring_invoice import RecurringInvoice
 from app.models.whatsapp_message import WhatsAppMessage
 from app.utils.enums import (
     InvoiceStatus,
+    TaskQueue,
     WhatsAppDirection,
     WhatsAppMessageStatus,
     WhatsAppMessageType,
 )
-from app.tasks.whatsapp import send_whatsapp_message
+from app.services.cached_reads import billing_tag
+from app.services.outbox_service import whatsapp_outbox_values
 
 
 def _last_day_of_month(year: int, month: int) -> int:
@@ -79,89 +93,298 @@ def _should_generate_for_template(template: RecurringInvoice, today: date) -> bo
     return True
 
 
-def generate_invoices_from_templates(db: Session) -> List[Invoice]:
-    """Generate invoices for all active recurring invoice templates that are due.
+# Only the columns generation needs; rows are plain tuples, so nothing
+# accumulates in the session's identity map
+_TEMPLATE_COLUMNS = (
+    RecurringInvoice.id,
+    RecurringInvoice.merchant_id,
+    RecurringInvoice.customer_id,
+    RecurringInvoice.invoice_number_prefix,
+    RecurringInvoice.description,
+    RecurringInvoice.amount,
+    RecurringInvoice.day_of_month,
+    RecurringInvoice.due_date_offset,
+    RecurringInvoice.end_date,
+    RecurringInvoice.next_generation_date,
+    RecurringInvoice.is_active,
+    RecurringInvoice.pause_reminder,
+    Customer.phone,
+    Merchant.send_window_start,
+    Merchant.send_window_end,
+    Merchant.timezone,
+)
 
-    This is intended to be called from a scheduled job (e.g., once per day).
-    """
-    today = date.today()
 
-    templates: List[RecurringInvoice] = (
-        db.query(RecurringInvoice)
-        .options(joinedload(RecurringInvoice.customer))
+@dataclass
+class GenerationResult:
+    templates: int = 0
+    invoices: int = 0
+    messages: int = 0
+    existing: int = 0  # Periods that already had an invoice
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+    last_template_id: Optional[uuid.UUID] = None  # Checkpoint: every template up to this id is done
+
+    @property
+    def invoices_per_second(self) -> float:
+        return self.invoices / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def merge(self, other: "GenerationResult") -> None:
+        """Add another shard's counts; elapsed time is left to the coordinator."""
+        self.templates += other.templates
+        self.invoices += other.invoices
+        self.messages += other.messages
+        self.existing += other.existing
+        self.chunks += other.chunks
+
+
+def merchant_shard(shard_count: int):
+    """SQL expression giving each template's shard, stable per merchant."""
+    return func.mod(func.hashtext(cast(RecurringInvoice.merchant_id, Text)).op("&")(0x7FFFFFFF), shard_count)
+
+
+def _due_templates_chunk(
+    db: Session,
+    today: date,
+    after_id: Optional[uuid.UUID],
+    chunk_size: int,
+    shard: Optional[Tuple[int, int]] = None,
+) -> List[Any]:
+    """Lock the next chunk of due templates, optionally of one merchant shard.
+
+    SKIP LOCKED means a template being generated elsewhere (an overlapping
+    run, a retried shard) is passed over instead of generated twice; it is
+    no longer due once that transaction commits.
+    """
+    query = (
+        db.query(*_TEMPLATE_COLUMNS)
+        .join(Customer, Customer.id == RecurringInvoice.customer_id)
+        .join(Merchant, Merchant.id == RecurringInvoice.merchant_id)
         .filter(
             RecurringInvoice.is_active.is_(True),
             RecurringInvoice.next_generation_date <= today,
         )
+    )
+    if after_id is not None:
+        query = query.filter(RecurringInvoice.id > after_id)
+    if shard is not None:
+        shard_index, shard_count = shard
+        query = query.filter(merchant_shard(shard_count) == shard_index)
+    return (
+        query.order_by(RecurringInvoice.id)
+        .limit(chunk_size)
+        .with_for_update(of=RecurringInvoice, skip_locked=True)
         .all()
     )
 
-    generated_invoices: List[Invoice] = []
-
-    for template in templates:
-        if not _should_generate_for_template(template, today):
-            continue
-
-        generation_date = max(template.next_generation_date, today)
-
-        # Create invoice number - simple prefix + date; can be customized further
-        if template.invoice_number_prefix:
-            invoice_number = f"{template.invoice_number_prefix}-{generation_date.strftime('%Y%m%d')}"
-        else:
-            invoice_number = None
-
-        due_date = generation_date + timedelta(days=template.due_date_offset)
 
-        invoice = Invoice(
-            merchant_id=template.merchant_id,
-            customer_id=template.customer_id,
-            recurring_invoice_id=template.id,
-            invoice_number=invoice_number,
-            description=template.description,
-            amount=template.amount,
-            due_date=due_date,
-            status=InvoiceStatus.UNPAID.value,
-            pause_reminder=template.pause_reminder,
-        )
-        db.add(invoice)
-        db.flush()
-
-        # Create WhatsApp message if reminders are not paused
-        if not template.pause_reminder:
-            message_text = (
-                f"Invoice #{invoice.invoice_number or invoice.id} "
-                f"for ₹{template.amount} is due on {due_date.isoformat()}"
+def missed_periods(
+    next_generation_date: date,
+    day_of_month: int,
+    today: date,
+    end_date: Optional[date] = None,
+    limit: Optional[int] = None,
+) -> List[date]:
+    """Every generation date from next_generation_date up to today (and end_date)."""
+    periods: List[date] = []
+    period = next_generation_date
+    while period <= today and (end_date is None or period <= end_date):
+        if limit is not None and len(periods) >= limit:
+            break
+        periods.append(period)
+        period = calculate_next_generation_date(period, day_of_month)
+    return periods
+
+
+def _generate_chunk(
+    db: Session,
+    templates: Sequence[Any],
+    today: date,
+    result: GenerationResult,
+    backfill: bool = False,
+) -> None:
+    """Insert the invoices, messages and outbox rows for one chunk of templates.
+
+    Each table gets one multi-row INSERT and the templates one bulk UPDATE.
+    Ids are generated here so rows can reference each other without flushes.
+    Invoices are inserted with ON CONFLICT DO NOTHING on (template, period),
+    and only the ones actually inserted get a reminder, so generating a
+    period twice is a no-op.
+    """
+    now = datetime.utcnow()
+    invoice_rows: List[Dict[str, Any]] = []
+    template_updates: List[Dict[str, Any]] = []
+    templates_by_invoice: Dict[uuid.UUID, Any] = {}
+
+    with profile_phase("build"):
+        for template in templates:
+            if not _should_generate_for_template(template, today):
+                continue
+
+            if backfill:
+                periods = missed_periods(
+                    template.next_generation_date,
+                    template.day_of_month,
+                    today,
+                    template.end_date,
+                    limit=settings.RECURRING_BACKFILL_MAX_PERIODS,
+                )
+            else:
+                periods = [max(template.next_generation_date, today)]
+
+            for generation_date in periods:
+                # Create invoice number - simple prefix + date; can be customized further
+                if template.invoice_number_prefix:
+                    invoice_number = f"{template.invoice_number_prefix}-{generation_date.strftime('%Y%m%d')}"
+                else:
+                    invoice_number = None
+
+                invoice_id = uuid.uuid4()
+                invoice_rows.append({
+                    "id": invoice_id,
+                    "merchant_id": template.merchant_id,
+                    "customer_id": template.customer_id,
+                    "recurring_invoice_id": template.id,
+                    "period_date": generation_date,
+                    "invoice_number": invoice_number,
+                    "description": template.description,
+                    "amount": template.amount,
+                    "due_date": generation_date + timedelta(days=template.due_date_offset),
+                    "status": InvoiceStatus.UNPAID.value,
+                    "pause_reminder": template.pause_reminder,
+                })
+                templates_by_invoice[invoice_id] = template
+
+            # Update next_generation_date
+            next_date = calculate_next_generation_date(
+                periods[-1], template.day_of_month
             )
-            whatsapp_message = WhatsAppMessage(
-                merchant_id=template.merchant_id,
-                customer_id=template.customer_id,
-                invoice_id=invoice.id,
-                direction=WhatsAppDirection.OUTBOUND.value,
-                message_type=WhatsAppMessageType.INVOICE.value,
-                status=WhatsAppMessageStatus.PENDING.value,
-                message_text=message_text,
+            template_updates.append({
+                "id": template.id,
+                "next_generation_date": next_date,
+                "is_active": not (template.end_date and next_date > template.end_date),
+                "updated_at": now,
+            })
+
+    inserted_ids: List[uuid.UUID] = []
+    if invoice_rows:
+        statement = (
+            pg_insert(Invoice)
+            .on_conflict_do_nothing(
+                index_elements=[Invoice.recurring_invoice_id, Invoice.period_date],
+                index_where=Invoice.period_date.isnot(None),
             )
-            db.add(whatsapp_message)
-            db.flush()  # Flush to ensure whatsapp_message is available
-            
-            # Trigger Celery task to send WhatsApp message
-            send_whatsapp_message.delay(template.customer.phone, whatsapp_message.message_text)
-
-        # Update next_generation_date
-        next_date = calculate_next_generation_date(
-            generation_date, template.day_of_month
+            .returning(Invoice.id)
         )
+        with profile_phase("insert"):
+            inserted_ids = list(db.execute(statement, invoice_rows).scalars())
+    invalidate_on_commit(db, *{billing_tag(templates_by_invoice[invoice_id].merchant_id) for invoice_id in inserted_ids})
+
+    message_rows: List[Dict[str, Any]] = []
+    outbox_rows: List[Dict[str, Any]] = []
+    invoices_by_id = {row["id"]: row for row in invoice_rows}
+    with profile_phase("build"):
+        for invoice_id in inserted_ids:
+            template = templates_by_invoice[invoice_id]
+            invoice = invoices_by_id[invoice_id]
+
+            # Create WhatsApp message if reminders are not paused
+            if template.pause_reminder:
+                continue
+            message_id = uuid.uuid4()
+            message_text = (
+                f"Invoice #{invoice['invoice_number'] or invoice_id} "
+                f"for ₹{template.amount} is due on {invoice['due_date'].isoformat()}"
+            )
+            message_rows.append({
+                "id": message_id,
+                "merchant_id": template.merchant_id,
+                "customer_id": template.customer_id,
+                "invoice_id": invoice_id,
+                "direction": WhatsAppDirection.OUTBOUND.value,
+                "message_type": WhatsAppMessageType.INVOICE.value,
+                "status": WhatsAppMessageStatus.PENDING.value,
+                "message_text": message_text,
+            })
+            outbox_rows.append(whatsapp_outbox_values(
+                message_id,
+                template.merchant_id,
+                template.customer_id,
+                message_text,
+                template.phone,
+                queue=TaskQueue.BULK,
+                send_window=(template.send_window_start, template.send_window_end, template.timezone),
+                coalesce=True,
+            ))
+
+    with profile_phase("insert"):
+        if message_rows:
+            db.execute(insert(WhatsAppMessage), message_rows)
+        if template_updates:
+            db.execute(update(RecurringInvoice), template_updates)
+    with profile_phase("enqueue"):
+        if outbox_rows:
+            with tracing.span("outbox.enqueue", rows=len(outbox_rows)):
+                headers = tracing.message_headers()
+                for row in outbox_rows:
+                    row["headers"] = headers
+                db.execute(insert(OutboxMessage), outbox_rows)
+
+    result.invoices += len(inserted_ids)
+    result.existing += len(invoice_rows) - len(inserted_ids)
+    result.messages += len(message_rows)
+
+
+def generate_invoices_from_templates(
+    db: Session,
+    chunk_size: Optional[int] = None,
+    after_id: Optional[uuid.UUID] = None,
+    today: Optional[date] = None,
+    result: Optional[GenerationResult] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    backfill: bool = False,
+) -> GenerationResult:
+    """Generate invoices for all active recurring invoice templates that are due.
 
-        if template.end_date and next_date > template.end_date:
-            template.is_active = False
-        template.next_generation_date = next_date
-        template.updated_at = datetime.utcnow()
-
-        generated_invoices.append(invoice)
-
-    if generated_invoices:
-        db.commit()
-
-    return generated_invoices
+    Templates are read in keyset-paginated chunks of ``chunk_size`` and each
+    chunk is committed on its own, so memory stays flat and a failure loses
+    at most one chunk. ``result.last_template_id`` is the checkpoint; pass it
+    as ``after_id`` to resume. Pass ``result`` to read the checkpoint even
+    when a chunk fails. Re-running without a checkpoint is also safe, since
+    generated templates are no longer due.
 
+    ``shard`` is (index, count): only templates of merchants hashed to that
+    shard are generated, so count processes can split one run between them.
 
+    This is intended to be called from a scheduled job (e.g., once per day).
+    """
+    if chunk_size is None:
+        chunk_size = settings.RECURRING_GENERATION_CHUNK_SIZE
+    if today is None:
+        today = date.today()
+
+    if result is None:
+        result = GenerationResult()
+    if after_id is not None:
+        result.last_template_id = after_id
+    started = time.perf_counter()
+
+    while True:
+        with profile_phase("query"):
+            templates = _due_templates_chunk(db, today, result.last_template_id, chunk_size, shard)
+        if not templates:
+            break
+
+        _generate_chunk(db, templates, today, result, backfill)
+        with profile_phase("commit"):
+            db.commit()
+
+        result.templates += len(templates)
+        result.chunks += 1
+        result.last_template_id = templates[-1].id
+
+        if len(templates) < chunk_size:
+            break
+
+    result.elapsed_seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,141 @@
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from app.celery_app import celery_app
+from app.core import tracing
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+SCHEDULED_TASKS_KEY = "scheduled:tasks"
+
+
+# Atomically take up to ARGV[2] members due by ARGV[1], so any number of
+# pollers can run without releasing the same task twice.
+_POP_DUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #items > 0 then
+  redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+
+def next_send_time(
+    now: datetime,
+    window_start: Optional[time],
+    window_end: Optional[time],
+    tz_name: Optional[str] = None,
+) -> Optional[datetime]:
+    """Return when a message may be sent under a daily send window.
+
+    ``now`` and the result are naive UTC datetimes; the window is local time
+    in ``tz_name``. Returns None when sending is allowed right away (no
+    window configured or ``now`` is inside it). Windows may cross midnight,
+    e.g. 21:00-06:00.
+    """
+    if window_start is None or window_end is None or window_start == window_end:
+        return None
+
+    tz = ZoneInfo(tz_name or settings.DEFAULT_TIMEZONE)
+    local_now = now.replace(tzinfo=timezone.utc).astimezone(tz)
+    current = local_now.time()
+
+    if window_start < window_end:
+        inside = window_start <= current < window_end
+    else:
+        inside = current >= window_start or current < window_end
+    if inside:
+        return None
+
+    opens = datetime.combine(local_now.date(), window_start, tzinfo=tz)
+    if opens <= local_now:
+        opens += timedelta(days=1)
+    return opens.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def schedule_task(
+    task_name: str,
+    args: Sequence[Any],
+    kwargs: Dict[str, Any],
+    queue: Optional[str],
+    due_at: datetime,
+    headers: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Store a task in the Redis sorted set until ``due_at`` (naive UTC).
+
+    ``headers`` (trace context) are published with the task.
+    """
+    member = json.dumps({
+        "id": str(uuid.uuid4()),
+        "task": task_name,
+        "args": list(args),
+        "kwargs": kwargs,
+        "queue": queue,
+        "headers": headers or {},
+    })
+    score = due_at.replace(tzinfo=timezone.utc).timestamp()
+    get_redis().zadd(SCHEDULED_TASKS_KEY, {member: score})
+
+
+def scheduled_count() -> int:
+    return get_redis().zcard(SCHEDULED_TASKS_KEY)
+
+
+def pop_due_tasks(limit: int, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    if now is None:
+        now = datetime.utcnow()
+    redis_client = get_redis()
+    script = redis_client.register_script(_POP_DUE_SCRIPT)
+    score = now.replace(tzinfo=timezone.utc).timestamp()
+    return [json.loads(item) for item in script(keys=[SCHEDULED_TASKS_KEY], args=[score, limit])]
+
+
+@dataclass
+class ReleaseResult:
+    released: int = 0
+    failed: int = 0
+
+
+def release_due_tasks(batch_size: Optional[int] = None) -> ReleaseResult:
+    """Publish one batch of due scheduled tasks to their queues.
+
+    Tasks the broker refuses are put back so the next poll retries them.
+    """
+    if batch_size is None:
+        batch_size = settings.SCHEDULED_SEND_BATCH_SIZE
+
+    result = ReleaseResult()
+    items = pop_due_tasks(batch_size)
+
+    for index, item in enumerate(items):
+        # Members stored before tracing have no headers
+        headers = item.get("headers")
+        try:
+            parent = tracing.extract(headers)
+            with tracing.span("schedule.publish", parent=parent, task=item["task"], queue=item["queue"]):
+                celery_app.send_task(
+                    item["task"],
+                    args=item["args"],
+                    kwargs=item["kwargs"],
+                    queue=item["queue"],
+                    headers=tracing.message_headers(),
+                    retry=False,
+                )
+            tracing.record_wait("schedule.wait", headers, task=item["task"], queue=item["queue"])
+            result.released += 1
+        except Exception:
+            retry_at = datetime.utcnow() + timedelta(seconds=settings.OUTBOX_RETRY_DELAY_SECONDS)
+            for pending in items[index:]:
+                schedule_task(
+                    pending["task"], pending["args"], pending["kwargs"], pending["queue"], retry_at,
+                    headers=pending.get("headers"),
+                )
+            result.failed = len(items) - index
+            break
+
+    return result
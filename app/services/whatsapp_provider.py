@@ -0,0 +1,79 @@
+import time
+import uuid
+from typing import Optional
+
+import requests
+
+from app.core import tracing
+from app.core.config import settings
+
+
+class WhatsAppProviderError(Exception):
+    """The provider rejected the message (not worth retrying)."""
+    pass
+
+
+class ProviderUnavailableError(WhatsAppProviderError):
+    """The provider is down, timing out or returning server errors."""
+    pass
+
+
+class ProviderThrottledError(ProviderUnavailableError):
+    """The provider returned 429; we are above its quota."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _send_aisensy(phone: str, message: str) -> Optional[str]:
+    payload = {
+        "apiKey": settings.AISENSY_API_KEY,
+        "campaignName": settings.AISENSY_CAMPAIGN_NAME,
+        "destination": phone,
+        "userName": "PayPing",
+        "templateParams": [message],
+        "source": "payping-backend",
+    }
+    try:
+        response = requests.post(
+            settings.AISENSY_API_URL,
+            json=payload,
+            headers=tracing.inject(),
+            timeout=settings.WHATSAPP_PROVIDER_TIMEOUT_SECONDS,
+        )
+    except requests.RequestException as exc:
+        raise ProviderUnavailableError(f"WhatsApp provider request failed: {exc}") from exc
+    tracing.current_span().set_attribute("status", response.status_code)
+
+    if response.status_code == 429:
+        retry_after = response.headers.get("Retry-After")
+        raise ProviderThrottledError(
+            "WhatsApp provider rate limit exceeded",
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+    if response.status_code >= 500:
+        raise ProviderUnavailableError(f"WhatsApp provider error {response.status_code}: {response.text[:200]}")
+    if response.status_code >= 400:
+        raise WhatsAppProviderError(f"WhatsApp provider rejected message {response.status_code}: {response.text[:200]}")
+
+    try:
+        return response.json().get("submitted_message_id")
+    except ValueError:
+        return None
+
+
+def send_whatsapp_text(phone: str, message: str) -> Optional[str]:
+    """Send a WhatsApp message through the configured provider.
+
+    Returns the provider's message id when it reports one.
+    """
+    with tracing.span("whatsapp.provider.send", provider=settings.WHATSAPP_PROVIDER) as span:
+        if settings.WHATSAPP_PROVIDER == "aisensy":
+            provider_message_id = _send_aisensy(phone, message)
+        else:
+            # Simulated provider for local development
+            time.sleep(settings.WHATSAPP_SIMULATED_LATENCY_SECONDS)
+            provider_message_id = f"simulated-{uuid.uuid4()}"
+        span.set_attribute("provider_message_id", provider_message_id)
+    return provider_message_id
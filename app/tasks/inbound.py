@@ -0,0 +1,31 @@
+from app.celery_app import celery_app
+from app.services.batch_job_service import run_tracked_job
+from app.services.inbound_message_service import classify_inbound_messages
+from app.services.payment_matching_service import match_pending_confirmations
+
+
+def _classify(db, run):
+    result = classify_inbound_messages(db)
+    run.rows_processed = result.classified
+    print(
+        f"Classified {result.classified} inbound messages, "
+        f"created {result.confirmations_created} payment confirmations"
+    )
+
+
+def _match(db, run):
+    result = match_pending_confirmations(db)
+    run.rows_processed = result.processed
+    print(f"Matched {result.matched} of {result.processed} pending confirmations")
+
+
+@celery_app.task
+def classify_inbound_messages_task():
+    if run_tracked_job("classify_inbound_messages", _classify) is None:
+        print("Inbound classification is already running; skipped")
+
+
+@celery_app.task
+def match_payment_confirmations_task():
+    if run_tracked_job("match_payment_confirmations", _match) is None:
+        print("Payment matching is already running; skipped")
@@ -0,0 +1,29 @@
+from app.celery_app import celery_app
+from app.services.batch_job_service import prune_job_runs, run_tracked_job
+from app.services.otp_service import delete_expired_otps
+
+
+def _delete_expired_otps(db, run):
+    run.rows_processed = delete_expired_otps(db)
+
+
+@celery_app.task
+def delete_expired_otps_task():
+    run = run_tracked_job("delete_expired_otps", _delete_expired_otps)
+    if run is None:
+        print("OTP cleanup is already running; skipped")
+        return
+    print(f"Deleted {run.rows_processed} expired OTPs")
+
+
+def _prune_job_runs(db, run):
+    run.rows_processed = prune_job_runs(db)
+
+
+@celery_app.task
+def prune_batch_job_runs_task():
+    run = run_tracked_job("prune_batch_job_runs", _prune_job_runs)
+    if run is None:
+        print("Batch job history pruning is already running; skipped")
+        return
+    print(f"Deleted {run.rows_processed} batch job runs older than the retention period")
@@ -0,0 +1,160 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from celery import group
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.services.batch_job_service import run_tracked_job
+from app.services.recurring_invoice_service import GenerationResult, generate_invoices_from_templates
+
+
+def run_generation_shard(
+    shard_index: int,
+    shard_count: int,
+    today: str,
+    chunk_size: Optional[int] = None,
+    backfill: bool = False,
+) -> Dict[str, Any]:
+    """Generate one merchant shard of a recurring run in its own session.
+
+    Returns the GenerationResult as a JSON-friendly dict so it can travel
+    back from a Celery worker or a pool process.
+    """
+    db = SessionLocal()
+    try:
+        result = generate_invoices_from_templates(
+            db,
+            chunk_size=chunk_size,
+            today=date.fromisoformat(today),
+            shard=(shard_index, shard_count),
+            backfill=backfill,
+        )
+        values = asdict(result)
+        values["last_template_id"] = str(result.last_template_id) if result.last_template_id else None
+        return values
+    finally:
+        db.close()
+
+
+@celery_app.task(ignore_result=False)
+def generate_recurring_invoices_shard(
+    shard_index: int,
+    shard_count: int,
+    today: str,
+    chunk_size: Optional[int] = None,
+    backfill: bool = False,
+):
+    """Celery entry point for one shard; the coordinator sums the results."""
+    result = run_generation_shard(shard_index, shard_count, today, chunk_size, backfill)
+    print(
+        f"Shard {shard_index}/{shard_count}: generated {result['invoices']} invoices "
+        f"from {result['templates']} templates"
+    )
+    return result
+
+
+@dataclass
+class ShardedGeneration:
+    total: GenerationResult
+    shards: List[Tuple[int, GenerationResult]] = field(default_factory=list)
+    failures: List[Tuple[int, Exception]] = field(default_factory=list)
+
+
+def _reset_engine():
+    # Pool processes must not share the parent's database connections
+    engine.dispose(close=False)
+
+
+def generate_sharded(
+    shard_count: int,
+    executor: str,
+    today: date,
+    chunk_size: Optional[int] = None,
+    backfill: bool = False,
+    timeout: float = 3600,
+) -> ShardedGeneration:
+    """Generate all merchant shards in parallel and sum their results.
+
+    ``executor`` is "process" (a local process pool) or "celery" (a group on
+    the generation workers). Failed shards are returned, not raised: the
+    others have committed, and re-running finishes the failed ones.
+    """
+    shard_results = []
+    failures = []
+    started = time.perf_counter()
+
+    if executor == "celery":
+        job = group(
+            generate_recurring_invoices_shard.s(index, shard_count, today.isoformat(), chunk_size, backfill)
+            for index in range(shard_count)
+        ).apply_async()
+        # The shards run on the generation queue, so waiting here from a
+        # maintenance task cannot starve them of workers
+        values = job.get(timeout=timeout, propagate=False, disable_sync_subtasks=False)
+        for index, value in enumerate(values):
+            if isinstance(value, Exception):
+                failures.append((index, value))
+            else:
+                shard_results.append((index, value))
+    else:
+        with ProcessPoolExecutor(max_workers=shard_count, initializer=_reset_engine) as pool:
+            futures = {
+                pool.submit(run_generation_shard, index, shard_count, today.isoformat(), chunk_size, backfill): index
+                for index in range(shard_count)
+            }
+            for future in as_completed(futures):
+                try:
+                    shard_results.append((futures[future], future.result()))
+                except Exception as exc:
+                    failures.append((futures[future], exc))
+
+    run = ShardedGeneration(total=GenerationResult(), failures=sorted(failures, key=lambda failure: failure[0]))
+    for index, values in sorted(shard_results, key=lambda shard: shard[0]):
+        shard = GenerationResult(**{**values, "last_template_id": None})
+        run.total.merge(shard)
+        run.shards.append((index, shard))
+    run.total.elapsed_seconds = time.perf_counter() - started
+    return run
+
+
+def _generate(db, run):
+    today = date.today()
+    # A watermark older than yesterday means scheduled runs were missed;
+    # backfill so every skipped period still gets its invoice
+    backfill = (
+        run.previous_watermark is not None
+        and date.fromisoformat(run.previous_watermark) < today - timedelta(days=1)
+    )
+    shard_count = settings.RECURRING_GENERATION_SHARDS
+    if shard_count > 1:
+        sharded = generate_sharded(shard_count, settings.RECURRING_GENERATION_EXECUTOR, today, backfill=backfill)
+        run.rows_processed = sharded.total.invoices
+        for index, exc in sharded.failures:
+            print(f"Recurring generation shard {index}/{shard_count} failed: {exc}")
+        if sharded.failures:
+            # Recorded as a failed run, so the watermark is not advanced
+            raise RuntimeError(
+                f"{len(sharded.failures)} of {shard_count} shards failed "
+                f"({sharded.total.invoices} invoices were committed)"
+            )
+        result = sharded.total
+    else:
+        result = generate_invoices_from_templates(db, today=today, backfill=backfill)
+    run.rows_processed = result.invoices
+    run.watermark = today.isoformat()
+    print(
+        f"Generated {result.invoices} recurring invoices from {result.templates} templates"
+        + (" (backfill)" if backfill else "")
+    )
+
+
+@celery_app.task
+def generate_recurring_invoices_job():
+    """Daily scheduled generation (Celery beat)."""
+    if run_tracked_job("generate_recurring_invoices", _generate) is None:
+        print("Recurring invoice generation is already running; skipped")
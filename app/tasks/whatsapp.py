@@ -1,8 +1,126 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
 from app.celery_app import celery_app
-import time
+from app.core import tracing
+from app.core.circuit_breaker import CLOSED
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.dead_letter_service import (
+    mark_whatsapp_message,
+    pop_send_attempts,
+    record_dead_letter,
+    record_send_attempt,
+)
+from app.services.provider_guard import (
+    drain_parked_messages,
+    get_provider_breaker,
+    get_provider_rate_limiter,
+    park_message,
+)
+from app.services.send_scheduler import schedule_task
+from app.services.whatsapp_provider import (
+    ProviderThrottledError,
+    ProviderUnavailableError,
+    send_whatsapp_text,
+)
+from app.utils.enums import WhatsAppMessageStatus
+
+
+def _current_queue(task):
+    return (task.request.delivery_info or {}).get("routing_key")
+
+
+def _schedule_drain(countdown: float = 0):
+    drain_parked_whatsapp_messages.apply_async(countdown=countdown)
+
+
+class DeadLetterTask(celery_app.Task):
+    """Task that keeps its failed attempts and dead-letters its final failure."""
+
+    def on_retry(self, exc, task_id, args, kwargs, einfo):
+        record_send_attempt(task_id, exc)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        record_send_attempt(task_id, exc)
+        attempts = pop_send_attempts(task_id)
+        db = SessionLocal()
+        try:
+            record_dead_letter(db, self.name, args, kwargs, _current_queue(self), exc, attempts)
+            db.commit()
+        finally:
+            db.close()
+
+
+def _mark_sent(whatsapp_message_id, provider_message_id):
+    db = SessionLocal()
+    try:
+        mark_whatsapp_message(db, whatsapp_message_id, WhatsAppMessageStatus.SENT, provider_message_id)
+        db.commit()
+    finally:
+        db.close()
+
+
+@celery_app.task(
+    bind=True,
+    base=DeadLetterTask,
+    autoretry_for=(ProviderUnavailableError,),
+    retry_backoff=10,
+    retry_jitter=True,
+    retry_kwargs={'max_retries': 3},
+)
+def send_whatsapp_message(self, phone: str, message: str, whatsapp_message_id: Optional[str] = None):
+    task_kwargs = {"whatsapp_message_id": whatsapp_message_id} if whatsapp_message_id else {}
+
+    breaker = get_provider_breaker()
+    if not breaker.allow_request():
+        # Provider is down: park instead of hammering it; the first parked
+        # message schedules the drain that releases them when it recovers
+        if park_message(self.name, [phone, message], task_kwargs, _current_queue(self)) == 1:
+            _schedule_drain(countdown=settings.WHATSAPP_BREAKER_RESET_TIMEOUT_SECONDS)
+        print(f"Circuit open, parked WhatsApp to {phone}")
+        return
+
+    with tracing.span("whatsapp.rate_limit") as span:
+        acquired = get_provider_rate_limiter().acquire(timeout=settings.WHATSAPP_RATE_LIMIT_MAX_WAIT_SECONDS)
+        span.set_attribute("acquired", acquired)
+    if not acquired:
+        # Cluster-wide quota is exhausted for now; park the send on the Redis
+        # send schedule (not a broker ETA held in worker memory) without
+        # spending a retry
+        schedule_task(
+            self.name,
+            [phone, message],
+            task_kwargs,
+            _current_queue(self),
+            datetime.utcnow() + timedelta(seconds=settings.WHATSAPP_RATE_LIMIT_MAX_WAIT_SECONDS),
+            headers=tracing.message_headers(),
+        )
+        return
 
-@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=10, retry_kwargs={'max_retries': 3})
-def send_whatsapp_message(self, phone: str, message: str):
     print(f"Sending WhatsApp to {phone}")
-    time.sleep(5)  # simulate API call
+    try:
+        provider_message_id = send_whatsapp_text(phone, message)
+    except ProviderThrottledError as exc:
+        breaker.record_failure()
+        raise self.retry(exc=exc, countdown=exc.retry_after or settings.WHATSAPP_RATE_LIMIT_MAX_WAIT_SECONDS)
+    except ProviderUnavailableError:
+        breaker.record_failure()
+        raise
+
+    if breaker.record_success():
+        _schedule_drain()
+    _mark_sent(whatsapp_message_id, provider_message_id)
     print("Message sent")
+
+
+@celery_app.task
+def drain_parked_whatsapp_messages():
+    result = drain_parked_messages()
+    if result.released:
+        print(f"Released {result.released} parked WhatsApp messages (circuit {result.state})")
+
+    # Keep probing until the breaker closes; a successful send that closes it
+    # schedules the drain of everything else
+    if result.remaining and result.state != CLOSED:
+        _schedule_drain(countdown=settings.WHATSAPP_BREAKER_RESET_TIMEOUT_SECONDS)
@@ -28,6 +28,7 @@ class WhatsAppMessageType(str, Enum):
     INVOICE = "invoice"
     FOLLOWUP = "followup"
     CUSTOMER_MESSAGE = "customer_message"
+    DIGEST = "digest"  # Several pending reminders to one customer merged into one message
 
 
 class WhatsAppMessageStatus(str, Enum):
@@ -37,7 +38,34 @@ class WhatsAppMessageStatus(str, Enum):
     READ = "READ"
     FAILED = "FAILED"
     RECEIVED = "RECEIVED"
+    CANCELLED = "CANCELLED"  # Never sent: its invoice was settled while it waited for a digest
 
 
 class RecurringInvoiceFrequency(str, Enum):
     MONTHLY = "MONTHLY"
+
+
+class PaymentIntent(str, Enum):
+    PAID = "paid"
+    WILL_PAY_LATER = "will_pay_later"
+    DISPUTE = "dispute"
+    UNKNOWN = "unknown"
+
+
+class TaskQueue(str, Enum):
+    INTERACTIVE = "interactive"  # User-triggered sends (new invoice, manual follow-up)
+    BULK = "bulk"  # Large fan-outs such as recurring invoice generation
+    MAINTENANCE = "maintenance"  # Housekeeping and background pipelines
+    GENERATION = "generation"  # Shards of a sharded recurring invoice generation run
+
+
+class DeadLetterStatus(str, Enum):
+    PENDING = "PENDING"
+    REPLAYED = "REPLAYED"
+    DISCARDED = "DISCARDED"
+
+
+class BatchJobRunStatus(str, Enum):
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
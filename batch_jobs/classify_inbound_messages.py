@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Batch job to classify the intent of inbound WhatsApp messages.
+
+Messages are classified in micro-batches; a pending payment confirmation is
+created for every message where the customer claims to have paid.
+
+Celery beat runs this every INBOUND_CLASSIFICATION_INTERVAL_SECONDS
+(app.tasks.inbound); the script is for manual runs. Both take the same Redis
+lease, so they never overlap.
+"""
+import sys
+from pathlib import Path
+from datetime import datetime
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.inbound_message_service import classify_inbound_messages
+from batch_jobs.runner import run_batch_job
+
+
+def _classify(db, run, args):
+    result = classify_inbound_messages(db)
+    run.rows_processed = result.classified
+
+    if result.classified > 0:
+        print(
+            f"[{datetime.utcnow().isoformat()}] "
+            f"Classified {result.classified} messages in {result.batches} batches, "
+            f"created {result.confirmations_created} payment confirmations "
+            f"({result.confirmations_matched} matched to invoices)."
+        )
+    else:
+        print(f"[{datetime.utcnow().isoformat()}] No inbound messages to classify.")
+
+
+def main():
+    """Classify pending inbound WhatsApp messages."""
+    return run_batch_job("classify_inbound_messages", "inbound message classification", _classify)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Inspect and replay WhatsApp sends that exhausted their retries.
+
+    python batch_jobs/dead_letters.py list --merchant-id <uuid> --error ProviderUnavailableError
+    python batch_jobs/dead_letters.py show <dead-letter-id>
+    python batch_jobs/dead_letters.py replay --error timeout --batch-size 50 --rate 5
+    python batch_jobs/dead_letters.py discard --merchant-id <uuid>
+
+Replays go back through the outbox in batches, paced to --rate sends per
+second so a large replay does not trip the provider's rate limit or circuit
+breaker again. The original WhatsApp message row is reused.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from datetime import datetime
+from uuid import UUID
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.dead_letter_message import DeadLetterMessage
+from app.services.dead_letter_service import (
+    discard_dead_letters,
+    query_dead_letters,
+    replay_dead_letters,
+)
+from app.utils.enums import DeadLetterStatus
+
+
+def _filters(args):
+    return {
+        "merchant_id": args.merchant_id,
+        "error": args.error,
+        "status": DeadLetterStatus(args.status) if args.status != "ALL" else None,
+        "since": args.since,
+    }
+
+
+def _list(db, args):
+    dead_letters = query_dead_letters(db, **_filters(args)).limit(args.limit).all()
+    for dead_letter in dead_letters:
+        print(
+            f"{dead_letter.id}  {dead_letter.created_at.isoformat()}  {dead_letter.status:<9}  "
+            f"merchant={dead_letter.merchant_id}  attempts={dead_letter.attempt_count}  "
+            f"{dead_letter.error_type}: {(dead_letter.error or '')[:80]}"
+        )
+    print(f"{len(dead_letters)} dead letters")
+    return 0
+
+
+def _show(db, args):
+    dead_letter = db.query(DeadLetterMessage).filter(DeadLetterMessage.id == args.dead_letter_id).first()
+    if dead_letter is None:
+        print(f"Dead letter {args.dead_letter_id} not found", file=sys.stderr)
+        return 1
+
+    print(f"id:                  {dead_letter.id}")
+    print(f"status:              {dead_letter.status} (replayed {dead_letter.replay_count} times)")
+    print(f"merchant_id:         {dead_letter.merchant_id}")
+    print(f"whatsapp_message_id: {dead_letter.whatsapp_message_id}")
+    print(f"task:                {dead_letter.task_name} on {dead_letter.queue}")
+    print(f"args:                {dead_letter.args} {dead_letter.kwargs}")
+    print(f"error:               {dead_letter.error_type}: {dead_letter.error}")
+    print("attempts:")
+    for attempt in dead_letter.attempts:
+        print(f"  {attempt['at']}  {attempt['error_type']}: {attempt['error']}")
+    return 0
+
+
+def _process_in_batches(db, args, action, verb, result_status):
+    # Processed rows must leave the status filter, since each batch re-reads
+    # the head: a filter matching the status they end up in would never end
+    if args.status in (DeadLetterStatus.REPLAYED.value, result_status.value, "ALL"):
+        allowed = [status.value for status in DeadLetterStatus if status not in (DeadLetterStatus.REPLAYED, result_status)]
+        print(f"Only {' or '.join(allowed)} dead letters can be {verb.lower()}", file=sys.stderr)
+        return 1
+
+    processed = 0
+    while args.limit is None or processed < args.limit:
+        size = args.batch_size if args.limit is None else min(args.batch_size, args.limit - processed)
+        batch = query_dead_letters(db, **_filters(args)).limit(size).all()
+        if not batch:
+            break
+
+        processed += action(db, batch)
+        print(f"[{datetime.utcnow().isoformat()}] {verb} {processed} dead letters so far...")
+
+        if args.rate and len(batch) == size:
+            time.sleep(len(batch) / args.rate)
+
+    print(f"[{datetime.utcnow().isoformat()}] {verb} {processed} dead letters.")
+    return 0
+
+
+def main():
+    """Inspect, replay or discard dead-lettered sends."""
+    parser = argparse.ArgumentParser(description="Inspect and replay failed WhatsApp sends.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--merchant-id", type=UUID)
+    filters.add_argument("--error", help="Exception type or a substring of the error message")
+    filters.add_argument("--since", type=datetime.fromisoformat, help="Only dead letters created from this time (UTC)")
+    filters.add_argument(
+        "--status",
+        default=DeadLetterStatus.PENDING.value,
+        choices=[status.value for status in DeadLetterStatus] + ["ALL"],
+    )
+
+    list_parser = subparsers.add_parser("list", parents=[filters], help="List dead letters")
+    list_parser.add_argument("--limit", type=int, default=100)
+
+    show_parser = subparsers.add_parser("show", help="Show one dead letter with its attempt history")
+    show_parser.add_argument("dead_letter_id", type=UUID)
+
+    for name, help_text in (("replay", "Queue dead letters again"), ("discard", "Mark dead letters as handled")):
+        batch_parser = subparsers.add_parser(name, parents=[filters], help=help_text)
+        batch_parser.add_argument("--limit", type=int, default=None, help="Stop after this many")
+        batch_parser.add_argument("--batch-size", type=int, default=settings.DEAD_LETTER_REPLAY_BATCH_SIZE)
+        batch_parser.add_argument(
+            "--rate",
+            type=float,
+            default=settings.DEAD_LETTER_REPLAY_RATE_PER_SECOND,
+            help="Maximum dead letters processed per second (0 for no limit)",
+        )
+
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "list":
+            return _list(db, args)
+        if args.command == "show":
+            return _show(db, args)
+        if args.command == "replay":
+            return _process_in_batches(db, args, replay_dead_letters, "Replayed", DeadLetterStatus.REPLAYED)
+        return _process_in_batches(db, args, discard_dead_letters, "Discarded", DeadLetterStatus.DISCARDED)
+    except Exception as exc:
+        db.rollback()
+        print(
+            f"[{datetime.utcnow().isoformat()}] ERROR: "
+            f"Failed to {args.command} dead letters: {exc}",
+            file=sys.stderr
+        )
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
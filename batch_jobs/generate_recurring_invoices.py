@@ -2,50 +2,139 @@
 """
 Batch job to generate invoices from recurring invoice templates.
 
-This script should be run daily via cron (e.g., at 2 AM):
-    0 2 * * * /path/to/venv/bin/python /path/to/PayPing/batch_jobs/generate_recurring_invoices.py >> /var/log/payping_recurring.log 2>&1
+Templates are processed in chunks that are committed one by one. If the run
+fails, the last committed checkpoint is printed and can be passed to
+--resume-after; simply re-running is also safe.
+
+With --shards N the run is split by merchant into N shards generated in
+parallel, either in a local process pool (--executor process) or on the
+Celery generation workers (--executor celery). Shards lock templates with
+FOR UPDATE SKIP LOCKED, so a template is never generated twice.
+
+With --backfill every period missed since a template's next generation
+date (e.g. after the job did not run for several days) gets its own
+invoice. Invoices are unique per template and period, so the backfill is
+idempotent and can simply be re-run.
+
+Celery beat runs the generation daily at 2 AM (app.tasks.recurring), sharded
+by RECURRING_GENERATION_SHARDS and RECURRING_GENERATION_EXECUTOR, and
+backfills on its own after missed runs; the script is for manual, resumed
+or dry runs. Both take the same Redis lease, so
+they never overlap, and both are recorded in batch_job_runs.
+
+Pass --dry-run (unsharded runs only) to generate inside a transaction that
+is rolled back, e.g. to profile the nightly window against production data:
+the run reports time spent querying, building rows, inserting, enqueueing
+and committing, invoices per second, SQL statements and peak RSS.
 """
+import argparse
 import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from uuid import UUID
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from app.core.database import SessionLocal
-from app.services.recurring_invoice_service import generate_invoices_from_templates
+from app.core.config import settings
+from app.services.recurring_invoice_service import GenerationResult, generate_invoices_from_templates
+from app.tasks.recurring import generate_sharded
+from batch_jobs.runner import run_batch_job
 
 
-def main():
-    """Generate invoices from active recurring invoice templates."""
-    db = SessionLocal()
+def _run_single(db, args):
+    result = GenerationResult()
     try:
-        print(f"[{datetime.utcnow().isoformat()}] Starting recurring invoice generation...")
-        generated = generate_invoices_from_templates(db)
-        
-        if generated:
+        generate_invoices_from_templates(
+            db,
+            chunk_size=args.chunk_size,
+            after_id=args.resume_after,
+            result=result,
+            backfill=args.backfill,
+        )
+        return result
+    except Exception:
+        if result.last_template_id and not args.dry_run:
             print(
                 f"[{datetime.utcnow().isoformat()}] "
-                f"Successfully generated {len(generated)} recurring invoices."
+                f"{result.invoices} invoices were committed; resume with --resume-after {result.last_template_id}",
+                file=sys.stderr
             )
-            for invoice in generated:
-                print(f"  - Invoice ID: {invoice.id}, Number: {invoice.invoice_number or 'N/A'}")
-        else:
-            print(f"[{datetime.utcnow().isoformat()}] No invoices generated (no templates due).")
-        
-        return 0
-    except Exception as exc:
+        raise
+
+
+def _run_sharded(args):
+    """Coordinate a sharded run and sum the shard results."""
+    sharded = generate_sharded(
+        args.shards, args.executor, date.today(), args.chunk_size, args.backfill, timeout=args.timeout
+    )
+    for index, shard in sharded.shards:
         print(
-            f"[{datetime.utcnow().isoformat()}] ERROR: "
-            f"Failed to generate recurring invoices: {exc}",
+            f"[{datetime.utcnow().isoformat()}]   shard {index}: {shard.invoices} invoices "
+            f"from {shard.templates} templates in {shard.elapsed_seconds:.1f}s"
+        )
+
+    for index, exc in sharded.failures:
+        print(
+            f"[{datetime.utcnow().isoformat()}] ERROR: shard {index} failed: {exc}",
             file=sys.stderr
         )
-        return 1
-    finally:
-        db.close()
+    if sharded.failures:
+        raise RuntimeError(
+            f"{len(sharded.failures)} of {args.shards} shards failed; re-run to finish them "
+            f"({sharded.total.invoices} invoices were committed)"
+        )
+    return sharded.total
+
+
+def _generate(db, run, args):
+    if args.backfill:
+        print(f"[{datetime.utcnow().isoformat()}] Backfilling every missed period...")
+    if args.shards > 1:
+        result = _run_sharded(args)
+    else:
+        result = _run_single(db, args)
+    run.rows_processed = result.invoices
+    if not args.resume_after:
+        run.watermark = date.today().isoformat()
+
+    if result.invoices:
+        print(
+            f"[{datetime.utcnow().isoformat()}] "
+            f"Successfully generated {result.invoices} recurring invoices and {result.messages} reminders "
+            f"from {result.templates} templates in {result.chunks} chunks "
+            f"({result.elapsed_seconds:.1f}s, {result.invoices_per_second:.0f} invoices/s)."
+        )
+    else:
+        print(f"[{datetime.utcnow().isoformat()}] No invoices generated (no templates due).")
+    if result.existing:
+        print(
+            f"[{datetime.utcnow().isoformat()}] "
+            f"Skipped {result.existing} periods that already had an invoice."
+        )
+
+
+def main():
+    """Generate invoices from active recurring invoice templates."""
+    parser = argparse.ArgumentParser(description="Generate invoices from due recurring invoice templates.")
+    parser.add_argument("--chunk-size", type=int, default=settings.RECURRING_GENERATION_CHUNK_SIZE)
+    parser.add_argument("--resume-after", type=UUID, help="Template id checkpoint printed by a failed run")
+    parser.add_argument("--shards", type=int, default=settings.RECURRING_GENERATION_SHARDS)
+    parser.add_argument("--executor", choices=["process", "celery"], default=settings.RECURRING_GENERATION_EXECUTOR)
+    parser.add_argument("--backfill", action="store_true", help="Generate every missed period up to today")
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds to wait for Celery shards")
+
+    def check_args(args):
+        if args.resume_after and args.shards > 1:
+            parser.error("--resume-after applies to unsharded runs; re-run sharded jobs without it")
+        if args.dry_run and args.shards > 1:
+            parser.error("--dry-run applies to unsharded runs; shards commit in their own sessions")
+
+    return run_batch_job(
+        "generate_recurring_invoices", "recurring invoice generation", _generate, parser, check_args
+    )
 
 
 if __name__ == "__main__":
     sys.exit(main())
-
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Batch job to match pending payment confirmations to open invoices.
+
+Re-runs the matching engine over every pending confirmation that has no
+invoice or was matched automatically before. Invoices are ranked by customer,
+amount mentioned in the message and recency.
+
+Celery beat runs this daily at 4 AM (app.tasks.inbound); the script is for
+manual runs. Both take the same Redis lease, so they never overlap.
+"""
+import sys
+from pathlib import Path
+from datetime import datetime
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.payment_matching_service import match_pending_confirmations
+from batch_jobs.runner import run_batch_job
+
+
+def _match(db, run, args):
+    result = match_pending_confirmations(db)
+    run.rows_processed = result.processed
+
+    if result.processed > 0:
+        print(
+            f"[{datetime.utcnow().isoformat()}] "
+            f"Matched {result.matched} of {result.processed} pending confirmations."
+        )
+    else:
+        print(f"[{datetime.utcnow().isoformat()}] No pending confirmations to match.")
+
+
+def main():
+    """Match pending payment confirmations to open invoices."""
+    return run_batch_job("match_payment_confirmations", "payment confirmation matching", _match)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Outbox relay: publishes queued Celery tasks from the outbox table to the broker.
+
+Runs continuously. Rows are claimed in batches with FOR UPDATE SKIP LOCKED,
+so several relays can run at once to scale out:
+    docker-compose up -d --scale outbox-relay=3
+
+Reminders waiting to be merged into per-customer digests are coalesced
+before each batch.
+
+Pass --once to drain the outbox and exit.
+"""
+import argparse
+import signal
+import sys
+import time
+from pathlib import Path
+from datetime import datetime
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core import tracing
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.digest_service import coalesce_due_messages
+from app.services.outbox_service import relay_outbox_batch
+
+
+_running = True
+
+
+def _stop(signum, frame):
+    global _running
+    _running = False
+
+
+def main():
+    """Publish outbox rows to the broker until stopped."""
+    parser = argparse.ArgumentParser(description="Publish outbox rows to the Celery broker.")
+    parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit")
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    tracing.configure("payping-outbox-relay")
+    print(f"[{datetime.utcnow().isoformat()}] Starting outbox relay...")
+
+    db = SessionLocal()
+    try:
+        while _running:
+            try:
+                coalesced = coalesce_due_messages(db)
+                if coalesced.digests:
+                    print(
+                        f"[{datetime.utcnow().isoformat()}] "
+                        f"Merged {coalesced.merged} reminders into {coalesced.digests} digests."
+                    )
+                if coalesced.cancelled:
+                    print(
+                        f"[{datetime.utcnow().isoformat()}] "
+                        f"Cancelled {coalesced.cancelled} reminders of invoices settled while they waited."
+                    )
+                result = relay_outbox_batch(db, args.batch_size)
+            except Exception as exc:
+                db.rollback()
+                print(
+                    f"[{datetime.utcnow().isoformat()}] ERROR: "
+                    f"Failed to relay outbox batch: {exc}",
+                    file=sys.stderr
+                )
+                time.sleep(settings.OUTBOX_RETRY_DELAY_SECONDS)
+                continue
+
+            if result.claimed:
+                print(
+                    f"[{datetime.utcnow().isoformat()}] "
+                    f"Published {result.published} tasks, {result.failed} failed, "
+                    f"{result.deferred} deferred (queue full), "
+                    f"{result.scheduled} scheduled for later."
+                )
+
+            # A full batch means more rows are likely waiting
+            if result.claimed < args.batch_size or result.failed or result.deferred:
+                if args.once:
+                    break
+                time.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Shared command line runner for the batch_jobs scripts.
+
+Every job gets:
+
+    --dry-run   run the job against the real data inside one transaction that
+                is rolled back at the end; nothing is written, sent or recorded
+                in batch_job_runs
+
+and a profile after each run: wall time per phase (the phases a job marks
+with app.core.profiling.profile_phase, e.g. query, build, insert, enqueue,
+commit), rows/sec, SQL statement count and time, and peak RSS.
+
+Real runs hold the job's Redis lease and are recorded in batch_job_runs (see
+app.services.batch_job_service.tracked_job_run); a run that finds the lease
+held exits cleanly.
+"""
+import argparse
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, rollback_only_session
+from app.core.locks import LockNotAcquiredError
+from app.core.profiling import JobProfile, profile_job
+from app.services.batch_job_service import JobRun, last_watermark, tracked_job_run
+
+
+Job = Callable[[Session, JobRun, argparse.Namespace], None]
+
+
+def _log(message: str, file=None) -> None:
+    print(f"[{datetime.utcnow().isoformat()}] {message}", file=file)
+
+
+@contextmanager
+def _job_session(job_name: str, dry_run: bool) -> Iterator[Tuple[Session, JobRun]]:
+    if dry_run:
+        with rollback_only_session() as db:
+            yield db, JobRun(name=job_name, previous_watermark=last_watermark(db, job_name))
+        return
+
+    with tracked_job_run(job_name) as run:
+        db = SessionLocal()
+        try:
+            yield db, run
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def print_profile(profile: JobProfile, rows: int) -> None:
+    elapsed = profile.elapsed_seconds
+    rate = rows / elapsed if elapsed else 0.0
+    _log(
+        f"Profile: {elapsed:.2f}s, {rows} rows ({rate:.0f} rows/s), "
+        f"{profile.sql.statements} SQL statements ({profile.sql.seconds:.2f}s), "
+        f"peak RSS {profile.peak_rss_bytes / (1024 * 1024):.1f} MiB"
+    )
+    phases = sorted(profile.phases.items(), key=lambda item: item[1], reverse=True)
+    phases.append(("other", profile.unaccounted_seconds))
+    for name, seconds in phases:
+        share = seconds / elapsed * 100 if elapsed else 0.0
+        _log(f"  {name:<8} {seconds:8.2f}s {share:5.1f}%")
+
+
+def run_batch_job(
+    job_name: str,
+    title: str,
+    job: Job,
+    parser: Optional[argparse.ArgumentParser] = None,
+    check_args: Optional[Callable[[argparse.Namespace], None]] = None,
+) -> int:
+    """Parse arguments, run ``job(db, run, args)`` and report; returns the exit code.
+
+    ``title`` names the job in log lines ("OTP cleanup"). The job prints its
+    own results and sets ``run.rows_processed`` (and ``run.watermark``).
+    ``check_args`` can reject argument combinations (parser.error) before
+    anything runs.
+    """
+    if parser is None:
+        parser = argparse.ArgumentParser(description=f"Run {title}.")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Run inside a transaction that is rolled back; nothing is written or sent",
+    )
+    args = parser.parse_args()
+    if check_args is not None:
+        check_args(args)
+
+    try:
+        _log(f"Starting {title}{' (dry run)' if args.dry_run else ''}...")
+        with profile_job() as profile:
+            with _job_session(job_name, args.dry_run) as (db, run):
+                job(db, run, args)
+        print_profile(profile, run.rows_processed)
+        if args.dry_run:
+            _log("Dry run: all changes were rolled back.")
+        return 0
+    except LockNotAcquiredError:
+        _log(f"{title} is already running; skipping.")
+        return 0
+    except Exception as exc:
+        _log(f"ERROR: {title} failed: {exc}", file=sys.stderr)
+        return 1
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Scheduled send poller: moves due delayed sends onto their Celery queues.
+
+Delayed sends (quiet hours, send_at) wait in a Redis sorted set scored by
+due time instead of as ETA tasks in worker memory. This loop pops due items
+atomically in batches, so several pollers can run at once.
+
+Pass --once to release everything currently due and exit.
+"""
+import argparse
+import signal
+import sys
+import time
+from pathlib import Path
+from datetime import datetime
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core import tracing
+from app.core.config import settings
+from app.services.send_scheduler import release_due_tasks
+
+
+_running = True
+
+
+def _stop(signum, frame):
+    global _running
+    _running = False
+
+
+def main():
+    """Release due scheduled sends until stopped."""
+    parser = argparse.ArgumentParser(description="Move due scheduled sends onto their Celery queues.")
+    parser.add_argument("--once", action="store_true", help="Release everything due and exit")
+    parser.add_argument("--batch-size", type=int, default=settings.SCHEDULED_SEND_BATCH_SIZE)
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    tracing.configure("payping-scheduled-send-poller")
+    print(f"[{datetime.utcnow().isoformat()}] Starting scheduled send poller...")
+
+    while _running:
+        try:
+            result = release_due_tasks(args.batch_size)
+        except Exception as exc:
+            print(
+                f"[{datetime.utcnow().isoformat()}] ERROR: "
+                f"Failed to release scheduled sends: {exc}",
+                file=sys.stderr
+            )
+            time.sleep(settings.OUTBOX_RETRY_DELAY_SECONDS)
+            continue
+
+        if result.released or result.failed:
+            print(
+                f"[{datetime.utcnow().isoformat()}] "
+                f"Released {result.released} scheduled sends, {result.failed} failed."
+            )
+
+        # A full batch means more items are likely due
+        if result.released + result.failed < args.batch_size or result.failed:
+            if args.once:
+                break
+            time.sleep(settings.SCHEDULED_SEND_POLL_INTERVAL_SECONDS)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Summarize the slow query log (SLOW_QUERY_LOG_PATH).
+
+    python batch_jobs/slow_queries.py summary --top 20 --since 2026-01-01T00:00
+    python batch_jobs/slow_queries.py show <fingerprint>
+
+Statements are grouped by fingerprint (the statement with its parameters
+normalized) and ranked by total time spent. Fingerprints with a captured
+EXPLAIN (ANALYZE, BUFFERS) plan are flagged when the plan scans a whole
+table, the usual sign of a missing index.
+"""
+import argparse
+import json
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+
+
+@dataclass
+class FingerprintStats:
+    fingerprint: str
+    statement: str
+    durations: List[float] = field(default_factory=list)
+    routes: Counter = field(default_factory=Counter)
+    merchants: set = field(default_factory=set)
+    plans: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.durations)
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _read(path: str, since: Optional[datetime]) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as store:
+        for line in store:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash
+            if since is None or datetime.fromisoformat(record["at"]) >= since:
+                yield record
+
+
+def _group(records) -> Dict[str, FingerprintStats]:
+    stats: Dict[str, FingerprintStats] = {}
+    for record in records:
+        entry = stats.setdefault(
+            record["fingerprint"], FingerprintStats(record["fingerprint"], record["statement"])
+        )
+        entry.durations.append(record["duration_ms"])
+        entry.routes[record.get("route") or "(no request)"] += 1
+        if record.get("merchant_id"):
+            entry.merchants.add(record["merchant_id"])
+        if record.get("plan"):
+            entry.plans.append(record["plan"])
+    return stats
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _seq_scans(plans: List[Dict[str, Any]]) -> List[str]:
+    return sorted({
+        node["Relation Name"]
+        for plan in plans
+        for node in _nodes(plan["Plan"])
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name")
+    })
+
+
+def _summary(stats: Dict[str, FingerprintStats], args) -> int:
+    ranked = sorted(stats.values(), key=lambda entry: entry.total_ms, reverse=True)[: args.top]
+    if not ranked:
+        print("No slow queries logged.")
+        return 0
+
+    print(f"{'fingerprint':<12}  {'count':>6}  {'total ms':>10}  {'p50':>8}  {'p95':>8}  {'max':>8}  top route / statement")
+    for entry in ranked:
+        route, _ = entry.routes.most_common(1)[0]
+        print(
+            f"{entry.fingerprint:<12}  {len(entry.durations):>6}  {entry.total_ms:>10.0f}  "
+            f"{entry.percentile(0.5):>8.0f}  {entry.percentile(0.95):>8.0f}  {max(entry.durations):>8.0f}  {route}"
+        )
+        print(f"{'':<12}  {' '.join(entry.statement.split())[:110]}")
+        seq_scans = _seq_scans(entry.plans)
+        if seq_scans:
+            print(f"{'':<12}  ! sequential scan on {', '.join(seq_scans)} ({len(entry.plans)} plans captured)")
+    return 0
+
+
+def _print_plan(node: Dict[str, Any], depth: int = 0) -> None:
+    relation = f" on {node['Relation Name']}" if node.get("Relation Name") else ""
+    index = f" using {node['Index Name']}" if node.get("Index Name") else ""
+    buffers = node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+    print(
+        f"{'  ' * depth}-> {node['Node Type']}{relation}{index}  "
+        f"(actual {node.get('Actual Total Time', 0):.1f} ms, rows {node.get('Actual Rows', 0)}, "
+        f"buffers {buffers})"
+    )
+    if node.get("Filter"):
+        print(f"{'  ' * depth}   filter: {node['Filter']}")
+    for child in node.get("Plans", []):
+        _print_plan(child, depth + 1)
+
+
+def _show(stats: Dict[str, FingerprintStats], args) -> int:
+    entry = stats.get(args.fingerprint)
+    if entry is None:
+        print(f"Fingerprint {args.fingerprint} not found", file=sys.stderr)
+        return 1
+
+    print(f"fingerprint: {entry.fingerprint}")
+    print(f"executions:  {len(entry.durations)} ({entry.total_ms:.0f} ms total, max {max(entry.durations):.0f} ms)")
+    print(f"merchants:   {len(entry.merchants)}")
+    print("routes:")
+    for route, count in entry.routes.most_common():
+        print(f"  {count:>6}  {route}")
+    print(f"statement:\n  {entry.statement}")
+    if entry.plans:
+        plan = max(entry.plans, key=lambda captured: captured.get("Execution Time", 0))
+        print(f"slowest captured plan ({plan.get('Execution Time', 0):.1f} ms):")
+        _print_plan(plan["Plan"], 1)
+    else:
+        print("No plan captured (raise SLOW_QUERY_EXPLAIN_SAMPLE_RATE to sample EXPLAIN ANALYZE).")
+    return 0
+
+
+def main():
+    """Summarize the slow query log by fingerprint."""
+    parser = argparse.ArgumentParser(description="Summarize logged slow queries.")
+    parser.add_argument("--path", default=settings.SLOW_QUERY_LOG_PATH)
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only queries logged from this time (UTC)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = subparsers.add_parser("summary", help="Worst fingerprints by total time")
+    summary_parser.add_argument("--top", type=int, default=20)
+
+    show_parser = subparsers.add_parser("show", help="One fingerprint with its routes and slowest plan")
+    show_parser.add_argument("fingerprint")
+
+    args = parser.parse_args()
+
+    try:
+        stats = _group(_read(args.path, args.since))
+    except FileNotFoundError:
+        print(f"No slow query log at {args.path}", file=sys.stderr)
+        return 1
+
+    if args.command == "summary":
+        return _summary(stats, args)
+    return _show(stats, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+Break down traced latency by stage, from the file exporter (TRACING_FILE_PATH).
+
+    python batch_jobs/traces.py stages --through whatsapp.provider.send
+    python batch_jobs/traces.py show <trace_id> --no-db
+
+``stages`` aggregates spans by name (the request, outbox wait and publish,
+Celery queue wait, the task, rate limiting, the provider call, db.query),
+so it shows which stage a notification's latency goes to. With --through
+only traces that reached the given span are counted, e.g. those that
+actually called the provider. ``show`` prints one trace as a waterfall.
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+
+
+@dataclass
+class StageStats:
+    name: str
+    durations: List[float] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.durations)
+
+    def percentile(self, fraction: float) -> float:
+        return _percentile(self.durations, fraction)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _read(path: str, since: Optional[datetime]) -> Iterator[Dict[str, Any]]:
+    since_ts = since.replace(tzinfo=timezone.utc).timestamp() if since else None
+    with open(path, encoding="utf-8") as store:
+        for line in store:
+            try:
+                span = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash
+            if since_ts is None or span["start_time"] >= since_ts:
+                yield span
+
+
+def _by_trace(spans) -> Dict[str, List[Dict[str, Any]]]:
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        traces.setdefault(span["trace_id"], []).append(span)
+    return traces
+
+
+def _stages(traces: Dict[str, List[Dict[str, Any]]], args) -> int:
+    if args.through:
+        traces = {
+            trace_id: spans for trace_id, spans in traces.items()
+            if any(span["name"] == args.through for span in spans)
+        }
+    if not traces:
+        print("No traces found.")
+        return 0
+
+    stats: Dict[str, StageStats] = {}
+    end_to_end: List[float] = []
+    for spans in traces.values():
+        for span in spans:
+            stats.setdefault(span["name"], StageStats(span["name"])).durations.append(span["duration_ms"])
+        started = min(span["start_time"] for span in spans)
+        finished = max(span["end_time"] for span in spans)
+        end_to_end.append((finished - started) * 1000)
+
+    print(
+        f"{len(traces)} traces, end to end p50 {_percentile(end_to_end, 0.5):.0f} ms, "
+        f"p95 {_percentile(end_to_end, 0.95):.0f} ms, max {max(end_to_end):.0f} ms"
+    )
+    print(f"{'stage':<40}  {'count':>7}  {'total ms':>10}  {'p50':>8}  {'p95':>8}  {'max':>8}")
+    for entry in sorted(stats.values(), key=lambda entry: entry.total_ms, reverse=True):
+        print(
+            f"{entry.name[:40]:<40}  {len(entry.durations):>7}  {entry.total_ms:>10.0f}  "
+            f"{entry.percentile(0.5):>8.1f}  {entry.percentile(0.95):>8.1f}  {max(entry.durations):>8.1f}"
+        )
+    return 0
+
+
+def _print_tree(span, children, trace_start: float, hide_db: bool, depth: int = 0) -> None:
+    if not (hide_db and span["name"] == "db.query"):
+        offset_ms = (span["start_time"] - trace_start) * 1000
+        attributes = " ".join(
+            f"{key}={value}" for key, value in span["attributes"].items() if key != "statement"
+        )
+        error = f"  ERROR {span['error']}" if span.get("error") else ""
+        print(
+            f"{offset_ms:>10.1f}  {span['duration_ms']:>10.1f}  {span['service']:<24}  "
+            f"{'  ' * depth}{span['name']}  {attributes}{error}"
+        )
+        if span["name"] == "db.query":
+            print(f"{'':>48}{'  ' * depth}  {span['attributes'].get('statement', '')[:100]}")
+    for child in children.get(span["span_id"], []):
+        _print_tree(child, children, trace_start, hide_db, depth + 1)
+
+
+def _show(traces: Dict[str, List[Dict[str, Any]]], args) -> int:
+    spans = traces.get(args.trace_id)
+    if not spans:
+        print(f"Trace {args.trace_id} not found", file=sys.stderr)
+        return 1
+
+    span_ids = {span["span_id"] for span in spans}
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    roots = []
+    for span in sorted(spans, key=lambda span: span["start_time"]):
+        if span["parent_id"] in span_ids:
+            children.setdefault(span["parent_id"], []).append(span)
+        else:
+            # The trace root, or a span whose parent was not exported (other file, sampled out)
+            roots.append(span)
+
+    trace_start = min(span["start_time"] for span in spans)
+    print(f"{'start ms':>10}  {'dur ms':>10}  {'service':<24}  span")
+    for root in roots:
+        _print_tree(root, children, trace_start, args.no_db)
+    return 0
+
+
+def main():
+    """Break down exported spans by stage or show one trace."""
+    parser = argparse.ArgumentParser(description="Attribute traced latency to stages.")
+    parser.add_argument("--path", default=settings.TRACING_FILE_PATH)
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only spans started from this time (UTC)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stages_parser = subparsers.add_parser("stages", help="Latency per stage across traces")
+    stages_parser.add_argument("--through", help="Only traces containing a span with this name")
+
+    show_parser = subparsers.add_parser("show", help="One trace as a waterfall")
+    show_parser.add_argument("trace_id")
+    show_parser.add_argument("--no-db", action="store_true", help="Hide db.query spans")
+
+    args = parser.parse_args()
+
+    try:
+        traces = _by_trace(_read(args.path, args.since))
+    except FileNotFoundError:
+        print(f"No trace file at {args.path}", file=sys.stderr)
+        return 1
+
+    if args.command == "stages":
+        return _stages(traces, args)
+    return _show(traces, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
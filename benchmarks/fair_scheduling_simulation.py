@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Simulate outbound message dispatch with skewed tenant sizes.
+
+Compares a single FIFO queue (every send goes straight to the broker) with
+the outbox relay's per-merchant fair scheduling (backlog held in the outbox,
+interleaved by plan weight, broker queue kept short). Reports queue latency
+per tenant group in simulated seconds.
+
+    python benchmarks/fair_scheduling_simulation.py --big-tenant 10000 --small-tenants 30
+"""
+import argparse
+import random
+import sys
+from collections import deque
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.services.fair_scheduler import fair_share_order, plan_weight
+
+
+def build_workload(args):
+    """Return (tenant -> plan, list of (arrival_second, tenant))."""
+    rng = random.Random(args.seed)
+    plans = {"big": "pro", "medium": "starter"}
+    arrivals = [(0, "big")] * args.big_tenant
+    arrivals += [(rng.randint(0, 60), "medium") for _ in range(args.medium_tenant)]
+    for index in range(args.small_tenants):
+        tenant = f"small-{index}"
+        plans[tenant] = "trial"
+        start = rng.randint(0, args.arrival_window)
+        arrivals += [(start + rng.randint(0, 5), tenant) for _ in range(rng.randint(1, 20))]
+    arrivals.sort(key=lambda item: item[0])
+    return plans, arrivals
+
+
+def simulate(plans, arrivals, args, fair: bool):
+    pending = {}  # tenant -> deque of arrival seconds (the outbox)
+    broker = deque()  # (arrival, tenant)
+    latencies = {}
+    weights = {tenant: plan_weight(plan) for tenant, plan in plans.items()}
+    next_arrival = 0
+    now = 0
+
+    while next_arrival < len(arrivals) or broker or any(pending.values()):
+        while next_arrival < len(arrivals) and arrivals[next_arrival][0] <= now:
+            arrival, tenant = arrivals[next_arrival]
+            if fair:
+                pending.setdefault(tenant, deque()).append(arrival)
+            else:
+                broker.append((arrival, tenant))
+            next_arrival += 1
+
+        if fair:
+            # One relay pass: take a quantum per tenant, oldest heads first,
+            # order by weighted fair share and fill the free broker slots
+            capacity = args.max_queue_depth - len(broker)
+            heads = {
+                tenant: [(queue[i], tenant) for i in range(min(len(queue), args.quantum * weights[tenant]))]
+                for tenant, queue in sorted(pending.items(), key=lambda item: item[1][0] if item[1] else float("inf"))
+                if queue
+            }
+            for arrival, tenant in fair_share_order(heads, weights)[:max(capacity, 0)]:
+                pending[tenant].popleft()
+                broker.append((arrival, tenant))
+
+        for _ in range(min(args.throughput, len(broker))):
+            arrival, tenant = broker.popleft()
+            latencies.setdefault(tenant, []).append(now - arrival)
+
+        now += 1
+
+    return latencies, now
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(name, latencies, duration):
+    print(f"\n{name} (drained in {duration}s)")
+    print(f"  {'tenant group':<14}{'msgs':>8}{'p50':>8}{'p95':>8}{'max':>8}")
+    groups = {
+        "big (pro)": latencies.get("big", []),
+        "medium": latencies.get("medium", []),
+        "small (trial)": [value for tenant, values in latencies.items() if tenant.startswith("small-") for value in values],
+    }
+    for group, values in groups.items():
+        if values:
+            print(
+                f"  {group:<14}{len(values):>8}{percentile(values, 0.5):>7}s"
+                f"{percentile(values, 0.95):>7}s{max(values):>7}s"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--big-tenant", type=int, default=10000, help="Messages from one pro merchant at t=0")
+    parser.add_argument("--medium-tenant", type=int, default=1000, help="Messages from one starter merchant")
+    parser.add_argument("--small-tenants", type=int, default=30, help="Trial merchants sending a few messages")
+    parser.add_argument("--arrival-window", type=int, default=300, help="Seconds over which small tenants arrive")
+    parser.add_argument("--throughput", type=int, default=20, help="Messages workers send per second")
+    parser.add_argument("--max-queue-depth", type=int, default=settings.FAIR_SHARE_MAX_QUEUE_DEPTH)
+    parser.add_argument("--quantum", type=int, default=settings.FAIR_SHARE_QUANTUM)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    plans, arrivals = build_workload(args)
+    print(f"Messages: {len(arrivals)}, worker throughput: {args.throughput}/s, broker depth: {args.max_queue_depth}")
+
+    report("FIFO", *simulate(plans, arrivals, args, fair=False))
+    report("Fair share", *simulate(plans, arrivals, args, fair=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Benchmark the vectorized recurring revenue forecast.
+
+Generates synthetic templates (month-end days, overdue and future next
+generation dates, some with end dates), checks the vectorized projection
+against a month-by-month loop over calculate_next_generation_date on a
+sample, and reports compute time for the full set. No database is needed.
+
+    python benchmarks/recurring_forecast_benchmark.py --templates 100000 --months 24
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.services.recurring_forecast_service import TemplateColumns, forecast_monthly_revenue
+from app.services.recurring_invoice_service import (
+    calculate_initial_next_generation_date,
+    calculate_next_generation_date,
+)
+
+
+def generate_templates(count: int, today: date, seed: int):
+    rng = random.Random(seed)
+    templates = []
+    for _ in range(count):
+        day_of_month = rng.choice([1, 5, 10, 15, 28, 29, 30, 31])
+        start = today + timedelta(days=rng.randint(-90, 200))
+        end_date = start + timedelta(days=rng.randint(30, 900)) if rng.random() < 0.3 else None
+        templates.append((
+            calculate_initial_next_generation_date(start, day_of_month),
+            day_of_month,
+            Decimal(rng.randint(50000, 5000000)) / 100,
+            end_date,
+        ))
+    return templates
+
+
+def to_columns(templates) -> TemplateColumns:
+    next_dates, days, amounts, end_dates = zip(*templates)
+    return TemplateColumns(
+        next_generation_dates=np.array(next_dates, dtype="datetime64[D]"),
+        days_of_month=np.array(days, dtype=np.int64),
+        amounts_paise=np.array([int(amount * 100) for amount in amounts], dtype=np.int64),
+        end_dates=np.array([d if d is not None else "NaT" for d in end_dates], dtype="datetime64[D]"),
+    )
+
+
+def loop_forecast(templates, today: date, months: int):
+    """Reference implementation: step every template one month at a time."""
+    month_index = lambda d: d.year * 12 + d.month - 1
+    first = month_index(today)
+    counts = [0] * months
+    totals = [Decimal("0")] * months
+    for next_date, day_of_month, amount, end_date in templates:
+        period = max(next_date, today)
+        while month_index(period) < first + months:
+            if end_date and period > end_date:
+                break
+            counts[month_index(period) - first] += 1
+            totals[month_index(period) - first] += amount
+            period = calculate_next_generation_date(period, day_of_month)
+    return counts, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--templates", type=int, default=100000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--check", type=int, default=5000, help="Templates verified against the loop implementation")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    today = date.today()
+    templates = generate_templates(args.templates, today, args.seed)
+
+    sample = templates[:args.check]
+    counts, totals = loop_forecast(sample, today, args.months)
+    forecast = forecast_monthly_revenue(to_columns(sample), today, args.months)
+    mismatches = [
+        month.month for month, count, total in zip(forecast, counts, totals)
+        if month.invoice_count != count or month.projected_amount != total
+    ]
+    if mismatches:
+        print(f"MISMATCH against loop implementation in months: {mismatches}", file=sys.stderr)
+        return 1
+    print(f"Verified {len(sample)} templates x {args.months} months against the loop implementation")
+
+    start = time.perf_counter()
+    loop_forecast(sample, today, args.months)
+    loop_seconds = (time.perf_counter() - start) * len(templates) / len(sample)
+
+    columns = to_columns(templates)
+    start = time.perf_counter()
+    forecast = forecast_monthly_revenue(columns, today, args.months)
+    vector_seconds = time.perf_counter() - start
+
+    print(f"Templates: {len(templates)}, months: {args.months}")
+    print(f"  loop (extrapolated): {loop_seconds * 1000:>10,.1f} ms")
+    print(f"  vectorized:          {vector_seconds * 1000:>10,.1f} ms")
+    print(f"  projected total:     ₹{sum(month.projected_amount for month in forecast):,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+"""
+Replay captured production traffic against a staging instance.
+
+The API writes anonymized request metadata when REQUEST_CAPTURE_ENABLED is
+set (app/core/request_capture.py). ``summary`` shows the shape of a capture:
+requests per route, how they spread over merchants and the latency they
+had in production. ``run`` replays it against a target at --speed times
+the recorded rate (1x to 10x), preserving the order and spacing of the
+requests:
+
+    python benchmarks/replay_traffic.py summary --captures request_captures/
+    python benchmarks/load_test.py seed --merchants 20
+    python benchmarks/replay_traffic.py run --captures request_captures/ --target http://staging:8000 --speed 5
+
+Captured merchants are mapped onto the staging merchants with the
+--merchant-prefix phone prefix (the load test's seeded merchants by
+default, or 7 for benchmarks/synthetic_data.py), busiest onto largest.
+Each one logs in through OTP with the code read from the staging database,
+so DATABASE_URL must point at it. Path and query parameters are filled from
+that merchant's real ids, and dates are rebuilt relative to today.
+
+Only reads (GET) are replayed: write bodies are captured as shapes only,
+and replaying them would change staging data. Skipped writes are counted
+per route. The report compares replayed latency with the captured latency
+per route, and shows how far requests started behind schedule. A growing
+lag means the replayer or the target could not keep up with the rate.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.merchant import Merchant
+from app.models.payment_confirmation import PaymentConfirmation
+from app.models.recurring_invoice import RecurringInvoice
+from load_test import PHONE_PREFIX, latest_otp_code, percentile
+
+
+# Where the ids for each path or query parameter name come from
+ID_SOURCES = {
+    "invoice_id": Invoice,
+    "customer_id": Customer,
+    "template_id": RecurringInvoice,
+    "confirmation_id": PaymentConfirmation,
+}
+_DATE_OFFSET = re.compile(r"^<date:([+-]\d+)>$")
+
+
+@dataclass
+class StagingMerchant:
+    phone: str
+    ids: Dict[str, List[str]]  # Parameter name -> ids owned by the merchant
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return sum(len(ids) for ids in self.ids.values())
+
+
+def read_captures(directory: str, since: Optional[datetime], until: Optional[datetime]) -> List[Dict[str, Any]]:
+    """All capture records in the directory (rotated files included), oldest first."""
+    since_ts = since.replace(tzinfo=timezone.utc).timestamp() if since else None
+    until_ts = until.replace(tzinfo=timezone.utc).timestamp() if until else None
+    records = []
+    for path in glob.glob(os.path.join(directory, "requests-*.jsonl*")):
+        with open(path, encoding="utf-8") as capture:
+            for line in capture:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by a crash
+                if since_ts is not None and record["ts"] < since_ts:
+                    continue
+                if until_ts is not None and record["ts"] >= until_ts:
+                    continue
+                records.append(record)
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def _endpoint(record: Dict[str, Any]) -> str:
+    return f"{record['method']} {record['route']}"
+
+
+def summary(records: List[Dict[str, Any]]) -> int:
+    seconds = max(records[-1]["ts"] - records[0]["ts"], 1.0)
+    sample_rate = min(record.get("sample_rate", 1.0) for record in records)
+    merchants = {record["merchant"] for record in records if record["merchant"]}
+    started = datetime.utcfromtimestamp(records[0]["ts"]).isoformat(timespec="seconds")
+    print(
+        f"{len(records)} requests over {seconds / 60:.1f} min from {started} UTC "
+        f"({len(records) / seconds:.1f}/s captured, sample rate {sample_rate:g}), {len(merchants)} merchants"
+    )
+
+    by_endpoint: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        by_endpoint[_endpoint(record)].append(record)
+
+    print(f"{'endpoint':<60}  {'requests':>8}  {'share':>6}  {'merchants':>9}  {'per merchant':>12}  {'p50':>7}  {'p95':>7}")
+    for endpoint, calls in sorted(by_endpoint.items(), key=lambda item: len(item[1]), reverse=True):
+        callers = Counter(record["merchant"] for record in calls if record["merchant"])
+        durations = sorted(record["duration_ms"] for record in calls)
+        per_merchant = f"{sum(callers.values()) / len(callers):.1f}" if callers else "-"
+        print(
+            f"{endpoint[:60]:<60}  {len(calls):>8}  {len(calls) / len(records):>6.1%}  {len(callers):>9}  "
+            f"{per_merchant:>12}  {percentile(durations, 0.5):>7.1f}  {percentile(durations, 0.95):>7.1f}"
+        )
+
+    busiest = Counter(record["merchant"] for record in records if record["merchant"]).most_common()
+    if busiest:
+        top = max(1, len(busiest) // 10)
+        share = sum(count for _, count in busiest[:top]) / sum(count for _, count in busiest)
+        print(f"The busiest 10% of merchants ({top}) sent {share:.0%} of the authenticated requests.")
+    return 0
+
+
+def load_staging_merchants(phone_prefix: str, sample: int) -> List[StagingMerchant]:
+    db = SessionLocal()
+    try:
+        merchants = db.query(Merchant.id, Merchant.phone).filter(
+            Merchant.phone.like(f"{phone_prefix}%")
+        ).order_by(Merchant.phone).all()
+        staging = []
+        for merchant_id, phone in merchants:
+            ids = {}
+            for name, model in ID_SOURCES.items():
+                query = db.query(model.id).filter(model.merchant_id == merchant_id)
+                if model is Invoice:
+                    query = query.filter(Invoice.deleted_at.is_(None))
+                ids[name] = [str(row.id) for row in query.limit(sample)]
+            staging.append(StagingMerchant(phone, ids))
+        # Largest first, so the busiest captured merchants land on them
+        staging.sort(key=lambda merchant: merchant.size, reverse=True)
+        return staging
+    finally:
+        db.close()
+
+
+def _fill(name: str, value: Any, merchant: StagingMerchant, rng: random.Random) -> Optional[str]:
+    """A concrete value for a captured parameter shape, or None to leave it out."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(value).lower()
+    if not isinstance(value, str):
+        return str(value)
+    if not value.startswith("<"):
+        return value
+    if value == "<uuid>":
+        ids = merchant.ids.get(name)
+        return rng.choice(ids) if ids else None
+    offset = _DATE_OFFSET.match(value)
+    if offset:
+        return (date.today() + timedelta(days=int(offset.group(1)))).isoformat()
+    if value == "<datetime>":
+        return datetime.utcnow().isoformat(timespec="seconds")
+    if value in ("<int>", "<number>"):
+        return "1"
+    return None  # Free text (<str>) cannot be reconstructed
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    captured_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    skipped: int = 0
+
+
+async def _login(client: httpx.AsyncClient, merchant: StagingMerchant) -> None:
+    response = await client.post("/api/v1/auth/send-otp", json={"phone": merchant.phone})
+    response.raise_for_status()
+    code = await asyncio.to_thread(latest_otp_code, merchant.phone)
+    response = await client.post("/api/v1/auth/verify-otp", json={"phone": merchant.phone, "otp_code": code})
+    response.raise_for_status()
+    merchant.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def replay(args, records: List[Dict[str, Any]], staging: List[StagingMerchant]) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    busiest = [merchant for merchant, _ in Counter(r["merchant"] for r in records if r["merchant"]).most_common()]
+    mapping = {captured: staging[index % len(staging)] for index, captured in enumerate(busiest)}
+
+    stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+    lags_ms: List[float] = []
+    in_flight = asyncio.Semaphore(args.max_in_flight)
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits) as client:
+        for merchant in {id(m): m for m in mapping.values()}.values():
+            await _login(client, merchant)
+
+        async def send(record: Dict[str, Any], scheduled: float) -> None:
+            entry = stats[_endpoint(record)]
+            merchant = mapping.get(record["merchant"]) or rng.choice(staging)
+            path = record["route"]
+            for name, value in record["path_params"].items():
+                filled = _fill(name, value, merchant, rng)
+                if filled is None:
+                    entry.skipped += 1  # The staging merchant has nothing of this kind
+                    return
+                path = path.replace(f"{{{name}}}", filled)
+            params = {}
+            for name, value in record["query"].items():
+                filled = _fill(name, value, merchant, rng)
+                if filled is not None:
+                    params[name] = filled
+            headers = merchant.headers if record["merchant"] else {}
+
+            async with in_flight:
+                lags_ms.append(max(0.0, time.perf_counter() - scheduled) * 1000)
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, params=params, headers=headers)
+                    # A 4xx that production also returned (a stale link) is expected traffic
+                    failed = response.status_code >= 500 or (
+                        response.status_code >= 400 and response.status_code != record["status"]
+                    )
+                except httpx.HTTPError:
+                    failed = True
+            entry.latencies_ms.append((time.perf_counter() - started) * 1000)
+            entry.captured_ms.append(record["duration_ms"])
+            if failed:
+                entry.errors += 1
+
+        first_ts = records[0]["ts"]
+        started = time.perf_counter()
+        pending = set()
+        for record in records:
+            if record["method"] != "GET" or record["route"] == "unmatched":
+                stats[_endpoint(record)].skipped += 1
+                continue
+            scheduled = started + (record["ts"] - first_ts) / args.speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(send(record, scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+        elapsed = time.perf_counter() - started
+
+    lags_ms.sort()
+    return {"elapsed_seconds": elapsed, "stats": stats, "lag_p50_ms": percentile(lags_ms, 0.5),
+            "lag_p95_ms": percentile(lags_ms, 0.95), "lag_max_ms": lags_ms[-1] if lags_ms else 0.0}
+
+
+def print_replay(results: Dict[str, Any]) -> None:
+    stats: Dict[str, EndpointStats] = results["stats"]
+    sent = sum(len(entry.latencies_ms) for entry in stats.values())
+    print(
+        f"[{datetime.utcnow().isoformat()}] Replayed {sent} requests in {results['elapsed_seconds']:.1f}s "
+        f"({sent / results['elapsed_seconds']:.1f}/s); start lag p50 {results['lag_p50_ms']:.0f} ms, "
+        f"p95 {results['lag_p95_ms']:.0f} ms, max {results['lag_max_ms']:.0f} ms"
+    )
+    print(f"{'endpoint':<60}  {'sent':>6}  {'errors':>6}  {'skipped':>7}  {'captured p95':>12}  {'p50':>7}  {'p95':>7}  {'p99':>7}")
+    for endpoint, entry in sorted(stats.items(), key=lambda item: len(item[1].latencies_ms), reverse=True):
+        latencies = sorted(entry.latencies_ms)
+        print(
+            f"{endpoint[:60]:<60}  {len(latencies):>6}  {entry.errors:>6}  {entry.skipped:>7}  "
+            f"{percentile(sorted(entry.captured_ms), 0.95):>12.1f}  {percentile(latencies, 0.5):>7.1f}  "
+            f"{percentile(latencies, 0.95):>7.1f}  {percentile(latencies, 0.99):>7.1f}"
+        )
+
+
+def run(args, records: List[Dict[str, Any]]) -> int:
+    staging = load_staging_merchants(args.merchant_prefix, args.id_sample)
+    if not staging:
+        print(f"No staging merchants with phone prefix {args.merchant_prefix}; seed them first.", file=sys.stderr)
+        return 1
+    sample_rate = min(record.get("sample_rate", 1.0) for record in records)
+    print(
+        f"[{datetime.utcnow().isoformat()}] Replaying {len(records)} captured requests at {args.speed:g}x "
+        f"against {args.target} as {len(staging)} staging merchants"
+    )
+    if sample_rate < 1:
+        print(f"Captured at sample rate {sample_rate:g}: {args.speed:g}x replays {args.speed * sample_rate:g}x the production rate.")
+    print_replay(asyncio.run(replay(args, records, staging)))
+    return 0
+
+
+def main():
+    """Summarize or replay captured request traffic."""
+    parser = argparse.ArgumentParser(description="Replay captured API traffic against a staging instance.")
+    parser.add_argument("--captures", default=settings.REQUEST_CAPTURE_DIR, help="Capture directory")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only requests from this time (UTC)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only requests before this time (UTC)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("summary", help="Requests per route and merchant in the capture")
+
+    run_parser = subparsers.add_parser("run", help="Replay the reads against a target")
+    run_parser.add_argument("--target", default="http://localhost:8000")
+    run_parser.add_argument("--speed", type=float, default=1.0, help="Multiple of the recorded rate (1 to 10)")
+    run_parser.add_argument("--merchant-prefix", default=PHONE_PREFIX, help="Phone prefix of the staging merchants")
+    run_parser.add_argument("--id-sample", type=int, default=500, help="Ids per merchant and kind used for parameters")
+    run_parser.add_argument("--max-in-flight", type=int, default=200, help="Concurrent requests")
+    run_parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    run_parser.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    if args.command == "run" and not 1 <= args.speed <= 10:
+        parser.error("--speed must be between 1 and 10")
+
+    records = read_captures(args.captures, args.since, args.until)
+    if not records:
+        print(f"No captured requests in {args.captures}", file=sys.stderr)
+        return 1
+    if args.command == "summary":
+        return summary(records)
+    return run(args, records)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
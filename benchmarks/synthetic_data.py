@@ -0,0 +1,514 @@
+#!/usr/bin/env python
+"""
+Load a production-sized synthetic dataset with Postgres COPY.
+
+Merchants get customer counts with a Zipf-like skew (a few large schools,
+a long tail of small tutors). Each customer gets invoices spread over the
+last --months months with a realistic mix: mostly PAID once past due,
+UNPAID otherwise, a few soft-deleted or with reminders paused. About
+--recurring-rate of customers pay through a recurring template with one
+invoice per month. Invoices carry their outbound reminders and follow-ups
+with delivery statuses, some customer replies with a detected intent, and
+the payment confirmations raised from "paid" replies.
+
+    python benchmarks/synthetic_data.py --merchants 50 --customers 5000
+    python benchmarks/synthetic_data.py --merchants 2000 --customers 1000000 \\
+        --invoices-per-customer 10 --workers 8 --replace
+
+The second command loads about 10M invoices. Customers are generated in
+fixed blocks, each from its own random stream derived from --seed, so the
+data is the same whatever --workers is. Rows are streamed to COPY in
+batches and every block is committed on its own. Synthetic merchants have
+phone numbers starting with 7; --replace deletes them (and everything
+that cascades from them) first. Tables are ANALYZEd at the end so query
+plans reflect the new volume.
+"""
+import argparse
+import io
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.database import engine
+from app.utils.enums import (
+    InvoiceStatus,
+    PaymentIntent,
+    WhatsAppDirection,
+    WhatsAppMessageStatus,
+    WhatsAppMessageType,
+)
+
+
+PHONE_PREFIX = "7"
+CUSTOMER_BLOCK = 5000  # Customers per unit of work; fixed so the data never depends on --workers
+COPY_BATCH_ROWS = 50000
+NULL = "\\N"
+
+# Enum values as plain strings; attribute access on enums is slow in the hot loop
+PAID, UNPAID = InvoiceStatus.PAID.value, InvoiceStatus.UNPAID.value
+INBOUND, OUTBOUND = WhatsAppDirection.INBOUND.value, WhatsAppDirection.OUTBOUND.value
+INVOICE, FOLLOWUP, CUSTOMER_MESSAGE = (
+    WhatsAppMessageType.INVOICE.value,
+    WhatsAppMessageType.FOLLOWUP.value,
+    WhatsAppMessageType.CUSTOMER_MESSAGE.value,
+)
+PENDING, SENT, DELIVERED, READ, FAILED, RECEIVED = (
+    WhatsAppMessageStatus.PENDING.value,
+    WhatsAppMessageStatus.SENT.value,
+    WhatsAppMessageStatus.DELIVERED.value,
+    WhatsAppMessageStatus.READ.value,
+    WhatsAppMessageStatus.FAILED.value,
+    WhatsAppMessageStatus.RECEIVED.value,
+)
+INTENT_PAID = PaymentIntent.PAID.value
+
+# Columns written per table, in foreign key order (COPY flushes follow it)
+TABLES: Dict[str, Tuple[str, ...]] = {
+    "merchants": (
+        "id", "business_name", "business_type", "business_city", "owner_name", "phone", "upi_id", "plan",
+        "is_active", "timezone", "created_at",
+    ),
+    "customers": ("id", "merchant_id", "name", "phone", "class", "section", "created_at"),
+    "recurring_invoices": (
+        "id", "merchant_id", "customer_id", "invoice_number_prefix", "description", "amount", "day_of_month",
+        "due_date_offset", "start_date", "end_date", "next_generation_date", "is_active", "frequency",
+        "pause_reminder", "created_at", "updated_at",
+    ),
+    "invoices": (
+        "id", "merchant_id", "customer_id", "recurring_invoice_id", "period_date", "invoice_number",
+        "description", "amount", "due_date", "status", "paid_at", "pause_reminder", "deleted_at", "created_at",
+    ),
+    "whatsapp_messages": (
+        "id", "merchant_id", "customer_id", "invoice_id", "direction", "message_type", "status",
+        "message_text", "provider_message_id", "detected_intent", "llm_confidence", "created_at", "updated_at",
+    ),
+    "payment_confirmations": (
+        "id", "invoice_id", "merchant_id", "customer_id", "whatsapp_message_id", "customer_message",
+        "detected_intent", "llm_confidence", "status", "created_at", "resolved_at",
+    ),
+}
+
+BUSINESS_TYPES = ["Tuition", "Coaching", "School", "Dance Academy", "Music Classes", "Gym", "Hostel"]
+CITIES = ["Bengaluru", "Mumbai", "Delhi", "Pune", "Hyderabad", "Chennai", "Kolkata", "Jaipur", "Lucknow", "Patna"]
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Rohan", "Saanvi", "Arjun", "Meera"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Reddy", "Patel", "Gupta", "Nair", "Singh", "Das", "Khan", "Joshi"]
+FEES = [500, 800, 1000, 1500, 2000, 2500, 3000, 5000]
+
+REPLIES = {
+    PaymentIntent.PAID.value: ["Paid via GPay", "Payment done, UTR 4{n}", "bhej diya sir", "Sent to your UPI"],
+    PaymentIntent.WILL_PAY_LATER.value: ["Will pay by Friday", "kal kar dunga", "Next week after salary"],
+    PaymentIntent.DISPUTE.value: ["This amount is wrong", "We already paid this month"],
+    PaymentIntent.UNKNOWN.value: ["Ok thanks", "Who is this?", "Noted"],
+}
+INTENT_WEIGHTS = {
+    PaymentIntent.PAID.value: 5,
+    PaymentIntent.WILL_PAY_LATER.value: 3,
+    PaymentIntent.DISPUTE.value: 1,
+    PaymentIntent.UNKNOWN.value: 2,
+}
+
+
+def _id(rng: random.Random) -> str:
+    # Postgres accepts 32 hex digits without dashes as a UUID
+    return f"{rng.getrandbits(128):032x}"
+
+
+def _between(rng: random.Random, low: int, high: int) -> int:
+    # random.randint is several times slower, and it is called for nearly every column
+    return low + int(rng.random() * (high - low + 1))
+
+
+@dataclass
+class Options:
+    seed: int
+    as_of: date
+    months: int
+    invoices_per_customer: int
+    recurring_rate: float
+    deleted_rate: float
+    reply_rate: float
+    messages: bool
+
+
+@dataclass
+class MerchantProfile:
+    index: int
+    id: str
+    customers: int
+    customer_offset: int  # Customers of all merchants before this one, for unique phone numbers
+    fee: int
+    plan: str
+
+
+def customer_counts(merchants: int, customers: int, skew: float) -> List[int]:
+    """Customers per merchant, proportional to 1 / rank^skew (at least one each)."""
+    weights = [1 / (rank + 1) ** skew for rank in range(merchants)]
+    total = sum(weights)
+    return [max(1, round(customers * weight / total)) for weight in weights]
+
+
+def merchant_profiles(options: Options, counts: List[int]) -> List[MerchantProfile]:
+    profiles = []
+    offset = 0
+    for index, count in enumerate(counts):
+        rng = random.Random(f"{options.seed}:merchant:{index}")
+        plan = "pro" if count >= 500 else "starter" if count >= 100 else rng.choice(["trial", "trial", "starter"])
+        profiles.append(MerchantProfile(index, _id(rng), count, offset, rng.choice(FEES), plan))
+        offset += count
+    return profiles
+
+
+class CopyWriter:
+    """Buffers tab-separated rows per table and streams them to COPY.
+
+    Flushes go through the tables in foreign key order, so a batch never
+    references a row that is still buffered.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.rows: Dict[str, List[str]] = {table: [] for table in TABLES}
+        self.buffered = 0
+        self.counts: Counter = Counter()
+
+    def add(self, table: str, line: str) -> None:
+        self.rows[table].append(line)
+        self.buffered += 1
+        if self.buffered >= COPY_BATCH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        for table, lines in self.rows.items():
+            if not lines:
+                continue
+            columns = ", ".join(f'"{column}"' for column in TABLES[table])
+            self.cursor.copy_expert(
+                f"COPY {table} ({columns}) FROM STDIN", io.StringIO("\n".join(lines) + "\n")
+            )
+            self.counts[table] += len(lines)
+            lines.clear()
+        self.buffered = 0
+
+
+class Calendar:
+    """Date and timestamp strings by day offset from the start of the window."""
+
+    def __init__(self, as_of: date, window_days: int):
+        self.window = window_days
+        start = as_of - timedelta(days=window_days)
+        # Room after as_of for due dates, next generation dates and end dates
+        self.days = [(start + timedelta(days=offset)).isoformat() for offset in range(window_days + 400)]
+
+    def day(self, offset: int) -> str:
+        return self.days[offset]
+
+    def at(self, offset: int, rng: random.Random) -> str:
+        seconds = _between(rng, 8 * 3600, 22 * 3600 - 1)
+        return f"{self.days[offset]} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _delivery_status(rng: random.Random, age_days: int) -> str:
+    if age_days == 0 and rng.random() < 0.3:
+        return PENDING
+    roll = rng.random()
+    if roll < 0.02:
+        return FAILED
+    if roll < 0.10:
+        return SENT
+    if roll < 0.40:
+        return DELIVERED
+    return READ
+
+
+def _write_messages(
+    writer: CopyWriter,
+    rng: random.Random,
+    calendar: Calendar,
+    options: Options,
+    merchant: MerchantProfile,
+    customer_id: str,
+    invoice_id: str,
+    invoice_number: str,
+    amount: int,
+    created: int,
+    due: int,
+    paid: bool,
+) -> None:
+    """Reminder, follow-ups and maybe a reply with its payment confirmation."""
+    today = calendar.window
+    sends = [(created, INVOICE, f"Invoice #{invoice_number} for Rs.{amount} is due on {calendar.day(due)}")]
+    followups = _between(rng, 0, 3) if not paid and due < today else _between(rng, 0, 1)
+    for number in range(followups):
+        sent = min(today, due + 3 * number)
+        sends.append((sent, FOLLOWUP, f"Reminder: invoice #{invoice_number} for Rs.{amount} is pending"))
+
+    for sent, message_type, text in sends:
+        message_id = _id(rng)
+        status = _delivery_status(rng, today - sent)
+        provider_id = f"sim-{message_id}" if status not in (PENDING, FAILED) else NULL
+        at = calendar.at(sent, rng)
+        writer.add("whatsapp_messages", (
+            f"{message_id}\t{merchant.id}\t{customer_id}\t{invoice_id}\t{OUTBOUND}\t"
+            f"{message_type}\t{status}\t{text}\t{provider_id}\t{NULL}\t{NULL}\t{at}\t{at}"
+        ))
+
+    if rng.random() >= options.reply_rate:
+        return
+    intents = list(INTENT_WEIGHTS)
+    weights = [INTENT_WEIGHTS[intent] * (3 if paid and intent == INTENT_PAID else 1) for intent in intents]
+    intent = rng.choices(intents, weights)[0]
+    text = rng.choice(REPLIES[intent]).format(n=_between(rng, 10 ** 8, 10 ** 9))
+    confidence = f"0.{_between(rng, 50, 99)}"
+    replied = min(today, created + _between(rng, 0, 10))
+    reply_id = _id(rng)
+    at = calendar.at(replied, rng)
+    writer.add("whatsapp_messages", (
+        f"{reply_id}\t{merchant.id}\t{customer_id}\t{invoice_id}\t{INBOUND}\t"
+        f"{CUSTOMER_MESSAGE}\t{RECEIVED}\t{text}\t"
+        f"{NULL}\t{intent}\t{confidence}\t{at}\t{at}"
+    ))
+
+    if intent != INTENT_PAID:
+        return
+    if paid:
+        status, resolved = "approved", calendar.at(min(today, replied + _between(rng, 0, 3)), rng)
+    elif rng.random() < 0.7:
+        status, resolved = "pending", NULL
+    else:
+        status, resolved = "rejected", calendar.at(min(today, replied + _between(rng, 0, 3)), rng)
+    writer.add("payment_confirmations", (
+        f"{_id(rng)}\t{invoice_id}\t{merchant.id}\t{customer_id}\t{reply_id}\t{text}\t{intent}\t"
+        f"{confidence}\t{status}\t{at}\t{resolved}"
+    ))
+
+
+def _write_invoice(
+    writer: CopyWriter,
+    rng: random.Random,
+    calendar: Calendar,
+    options: Options,
+    merchant: MerchantProfile,
+    customer_id: str,
+    invoice_number: str,
+    amount: int,
+    created: int,
+    due_offset: int,
+    template_id: Optional[str] = None,
+) -> None:
+    today = calendar.window
+    invoice_id = _id(rng)
+    due = created + due_offset
+    paid = rng.random() < (0.85 if due < today else 0.3)
+    paid_at = calendar.at(min(today, created + _between(rng, 0, due_offset + 20)), rng) if paid else NULL
+    deleted_at = calendar.at(min(today, created + _between(rng, 0, 30)), rng) if rng.random() < options.deleted_rate else NULL
+    paused = rng.random() < 0.05
+    writer.add("invoices", (
+        f"{invoice_id}\t{merchant.id}\t{customer_id}\t{template_id or NULL}\t"
+        f"{calendar.day(created) if template_id else NULL}\t{invoice_number}\tMonthly fees\t{amount}.00\t"
+        f"{calendar.day(due)}\t{PAID if paid else UNPAID}\t{paid_at}\t"
+        f"{'t' if paused else 'f'}\t{deleted_at}\t{calendar.at(created, rng)}"
+    ))
+    if options.messages and not paused and deleted_at == NULL:
+        _write_messages(
+            writer, rng, calendar, options, merchant, customer_id, invoice_id, invoice_number,
+            amount, created, due, paid,
+        )
+
+
+def generate_block(
+    writer: CopyWriter, options: Options, merchant: MerchantProfile, first: int, last: int
+) -> None:
+    """Customers ``first`` to ``last`` (exclusive) of a merchant, with all their rows."""
+    rng = random.Random(f"{options.seed}:{merchant.index}:{first}")
+    calendar = Calendar(options.as_of, options.months * 30)
+    today = calendar.window
+
+    for number in range(first, last):
+        customer_id = _id(rng)
+        joined = _between(rng, 0, today)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        writer.add("customers", (
+            f"{customer_id}\t{merchant.id}\t{name}\t6{merchant.customer_offset + number:09d}\t"
+            f"{_between(rng, 1, 12)}\t{rng.choice('ABCD')}\t{calendar.at(joined, rng)}"
+        ))
+        amount = merchant.fee * rng.choice([1, 1, 1, 2])
+
+        if rng.random() < options.recurring_rate:
+            template_id = _id(rng)
+            due_offset = 7
+            periods = list(range(joined, today + 1, 30))
+            active = rng.random() < 0.85
+            end_date = NULL if active else calendar.day(periods[-1])
+            created = calendar.at(joined, rng)
+            writer.add("recurring_invoices", (
+                f"{template_id}\t{merchant.id}\t{customer_id}\tREC-{number}\tMonthly fees\t{amount}.00\t"
+                f"{_between(rng, 1, 28)}\t{due_offset}\t{calendar.day(joined)}\t{end_date}\t"
+                f"{calendar.day(periods[-1] + 30)}\t{'t' if active else 'f'}\tMONTHLY\tf\t{created}\t{created}"
+            ))
+            for period, created_day in enumerate(periods):
+                _write_invoice(
+                    writer, rng, calendar, options, merchant, customer_id, f"REC-{number}-{period + 1}",
+                    amount, created_day, due_offset, template_id,
+                )
+            continue
+
+        for sequence in range(_between(rng, 0, 2 * options.invoices_per_customer)):
+            _write_invoice(
+                writer, rng, calendar, options, merchant, customer_id, f"INV-{number}-{sequence + 1}",
+                amount, _between(rng, joined, today), _between(rng, 7, 30),
+            )
+
+
+_connection = None
+
+
+def _worker_init() -> None:
+    # Forked workers must not share the parent's pooled connections
+    engine.dispose(close=False)
+
+
+def _load_block(task: Tuple[Options, MerchantProfile, int, int]) -> Counter:
+    global _connection
+    options, merchant, first, last = task
+    if _connection is None:
+        _connection = engine.raw_connection()
+    cursor = _connection.cursor()
+    try:
+        # Losing the tail of a bulk load on a crash is fine; waiting on WAL flushes is not
+        cursor.execute("SET synchronous_commit TO off")
+        writer = CopyWriter(cursor)
+        generate_block(writer, options, merchant, first, last)
+        writer.flush()
+        _connection.commit()
+        return writer.counts
+    except Exception:
+        _connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def delete_synthetic() -> None:
+    """Delete previously generated merchants and everything belonging to them."""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        synthetic = "SELECT id FROM merchants WHERE phone LIKE %s"
+        # Children first, so each table is deleted with one scan instead of per-row cascades
+        for table in reversed(TABLES):
+            column = "id" if table == "merchants" else "merchant_id"
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({synthetic})", (f"{PHONE_PREFIX}%",))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def write_merchants(options: Options, profiles: List[MerchantProfile]) -> None:
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        writer = CopyWriter(cursor)
+        calendar = Calendar(options.as_of, options.months * 30)
+        for profile in profiles:
+            rng = random.Random(f"{options.seed}:merchant-details:{profile.index}")
+            writer.add("merchants", (
+                f"{profile.id}\t{rng.choice(BUSINESS_TYPES)} Centre {profile.index}\t{rng.choice(BUSINESS_TYPES)}\t"
+                f"{rng.choice(CITIES)}\t{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}\t"
+                f"{PHONE_PREFIX}{profile.index:09d}\tmerchant{profile.index}@upi\t{profile.plan}\tt\tAsia/Kolkata\t"
+                f"{calendar.at(0, rng)}"
+            ))
+        writer.flush()
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def main():
+    """Load synthetic merchants and their data with COPY."""
+    parser = argparse.ArgumentParser(description="Load a large synthetic dataset with COPY.")
+    parser.add_argument("--merchants", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=5000, help="Customers across all merchants")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of customers per merchant")
+    parser.add_argument("--invoices-per-customer", type=int, default=10, help="Mean ad-hoc invoices per customer")
+    parser.add_argument("--months", type=int, default=18, help="History generated, in months")
+    parser.add_argument("--recurring-rate", type=float, default=0.2, help="Customers billed by a template")
+    parser.add_argument("--deleted-rate", type=float, default=0.03, help="Invoices soft-deleted")
+    parser.add_argument("--reply-rate", type=float, default=0.15, help="Invoices the customer replies to")
+    parser.add_argument("--no-messages", action="store_true", help="Skip WhatsApp messages and confirmations")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(), help="Last day of the history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--replace", action="store_true", help="Delete previously generated merchants first")
+    args = parser.parse_args()
+
+    options = Options(
+        seed=args.seed,
+        as_of=args.as_of,
+        months=args.months,
+        invoices_per_customer=args.invoices_per_customer,
+        recurring_rate=args.recurring_rate,
+        deleted_rate=args.deleted_rate,
+        reply_rate=args.reply_rate,
+        messages=not args.no_messages,
+    )
+    profiles = merchant_profiles(options, customer_counts(args.merchants, args.customers, args.skew))
+    if args.replace:
+        print(f"[{datetime.utcnow().isoformat()}] Deleting previously generated merchants...")
+        delete_synthetic()
+
+    started = time.perf_counter()
+    print(
+        f"[{datetime.utcnow().isoformat()}] Generating {len(profiles)} merchants with "
+        f"{sum(profile.customers for profile in profiles)} customers "
+        f"(largest {profiles[0].customers}) on {args.workers} workers..."
+    )
+
+    write_merchants(options, profiles)
+    tasks = [
+        (options, profile, first, min(first + CUSTOMER_BLOCK, profile.customers))
+        for profile in profiles
+        for first in range(0, profile.customers, CUSTOMER_BLOCK)
+    ]
+    # Largest blocks first so the pool does not end waiting on one big merchant
+    tasks.sort(key=lambda task: task[3] - task[2], reverse=True)
+
+    totals: Counter = Counter({"merchants": len(profiles)})
+    engine.dispose()
+    with multiprocessing.Pool(args.workers, initializer=_worker_init) as pool:
+        for done, counts in enumerate(pool.imap_unordered(_load_block, tasks), 1):
+            totals.update(counts)
+            if done % 20 == 0 or done == len(tasks):
+                elapsed = time.perf_counter() - started
+                print(
+                    f"[{datetime.utcnow().isoformat()}] {done}/{len(tasks)} blocks, "
+                    f"{totals['invoices']} invoices, {sum(totals.values()) / elapsed:,.0f} rows/s"
+                )
+
+    connection = engine.raw_connection()
+    try:
+        connection.set_isolation_level(0)  # ANALYZE outside a transaction block
+        cursor = connection.cursor()
+        for table in TABLES:
+            cursor.execute(f"ANALYZE {table}")
+    finally:
+        connection.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"[{datetime.utcnow().isoformat()}] Loaded in {elapsed:.1f}s:")
+    for table in TABLES:
+        print(f"  {table:<22} {totals[table]:>12,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
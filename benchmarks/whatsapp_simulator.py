@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+"""
+Stand-in for the AiSensy campaign API, with latency and failure injection.
+
+Point the API and workers at it to test send throughput, retries, rate
+limiting and the circuit breaker without touching the real provider:
+
+    python benchmarks/whatsapp_simulator.py --port 8090 --latency lognormal:200:0.5 \\
+        --error-rate 0.02 --rate-limit 20 \\
+        --webhook-url http://localhost:8000/api/v1/webhooks/whatsapp/status
+    export WHATSAPP_PROVIDER=aisensy
+    export AISENSY_API_URL=http://localhost:8090/campaign/t1/api/v2
+
+Each accepted send gets a provider message id. Like the real provider, the
+simulator then calls the API back with a DELIVERED receipt (or FAILED for
+--undelivered-rate of sends) after --delivery-delay, and a READ receipt
+after --read-delay for --read-rate of the delivered ones. Callbacks answered
+with 404 or a server error are retried.
+
+Latencies and delays are distributions in milliseconds: ``fixed:MS``,
+``uniform:LOW:HIGH``, ``normal:MEAN:STDDEV``, ``lognormal:MEDIAN:SIGMA`` or
+``exponential:MEAN``. Sends fail with 500 (--error-rate), 400
+(--reject-rate), or hang for --hang-seconds so the client times out
+(--timeout-rate). They are throttled with 429 and Retry-After above
+--rate-limit sends per second, or at random for --throttle-rate of them.
+
+Everything can be changed while running, e.g. to make the provider flaky
+in the middle of a benchmark:
+
+    curl -X PATCH localhost:8090/_simulator/config -H 'Content-Type: application/json' \\
+        -d '{"error_rate": 0.5, "latency": "fixed:3000"}'
+    curl localhost:8090/_simulator/stats
+
+The simulator is a single process, so the rate limit is global.
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Set
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, field_validator
+
+
+CAMPAIGN_PATH = "/campaign/t1/api/v2"
+WEBHOOK_ATTEMPTS = 5
+WEBHOOK_CONCURRENCY = 50
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """Sampler of a latency distribution given in milliseconds; samples are in seconds."""
+    kind, _, raw = spec.partition(":")
+    try:
+        params = [float(value) for value in raw.split(":")] if raw else []
+    except ValueError:
+        raise ValueError(f"Invalid distribution {spec!r}: parameters must be numbers")
+
+    shapes: Dict[str, Any] = {
+        "fixed": (1, lambda rng, ms: ms),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, stddev: rng.gauss(mean, stddev)),
+        "lognormal": (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma)),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean)),
+    }
+    if kind not in shapes:
+        raise ValueError(f"Invalid distribution {spec!r}: use one of {', '.join(shapes)}")
+    arity, sample = shapes[kind]
+    if len(params) != arity:
+        raise ValueError(f"Invalid distribution {spec!r}: {kind} takes {arity} parameter(s)")
+    if kind in ("lognormal", "exponential") and params[0] <= 0:
+        raise ValueError(f"Invalid distribution {spec!r}: the first parameter must be positive")
+    return lambda rng: max(0.0, sample(rng, *params)) / 1000
+
+
+class SimulatorConfig(BaseModel):
+    latency: str = "lognormal:150:0.5"
+    error_rate: float = 0.0
+    reject_rate: float = 0.0
+    timeout_rate: float = 0.0
+    hang_seconds: float = 30.0
+    throttle_rate: float = 0.0
+    rate_limit: float = 0.0  # Sends per second before 429s; 0 is unlimited
+    retry_after: int = 1
+    api_key: Optional[str] = None  # Required apiKey; any key is accepted when unset
+    webhook_url: Optional[str] = None
+    webhook_secret: Optional[str] = None
+    delivery_delay: str = "lognormal:800:0.6"
+    read_delay: str = "exponential:30000"
+    undelivered_rate: float = 0.01
+    read_rate: float = 0.6
+
+    @field_validator("latency", "delivery_delay", "read_delay")
+    @classmethod
+    def _valid_distribution(cls, value: str) -> str:
+        parse_distribution(value)
+        return value
+
+    @field_validator("error_rate", "reject_rate", "timeout_rate", "throttle_rate", "undelivered_rate", "read_rate")
+    @classmethod
+    def _valid_rate(cls, value: float) -> float:
+        if not 0 <= value <= 1:
+            raise ValueError("rates are fractions between 0 and 1")
+        return value
+
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Simulator:
+    """Provider state: configuration, samplers, rate limit, callbacks and counters."""
+
+    def __init__(self, config: SimulatorConfig, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.stats: Counter = Counter()
+        self.started = time.monotonic()
+        self.callbacks: Set[asyncio.Task] = set()
+        self.client: Optional[httpx.AsyncClient] = None
+        self.webhook_slots = asyncio.Semaphore(WEBHOOK_CONCURRENCY)
+        self.configure(config)
+
+    def configure(self, config: SimulatorConfig) -> None:
+        self.config = config
+        self.latency = parse_distribution(config.latency)
+        self.delivery_delay = parse_distribution(config.delivery_delay)
+        self.read_delay = parse_distribution(config.read_delay)
+        self.bucket = TokenBucket(config.rate_limit) if config.rate_limit > 0 else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "uptime_seconds": round(elapsed, 1),
+            "accepted_per_second": round(self.stats["accepted"] / elapsed, 2) if elapsed else 0.0,
+            "pending_callbacks": len(self.callbacks),
+            **self.stats,
+        }
+
+    def reset(self) -> None:
+        self.stats.clear()
+        self.started = time.monotonic()
+
+    async def send(self, payload: Dict[str, Any]) -> JSONResponse:
+        config = self.config
+        self.stats["requests"] += 1
+
+        if (self.bucket and not self.bucket.take()) or self.rng.random() < config.throttle_rate:
+            return self._reply("throttled", 429, {"message": "Rate limit exceeded"}, {"Retry-After": str(config.retry_after)})
+        if config.api_key and payload.get("apiKey") != config.api_key:
+            return self._reply("unauthorized", 401, {"message": "Invalid API key"})
+        if not payload.get("destination") or not payload.get("campaignName"):
+            return self._reply("rejected", 400, {"message": "destination and campaignName are required"})
+
+        await asyncio.sleep(self.latency(self.rng))
+        roll = self.rng.random()
+        if roll < config.timeout_rate:
+            await asyncio.sleep(config.hang_seconds)
+            return self._reply("timeouts", 504, {"message": "Gateway timeout"})
+        roll -= config.timeout_rate
+        if roll < config.error_rate:
+            return self._reply("errors", 500, {"message": "Internal server error"})
+        roll -= config.error_rate
+        if roll < config.reject_rate:
+            return self._reply("rejected", 400, {"message": "Template parameters do not match"})
+
+        message_id = f"sim-{uuid.uuid4()}"
+        if config.webhook_url:
+            task = asyncio.create_task(self._deliver(message_id))
+            self.callbacks.add(task)
+            task.add_done_callback(self.callbacks.discard)
+        return self._reply("accepted", 200, {"success": "true", "submitted_message_id": message_id})
+
+    def _reply(self, outcome: str, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        self.stats[outcome] += 1
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    async def _deliver(self, message_id: str) -> None:
+        await asyncio.sleep(self.delivery_delay(self.rng))
+        if self.rng.random() < self.config.undelivered_rate:
+            await self._callback(message_id, "FAILED")
+            return
+        if not await self._callback(message_id, "DELIVERED"):
+            return
+        if self.rng.random() < self.config.read_rate:
+            await asyncio.sleep(self.read_delay(self.rng))
+            await self._callback(message_id, "READ")
+
+    async def _callback(self, message_id: str, status: str) -> bool:
+        event = {
+            "provider_message_id": message_id,
+            "status": status,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        headers = {"X-Webhook-Secret": self.config.webhook_secret} if self.config.webhook_secret else {}
+        for attempt in range(WEBHOOK_ATTEMPTS):
+            try:
+                async with self.webhook_slots:
+                    response = await self.client.post(self.config.webhook_url, json=event, headers=headers)
+                if response.status_code < 300:
+                    self.stats[f"webhooks_{status.lower()}"] += 1
+                    return True
+                # 404: the worker may not have stored the provider id yet
+                if response.status_code != 404 and response.status_code < 500:
+                    break
+            except httpx.HTTPError:
+                pass
+            self.stats["webhook_retries"] += 1
+            await asyncio.sleep(2 ** attempt)
+        self.stats["webhook_failures"] += 1
+        return False
+
+
+def create_app(config: SimulatorConfig, seed: Optional[int] = None) -> FastAPI:
+    simulator: Optional[Simulator] = None
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        nonlocal simulator
+        simulator = Simulator(config, seed)
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            simulator.client = client
+            yield
+            for task in list(simulator.callbacks):
+                task.cancel()
+
+    app = FastAPI(title="WhatsApp provider simulator", lifespan=lifespan)
+
+    @app.post(CAMPAIGN_PATH)
+    async def send_campaign(request: Request):
+        try:
+            payload = await request.json()
+        except ValueError:
+            payload = {}
+        return await simulator.send(payload if isinstance(payload, dict) else {})
+
+    @app.get("/_simulator/config")
+    async def get_config():
+        return simulator.config
+
+    @app.patch("/_simulator/config")
+    async def update_config(changes: Dict[str, Any]):
+        try:
+            updated = SimulatorConfig(**{**simulator.config.model_dump(), **changes})
+        except ValueError as exc:
+            return JSONResponse({"detail": str(exc)}, status_code=422)
+        simulator.configure(updated)
+        return updated
+
+    @app.get("/_simulator/stats")
+    async def get_stats():
+        return simulator.snapshot()
+
+    @app.post("/_simulator/reset")
+    async def reset_stats():
+        simulator.reset()
+        return simulator.snapshot()
+
+    return app
+
+
+def main():
+    """Run the simulated WhatsApp provider."""
+    defaults = SimulatorConfig()
+    parser = argparse.ArgumentParser(description="Simulated AiSensy campaign API with failure injection.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--seed", type=int, help="Seed for reproducible latencies and failures")
+    for name, value in defaults.model_dump().items():
+        flag = f"--{name.replace('_', '-')}"
+        kind = type(value) if value is not None else str
+        parser.add_argument(flag, type=kind, default=value)
+    args = parser.parse_args()
+
+    try:
+        config = SimulatorConfig(**{name: getattr(args, name) for name in defaults.model_dump()})
+    except ValueError as exc:
+        print(f"Invalid configuration: {exc}", file=sys.stderr)
+        return 1
+
+    print(f"[{datetime.utcnow().isoformat()}] WhatsApp provider simulator on {args.host}:{args.port}{CAMPAIGN_PATH}")
+    print(f"[{datetime.utcnow().isoformat()}] Callbacks: {config.webhook_url or 'disabled'}")
+    uvicorn.run(create_app(config, args.seed), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,9 @@
 -- PayPing – Drop All Tables
 -- =========================================
 
+DROP TABLE IF EXISTS batch_job_runs CASCADE;
+DROP TABLE IF EXISTS dead_letter_messages CASCADE;
+DROP TABLE IF EXISTS outbox_messages CASCADE;
 DROP TABLE IF EXISTS payment_confirmations CASCADE;
 DROP TABLE IF EXISTS whatsapp_messages CASCADE;
 DROP TABLE IF EXISTS usage_tracking CASCADE;
@@ -121,7 +121,7 @@ CREATE TABLE IF NOT EXISTS whatsapp_messages (
     CHECK (direction IN ('INBOUND', 'OUTBOUND')),
 
   message_type TEXT
-    CHECK (message_type IN ('invoice', 'followup', 'customer_message')),
+    CHECK (message_type IN ('invoice', 'followup', 'customer_message', 'digest')),
 
   status TEXT NOT NULL DEFAULT 'PENDING'
     CHECK (status IN (
@@ -203,3 +203,111 @@ CREATE INDEX IF NOT EXISTS idx_recurring_invoices_next_generation_date ON recurr
 -- Add recurring_invoice_id to invoices table (after recurring_invoices table is created)
 ALTER TABLE invoices ADD COLUMN IF NOT EXISTS recurring_invoice_id UUID REFERENCES recurring_invoices(id) ON DELETE SET NULL;
 CREATE INDEX IF NOT EXISTS idx_invoices_recurring_invoice_id ON invoices(recurring_invoice_id);
+
+-- ---------- OUTBOX MESSAGES ----------
+-- Celery tasks written in the same transaction as the business change and
+-- published to the broker by the outbox relay
+CREATE TABLE IF NOT EXISTS outbox_messages (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  merchant_id UUID REFERENCES merchants(id) ON DELETE CASCADE,
+
+  task_name VARCHAR(255) NOT NULL,
+  args JSONB NOT NULL DEFAULT '[]',
+  kwargs JSONB NOT NULL DEFAULT '{}',
+  queue VARCHAR(50),
+
+  attempts INTEGER NOT NULL DEFAULT 0,
+  last_error TEXT,
+  available_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  scheduled_for TIMESTAMP,
+  coalesce_key VARCHAR(100),
+
+  created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_outbox_messages_available_at ON outbox_messages(available_at, created_at);
+
+-- Confidence of the automatic invoice match for a payment confirmation
+ALTER TABLE payment_confirmations ADD COLUMN IF NOT EXISTS match_confidence NUMERIC(3,2);
+
+-- Merchant send windows (local time) for outbound WhatsApp messages
+ALTER TABLE merchants ADD COLUMN IF NOT EXISTS send_window_start TIME;
+ALTER TABLE merchants ADD COLUMN IF NOT EXISTS send_window_end TIME;
+ALTER TABLE merchants ADD COLUMN IF NOT EXISTS timezone VARCHAR(50) NOT NULL DEFAULT 'Asia/Kolkata';
+ALTER TABLE outbox_messages ADD COLUMN IF NOT EXISTS scheduled_for TIMESTAMP;
+
+-- Sends that exhausted their retries, kept for inspection and replay
+CREATE TABLE IF NOT EXISTS dead_letter_messages (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  merchant_id UUID REFERENCES merchants(id) ON DELETE CASCADE,
+  whatsapp_message_id UUID REFERENCES whatsapp_messages(id) ON DELETE SET NULL,
+
+  task_name VARCHAR(255) NOT NULL,
+  args JSONB NOT NULL DEFAULT '[]',
+  kwargs JSONB NOT NULL DEFAULT '{}',
+  queue VARCHAR(50),
+
+  error_type VARCHAR(100) NOT NULL,
+  error TEXT,
+  attempts JSONB NOT NULL DEFAULT '[]',
+  attempt_count INTEGER NOT NULL DEFAULT 0,
+
+  status VARCHAR(20) NOT NULL DEFAULT 'PENDING'
+    CHECK (status IN ('PENDING', 'REPLAYED', 'DISCARDED')),
+  replay_count INTEGER NOT NULL DEFAULT 0,
+  replayed_at TIMESTAMP,
+
+  created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_dead_letter_messages_status_merchant ON dead_letter_messages(status, merchant_id, created_at);
+
+-- Per-customer reminder digests
+ALTER TABLE whatsapp_messages ADD COLUMN IF NOT EXISTS digest_message_id UUID REFERENCES whatsapp_messages(id) ON DELETE SET NULL;
+ALTER TABLE whatsapp_messages DROP CONSTRAINT IF EXISTS whatsapp_messages_message_type_check;
+ALTER TABLE whatsapp_messages DROP CONSTRAINT IF EXISTS whatsapp_messages_type_check;
+ALTER TABLE whatsapp_messages ADD CONSTRAINT whatsapp_messages_type_check
+  CHECK (message_type IN ('invoice', 'followup', 'customer_message', 'digest'));
+CREATE INDEX IF NOT EXISTS idx_whatsapp_messages_digest_message_id ON whatsapp_messages(digest_message_id);
+ALTER TABLE outbox_messages ADD COLUMN IF NOT EXISTS coalesce_key VARCHAR(100);
+CREATE INDEX IF NOT EXISTS idx_outbox_messages_coalesce_key ON outbox_messages(coalesce_key, available_at) WHERE coalesce_key IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_outbox_messages_merchant_ready ON outbox_messages(merchant_id, available_at, created_at) WHERE coalesce_key IS NULL;
+
+-- One recurring invoice per template and period (makes generation and backfill idempotent)
+ALTER TABLE invoices ADD COLUMN IF NOT EXISTS period_date DATE;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_invoices_recurring_period ON invoices(recurring_invoice_id, period_date) WHERE period_date IS NOT NULL;
+
+-- Run history of scheduled batch jobs
+CREATE TABLE IF NOT EXISTS batch_job_runs (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  job_name VARCHAR(100) NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'RUNNING'
+    CHECK (status IN ('RUNNING', 'SUCCEEDED', 'FAILED')),
+  host VARCHAR(255),
+
+  started_at TIMESTAMP NOT NULL,
+  finished_at TIMESTAMP,
+  duration_seconds DOUBLE PRECISION,
+
+  rows_processed INTEGER NOT NULL DEFAULT 0,
+  watermark VARCHAR(255),
+  error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_batch_job_runs_job_started ON batch_job_runs(job_name, started_at);
+
+-- Invoice lists filter by merchant and order by creation time (found through the slow query log)
+CREATE INDEX IF NOT EXISTS idx_invoices_merchant_created_at ON invoices(merchant_id, created_at);
+
+-- Trace context (W3C traceparent and enqueue time) carried from the enqueuing request to the Celery task
+ALTER TABLE outbox_messages ADD COLUMN IF NOT EXISTS headers JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+-- Foreign keys with ON DELETE SET NULL that had no index: every deleted message or customer scanned these tables
+CREATE INDEX IF NOT EXISTS idx_payment_confirmations_whatsapp_message_id ON payment_confirmations(whatsapp_message_id);
+CREATE INDEX IF NOT EXISTS idx_payment_confirmations_customer_id ON payment_confirmations(customer_id);
+CREATE INDEX IF NOT EXISTS idx_dead_letter_messages_whatsapp_message_id ON dead_letter_messages(whatsapp_message_id);
+
+-- Reminders whose invoice was paid or deleted while they waited for a digest are cancelled, not sent
+ALTER TABLE whatsapp_messages DROP CONSTRAINT IF EXISTS whatsapp_messages_status_check;
+ALTER TABLE whatsapp_messages ADD CONSTRAINT whatsapp_messages_status_check
+  CHECK (status IN ('PENDING', 'SENT', 'DELIVERED', 'READ', 'FAILED', 'RECEIVED', 'CANCELLED'));
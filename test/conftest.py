@@ -0,0 +1,164 @@
+"""
+API test harness with per-endpoint SQL query budgets.
+
+Tests run against a real, disposable Postgres database; its tables are
+dropped and recreated from the models at the start of the run:
+
+    createdb payping_test
+    TEST_DATABASE_URL=postgresql://localhost/payping_test pytest
+
+Without TEST_DATABASE_URL every test is skipped. Each test runs in one
+transaction that is rolled back afterwards, so tests never see each other's
+rows.
+
+Every request made through the ``client`` fixture counts the SQL statements
+the endpoint issues and fails the test when it exceeds the endpoint's budget
+in query_budgets.py. Seed several rows before calling list endpoints, so a
+lazy load per row (an N+1) blows the budget.
+"""
+import os
+import re
+from contextlib import contextmanager
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Settings are read at import time: point the app at the test database (never
+# at DATABASE_URL from .env) before anything imports it
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "postgresql://localhost/payping_test_unset"
+for name in ("SUPABASE_ACCESS_KEY", "SUPABASE_SECRET_KEY", "S3_ENDPOINT", "S3_REGION"):
+    os.environ.setdefault(name, "test")
+# Cached reads would outlive the rolled back transactions; test_cache.py
+# enables the cache on an in-memory Redis
+os.environ["CACHE_ENABLED"] = "false"
+# The slow query log would write its file into the working directory
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from sqlalchemy import event  # noqa: E402
+from starlette.testclient import TestClient  # noqa: E402
+
+from app.core.database import Base, engine, get_db, rollback_only_session  # noqa: E402
+from app.core.request_metrics import route_label  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from factories import make_merchant  # noqa: E402
+from query_budgets import budget_for  # noqa: E402
+
+
+# Transaction bookkeeping of the test session, not queries of the endpoint
+_SAVEPOINT_STATEMENT = re.compile(r"^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder:
+    """Collects the SQL statements executed on the engine while recording."""
+
+    def __init__(self):
+        self.recording = False
+        self.statements = []
+
+    @contextmanager
+    def record(self):
+        self.statements = []
+        self.recording = True
+        try:
+            yield self.statements
+        finally:
+            self.recording = False
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.recording or _SAVEPOINT_STATEMENT.match(statement):
+            return
+        # EXPLAINs issued by the slow query log on its own connection
+        if conn.get_execution_options().get("slow_query_log_skip"):
+            return
+        self.statements.append(statement)
+
+
+class BudgetedClient(TestClient):
+    """TestClient that enforces the query budget of every endpoint it calls.
+
+    The session is emptied before each call, so rows seeded by the test are
+    loaded by the endpoint as they would be in a fresh request session
+    instead of coming from the identity map.
+    """
+
+    def __init__(self, app, session, recorder: QueryRecorder, **kwargs):
+        self.session = session
+        self.recorder = recorder
+        self.last_route = None
+
+        async def recorded_app(scope, receive, send):
+            await app(scope, receive, send)
+            # The router stores the matched route in the scope
+            self.last_route = route_label(scope)
+
+        super().__init__(recorded_app, **kwargs)
+
+    def request(self, method, url, *args, **kwargs):
+        self.session.flush()
+        self.session.expunge_all()
+        with self.recorder.record() as statements:
+            response = super().request(method, url, *args, **kwargs)
+
+        endpoint = f"{method.upper()} {self.last_route}"
+        budget = budget_for(endpoint)
+        if budget is None:
+            raise QueryBudgetExceeded(f"{endpoint} has no query budget; declare one in test/query_budgets.py")
+        if len(statements) > budget:
+            listing = "\n".join(f"  {i}. {' '.join(sql.split())[:200]}" for i, sql in enumerate(statements, 1))
+            raise QueryBudgetExceeded(
+                f"{endpoint} issued {len(statements)} SQL statements, budget is {budget}:\n{listing}"
+            )
+        response.sql_statements = list(statements)
+        return response
+
+
+@pytest.fixture(scope="session")
+def api_app():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from app.main import app
+
+    # Start every run from the current models
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return app
+
+
+@pytest.fixture(scope="session")
+def query_recorder(api_app):
+    recorder = QueryRecorder()
+    event.listen(engine, "before_cursor_execute", recorder.before_cursor_execute)
+    yield recorder
+    event.remove(engine, "before_cursor_execute", recorder.before_cursor_execute)
+
+
+@pytest.fixture
+def db(api_app):
+    """Session shared with the endpoints; everything is rolled back after the test."""
+    with rollback_only_session() as session:
+        api_app.dependency_overrides[get_db] = lambda: session
+        try:
+            yield session
+        finally:
+            api_app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def client(api_app, db, query_recorder):
+    with BudgetedClient(api_app, db, query_recorder) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def merchant(db):
+    return make_merchant(db)
+
+
+@pytest.fixture
+def auth_headers(merchant):
+    return {"Authorization": f"Bearer {create_access_token({'sub': merchant.phone})}"}
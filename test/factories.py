@@ -0,0 +1,91 @@
+"""Row builders for tests. They flush but never commit; see conftest.py."""
+import itertools
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.merchant import Merchant
+from app.models.payment_confirmation import PaymentConfirmation
+from app.models.recurring_invoice import RecurringInvoice
+from app.models.whatsapp_message import WhatsAppMessage
+from app.utils.enums import InvoiceStatus, WhatsAppDirection, WhatsAppMessageStatus, WhatsAppMessageType
+
+_phones = itertools.count(9000000000)
+
+
+def next_phone() -> str:
+    return str(next(_phones))
+
+
+def make_merchant(db, **values) -> Merchant:
+    merchant = Merchant(business_name="Test Tuitions", phone=next_phone(), upi_id="test@upi", **values)
+    db.add(merchant)
+    db.flush()
+    return merchant
+
+
+def make_customer(db, merchant, **values) -> Customer:
+    values.setdefault("name", "Test Customer")
+    values.setdefault("phone", next_phone())
+    customer = Customer(merchant_id=merchant.id, **values)
+    db.add(customer)
+    db.flush()
+    return customer
+
+
+def make_invoice(db, customer, **values) -> Invoice:
+    values.setdefault("amount", Decimal("500.00"))
+    values.setdefault("due_date", date.today() + timedelta(days=7))
+    values.setdefault("status", InvoiceStatus.UNPAID.value)
+    invoice = Invoice(merchant_id=customer.merchant_id, customer_id=customer.id, **values)
+    db.add(invoice)
+    db.flush()
+    return invoice
+
+
+def make_whatsapp_message(db, invoice, **values) -> WhatsAppMessage:
+    values.setdefault("direction", WhatsAppDirection.OUTBOUND.value)
+    values.setdefault("message_type", WhatsAppMessageType.INVOICE.value)
+    values.setdefault("status", WhatsAppMessageStatus.SENT.value)
+    values.setdefault("message_text", "Invoice reminder")
+    message = WhatsAppMessage(
+        merchant_id=invoice.merchant_id, customer_id=invoice.customer_id, invoice_id=invoice.id, **values
+    )
+    db.add(message)
+    db.flush()
+    return message
+
+
+def make_recurring_invoice(db, customer, **values) -> RecurringInvoice:
+    values.setdefault("amount", Decimal("1000.00"))
+    values.setdefault("day_of_month", 5)
+    values.setdefault("start_date", date.today())
+    values.setdefault("next_generation_date", date.today() + timedelta(days=30))
+    template = RecurringInvoice(merchant_id=customer.merchant_id, customer_id=customer.id, **values)
+    db.add(template)
+    db.flush()
+    return template
+
+
+def make_payment_confirmation(db, invoice, **values) -> PaymentConfirmation:
+    values.setdefault("customer_message", "Paid via UPI")
+    values.setdefault("detected_intent", "paid")
+    values.setdefault("status", "pending")
+    confirmation = PaymentConfirmation(
+        merchant_id=invoice.merchant_id, customer_id=invoice.customer_id, invoice_id=invoice.id, **values
+    )
+    db.add(confirmation)
+    db.flush()
+    return confirmation
+
+
+def seed_customers_with_invoices(db, merchant, customers: int = 5, invoices_per_customer: int = 2):
+    """Several customers with several invoices each, for list endpoints."""
+    seeded = []
+    for _ in range(customers):
+        customer = make_customer(db, merchant)
+        seeded.append((customer, [make_invoice(db, customer) for _ in range(invoices_per_customer)]))
+    return seeded
+
+
@@ -0,0 +1,81 @@
+"""
+Maximum SQL statements per call of every endpoint in app/api/v1, per router.
+
+A budget must hold however many rows the endpoint reads, so list endpoints
+get a constant: one more statement per row is an N+1. Authenticated
+endpoints spend one statement on the merchant lookup. Raise a budget only
+together with the change that needs it, so the increase shows in review.
+"""
+from typing import Dict, Optional
+
+QUERY_BUDGETS: Dict[str, Dict[str, int]] = {
+    "auth": {
+        "POST /api/v1/auth/send-otp": 4,
+        "POST /api/v1/auth/verify-otp": 3,
+    },
+    "merchants": {
+        "POST /api/v1/merchants/register": 4,
+        "GET /api/v1/merchants/me": 1,
+        "PUT /api/v1/merchants/me": 3,
+        "GET /api/v1/merchants/dashboard": 5,
+    },
+    "customers": {
+        "POST /api/v1/customers": 3,
+        "GET /api/v1/customers": 3,
+        "GET /api/v1/customers/{customer_id}": 3,
+        "PUT /api/v1/customers/{customer_id}": 6,
+        "DELETE /api/v1/customers/{customer_id}": 5,
+        "GET /api/v1/customers/{customer_id}/invoices": 3,
+    },
+    "invoices": {
+        "POST /api/v1/invoices": 7,
+        "GET /api/v1/invoices": 2,
+        "GET /api/v1/invoices/{invoice_id}": 2,
+        "PUT /api/v1/invoices/{invoice_id}": 5,
+        "DELETE /api/v1/invoices/{invoice_id}": 3,
+        "GET /api/v1/invoices/{invoice_id}/whatsapp-messages": 3,
+        "POST /api/v1/invoices/{invoice_id}/mark-paid": 5,
+        "POST /api/v1/invoices/{invoice_id}/send-followup": 6,
+        "POST /api/v1/invoices/{invoice_id}/pause-reminder": 5,
+        "POST /api/v1/invoices/{invoice_id}/unpause-reminder": 5,
+        "GET /api/v1/invoices/public/{invoice_id}": 3,
+    },
+    "recurring_invoices": {
+        "POST /api/v1/recurring-invoices": 4,
+        "GET /api/v1/recurring-invoices": 2,
+        "GET /api/v1/recurring-invoices/forecast": 2,
+        "GET /api/v1/recurring-invoices/{template_id}": 2,
+        "PUT /api/v1/recurring-invoices/{template_id}": 4,
+        "DELETE /api/v1/recurring-invoices/{template_id}": 3,
+        "POST /api/v1/recurring-invoices/{template_id}/pause": 4,
+        "POST /api/v1/recurring-invoices/{template_id}/resume": 4,
+    },
+    "payment_confirmations": {
+        "GET /api/v1/payment-confirmations": 2,
+        "GET /api/v1/payment-confirmations/{confirmation_id}": 2,
+        "POST /api/v1/payment-confirmations/{confirmation_id}/approve": 7,
+        "POST /api/v1/payment-confirmations/{confirmation_id}/decline": 5,
+    },
+    "webhooks": {
+        "POST /api/v1/webhooks/whatsapp/status": 3,
+    },
+    "admin": {
+        "GET /api/v1/admin/profiling": 0,
+        "PUT /api/v1/admin/profiling": 0,
+        "DELETE /api/v1/admin/profiling": 0,
+    },
+    # Outside the API router
+    "app": {
+        "GET /": 0,
+        "GET /health": 0,
+        "GET /metrics": 0,
+    },
+}
+
+
+def budget_for(endpoint: str) -> Optional[int]:
+    """Budget of "METHOD /route/{template}", or None if none is declared."""
+    for budgets in QUERY_BUDGETS.values():
+        if endpoint in budgets:
+            return budgets[endpoint]
+    return None
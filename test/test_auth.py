@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+
+from app.models.auth import OTP
+from factories import make_merchant, next_phone
+
+
+def test_send_otp(client):
+    response = client.post("/api/v1/auth/send-otp", json={"phone": next_phone()})
+    assert response.status_code == 200
+
+
+def test_verify_otp_for_existing_merchant(client, db):
+    merchant = make_merchant(db)
+    db.add(OTP(
+        phone=merchant.phone,
+        otp_code="123456",
+        expires_at=datetime.utcnow() + timedelta(minutes=5),
+        is_verified="false",
+    ))
+
+    response = client.post("/api/v1/auth/verify-otp", json={"phone": merchant.phone, "otp_code": "123456"})
+
+    assert response.status_code == 200
+    assert response.json()["access_token"]
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from app.models.batch_job_run import BatchJobRun
+from app.services.batch_job_service import last_watermark, prune_job_runs
+from app.utils.enums import BatchJobRunStatus
+
+
+def _run(db, job_name, days_ago, status=BatchJobRunStatus.SUCCEEDED, watermark=None):
+    run = BatchJobRun(
+        job_name=job_name,
+        status=status.value,
+        started_at=datetime.utcnow() - timedelta(days=days_ago),
+        watermark=watermark,
+    )
+    db.add(run)
+    db.flush()
+    return run
+
+
+def test_prune_keeps_recent_runs_and_last_watermark(db):
+    recent = _run(db, "classify_inbound_messages", 1)
+    _run(db, "classify_inbound_messages", 40)
+    _run(db, "classify_inbound_messages", 45, status=BatchJobRunStatus.FAILED)
+    monthly = _run(db, "generate_recurring_invoices", 60, watermark="2026-08-20")
+    _run(db, "generate_recurring_invoices", 50, status=BatchJobRunStatus.FAILED)
+
+    assert prune_job_runs(db, retention_days=30) == 3
+
+    assert {run.id for run in db.query(BatchJobRun)} == {recent.id, monthly.id}
+    assert last_watermark(db, "generate_recurring_invoices") == "2026-08-20"
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import CacheNamespace, TwoTierCache
+from app.core.config import settings
+from app.services import cached_reads
+from factories import make_customer, make_invoice
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Enable the cache on an in-memory Redis."""
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(settings, "CACHE_ENABLED", True)
+    two_tier = TwoTierCache(fakeredis.FakeRedis())
+    monkeypatch.setattr(cache_module, "_cache", two_tier)
+    return two_tier
+
+
+def test_cached_profile_skips_queries(client, auth_headers, cache):
+    first = client.get("/api/v1/merchants/me", headers=auth_headers)
+    cache.clear_local()
+    second = client.get("/api/v1/merchants/me", headers=auth_headers)
+
+    assert second.json() == first.json()
+    assert len(first.sql_statements) == 1
+    # Answered by Redis
+    assert second.sql_statements == []
+
+
+def test_profile_update_invalidates(client, auth_headers, cache):
+    client.get("/api/v1/merchants/me", headers=auth_headers)
+
+    client.put("/api/v1/merchants/me", json={"business_city": "Pune"}, headers=auth_headers)
+    response = client.get("/api/v1/merchants/me", headers=auth_headers)
+
+    assert response.json()["business_city"] == "Pune"
+
+
+def test_mark_paid_invalidates_dashboard_and_balances(client, db, merchant, auth_headers, cache):
+    customer = make_customer(db, merchant)
+    invoice = make_invoice(db, customer, amount=500.0)
+    make_invoice(db, customer, amount=300.0)
+    assert client.get("/api/v1/merchants/dashboard", headers=auth_headers).json()["unpaid_invoices"] == 2
+    assert client.get(f"/api/v1/customers/{customer.id}", headers=auth_headers).json()["total_pending_amount"] == 800.0
+
+    client.post(f"/api/v1/invoices/{invoice.id}/mark-paid", headers=auth_headers)
+
+    assert client.get("/api/v1/merchants/dashboard", headers=auth_headers).json()["unpaid_invoices"] == 1
+    assert client.get(f"/api/v1/customers/{customer.id}", headers=auth_headers).json()["total_pending_amount"] == 300.0
+    public = client.get(f"/api/v1/invoices/public/{invoice.id}").json()
+    assert public["invoice"]["status"] == "PAID"
+
+
+def test_invalidation_during_load_wins(cache):
+    namespace = CacheNamespace("test_race", int, ttl_seconds=60)
+    loads = []
+
+    def load():
+        loads.append(len(loads))
+        if len(loads) == 1:
+            # A write commits while the first value is being computed
+            cache.invalidate("race")
+        return len(loads)
+
+    assert namespace.get_or_load("key", load, tags=["race"]) == 1
+    assert namespace.get_or_load("key", load, tags=["race"]) == 2
+    assert namespace.get_or_load("key", load, tags=["race"]) == 2
+    assert namespace.hit_ratio() == pytest.approx(1 / 3)
+
+
+def test_disabled_cache_calls_loader(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+
+    assert cached_reads.customer_balance.get_or_load("key", lambda: 1.5) == 1.5
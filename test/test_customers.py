@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.recurring_invoice import RecurringInvoice
+from app.models.whatsapp_message import WhatsAppMessage
+from app.utils.enums import InvoiceStatus, WhatsAppDirection, WhatsAppMessageStatus, WhatsAppMessageType
+from factories import make_customer, make_invoice, make_recurring_invoice, next_phone, seed_customers_with_invoices
+
+
+def test_create_customer(client, auth_headers):
+    response = client.post(
+        "/api/v1/customers", json={"name": "Asha", "phone": next_phone()}, headers=auth_headers
+    )
+    assert response.status_code == 201
+
+
+def test_list_customers_with_pending_amounts(client, db, merchant, auth_headers):
+    seed_customers_with_invoices(db, merchant, customers=5, invoices_per_customer=2)
+    paid_up = make_customer(db, merchant)
+    make_invoice(db, paid_up, status=InvoiceStatus.PAID.value)
+
+    response = client.get("/api/v1/customers", headers=auth_headers)
+
+    assert response.status_code == 200
+    pending = {customer["id"]: customer["total_pending_amount"] for customer in response.json()}
+    assert len(pending) == 6
+    assert pending[str(paid_up.id)] == 0.0
+    assert sorted(pending.values())[-1] == float(Decimal("1000.00"))
+
+
+def test_get_update_and_delete_customer(client, db, merchant, auth_headers):
+    customer = make_customer(db, merchant)
+    url = f"/api/v1/customers/{customer.id}"
+
+    assert client.get(url, headers=auth_headers).json()["total_pending_amount"] == 0.0
+    assert client.put(url, json={"section": "B"}, headers=auth_headers).json()["section"] == "B"
+    assert client.delete(url, headers=auth_headers).status_code == 204
+
+
+def test_customer_with_invoices_is_not_deleted(client, db, merchant, auth_headers):
+    customer = make_customer(db, merchant)
+    customer_id = customer.id
+    make_recurring_invoice(db, customer)
+    invoice = make_invoice(db, customer, status=InvoiceStatus.PAID.value)
+    invoice_id = invoice.id
+
+    response = client.delete(f"/api/v1/customers/{customer_id}", headers=auth_headers)
+
+    assert response.status_code == 400
+    assert db.get(Customer, customer_id) is not None
+    assert db.get(Invoice, invoice_id) is not None
+
+
+def test_delete_customer_keeps_messages(client, db, merchant, auth_headers):
+    customer = make_customer(db, merchant)
+    customer_id = customer.id
+    make_recurring_invoice(db, customer)
+    message = WhatsAppMessage(
+        merchant_id=merchant.id,
+        customer_id=customer_id,
+        direction=WhatsAppDirection.INBOUND.value,
+        message_type=WhatsAppMessageType.CUSTOMER_MESSAGE.value,
+        status=WhatsAppMessageStatus.RECEIVED.value,
+        message_text="hello",
+    )
+    db.add(message)
+    db.flush()
+    message_id = message.id
+
+    assert client.delete(f"/api/v1/customers/{customer_id}", headers=auth_headers).status_code == 204
+
+    db.expire_all()
+    assert db.get(Customer, customer_id) is None
+    assert db.query(RecurringInvoice).filter(RecurringInvoice.customer_id == customer_id).count() == 0
+    assert db.get(WhatsAppMessage, message_id).customer_id is None
+
+
+def test_customer_invoices(client, db, merchant, auth_headers):
+    customer = make_customer(db, merchant)
+    for _ in range(5):
+        make_invoice(db, customer)
+
+    response = client.get(f"/api/v1/customers/{customer.id}/invoices", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
@@ -0,0 +1,130 @@
+from argparse import Namespace
+
+import pytest
+
+from app.models.dead_letter_message import DeadLetterMessage
+from app.models.outbox_message import OutboxMessage
+from app.models.whatsapp_message import WhatsAppMessage
+from app.services import dead_letter_service
+from app.services.dead_letter_service import discard_dead_letters, query_dead_letters, replay_dead_letters
+from app.services.whatsapp_provider import ProviderUnavailableError
+from app.tasks import whatsapp
+from app.utils.enums import DeadLetterStatus, WhatsAppMessageStatus
+from batch_jobs import dead_letters as dead_letters_cli
+from factories import make_customer, make_invoice, make_whatsapp_message
+
+
+class _SharedSession:
+    """The test session handed to code that opens and closes its own."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(dead_letter_service, "get_redis", lambda: client)
+    return client
+
+
+@pytest.fixture
+def message(db, merchant):
+    invoice = make_invoice(db, make_customer(db, merchant))
+    return make_whatsapp_message(db, invoice, status=WhatsAppMessageStatus.PENDING.value)
+
+
+def _dead_letter(db, message, **values):
+    dead_letter = DeadLetterMessage(
+        merchant_id=message.merchant_id,
+        whatsapp_message_id=message.id,
+        task_name=whatsapp.send_whatsapp_message.name,
+        args=["9000000000", message.message_text],
+        kwargs={"whatsapp_message_id": str(message.id)},
+        queue="interactive",
+        error_type="ProviderUnavailableError",
+        error="provider down",
+        **values,
+    )
+    db.add(dead_letter)
+    db.flush()
+    return dead_letter
+
+
+def test_final_send_failure_is_dead_lettered(db, message, fake_redis, monkeypatch):
+    monkeypatch.setattr(whatsapp, "SessionLocal", lambda: _SharedSession(db))
+    task = whatsapp.send_whatsapp_message
+    args, kwargs = ["9000000000", message.message_text], {"whatsapp_message_id": str(message.id)}
+
+    for attempt in range(2):
+        task.on_retry(ProviderUnavailableError(f"attempt {attempt}"), "task-1", args, kwargs, None)
+    task.on_failure(ProviderUnavailableError("still down"), "task-1", args, kwargs, None)
+
+    dead_letter = db.query(DeadLetterMessage).filter(DeadLetterMessage.whatsapp_message_id == message.id).one()
+    assert (dead_letter.status, dead_letter.merchant_id) == (DeadLetterStatus.PENDING.value, message.merchant_id)
+    assert (dead_letter.error_type, dead_letter.error) == ("ProviderUnavailableError", "still down")
+    assert dead_letter.attempt_count == 3
+    assert db.get(WhatsAppMessage, message.id).status == WhatsAppMessageStatus.FAILED.value
+    # The attempt history moved from Redis to the row
+    assert fake_redis.exists(dead_letter_service.ATTEMPTS_KEY.format(task_id="task-1")) == 0
+
+
+def test_replay_requeues_through_the_outbox(db, message):
+    message.status = WhatsAppMessageStatus.FAILED.value
+    dead_letter = _dead_letter(db, message)
+
+    assert replay_dead_letters(db, [dead_letter]) == 1
+
+    row = db.query(OutboxMessage).filter(OutboxMessage.merchant_id == message.merchant_id).one()
+    assert (row.task_name, row.args, row.kwargs, row.queue) == (
+        dead_letter.task_name, dead_letter.args, dead_letter.kwargs, "interactive"
+    )
+    assert (dead_letter.status, dead_letter.replay_count) == (DeadLetterStatus.REPLAYED.value, 1)
+    db.expire_all()
+    assert db.get(WhatsAppMessage, message.id).status == WhatsAppMessageStatus.PENDING.value
+
+
+def test_discard_marks_dead_letters_handled(db, message):
+    dead_letter = _dead_letter(db, message)
+
+    assert discard_dead_letters(db, [dead_letter]) == 1
+
+    assert dead_letter.status == DeadLetterStatus.DISCARDED.value
+    assert db.query(OutboxMessage).filter(OutboxMessage.merchant_id == message.merchant_id).count() == 0
+    assert query_dead_letters(db, merchant_id=message.merchant_id).count() == 0
+
+
+def _cli_args(merchant_id, status, limit=None):
+    return Namespace(merchant_id=merchant_id, error=None, since=None, status=status, limit=limit, batch_size=2, rate=0)
+
+
+def test_cli_discards_in_batches(db, message, capsys):
+    dead_letters = [_dead_letter(db, message) for _ in range(3)]
+
+    code = dead_letters_cli._process_in_batches(
+        db, _cli_args(message.merchant_id, "PENDING"), discard_dead_letters, "Discarded", DeadLetterStatus.DISCARDED
+    )
+
+    assert code == 0
+    assert {dead_letter.status for dead_letter in dead_letters} == {DeadLetterStatus.DISCARDED.value}
+    assert "Discarded 3 dead letters." in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("status", ["DISCARDED", "REPLAYED", "ALL"])
+def test_cli_refuses_filters_that_would_never_drain(db, message, status, capsys):
+    dead_letter = _dead_letter(db, message, status=DeadLetterStatus.DISCARDED.value)
+
+    code = dead_letters_cli._process_in_batches(
+        db, _cli_args(message.merchant_id, status), discard_dead_letters, "Discarded", DeadLetterStatus.DISCARDED
+    )
+
+    assert code == 1
+    assert "can be discarded" in capsys.readouterr().err
+    assert dead_letter.status == DeadLetterStatus.DISCARDED.value
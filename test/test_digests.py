@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from app.models.outbox_message import OutboxMessage
+from app.models.whatsapp_message import WhatsAppMessage
+from app.services.digest_service import coalesce_due_messages
+from app.services.outbox_service import whatsapp_outbox_values
+from app.utils.enums import InvoiceStatus, WhatsAppMessageStatus, WhatsAppMessageType
+from factories import make_customer, make_invoice, make_whatsapp_message
+
+
+def _queue_reminders(db, merchant, invoice_count):
+    """Reminders of several invoices to one customer whose digest window has elapsed."""
+    customer = make_customer(db, merchant)
+    invoices = []
+    for _ in range(invoice_count):
+        invoice = make_invoice(db, customer)
+        message = make_whatsapp_message(db, invoice, status=WhatsAppMessageStatus.PENDING.value)
+        values = whatsapp_outbox_values(message.id, merchant.id, customer.id, message.message_text, customer.phone)
+        values.update(coalesce_key=f"{merchant.id}:{customer.id}", available_at=datetime.utcnow() - timedelta(minutes=1))
+        db.add(OutboxMessage(**values))
+        invoices.append(invoice)
+    db.flush()
+    return invoices
+
+
+def test_digest_lists_only_unpaid_invoices(db, merchant):
+    paid, deleted, *due = _queue_reminders(db, merchant, 4)
+    paid.status = InvoiceStatus.PAID.value
+    deleted.deleted_at = datetime.utcnow()
+    db.flush()
+
+    result = coalesce_due_messages(db)
+
+    assert (result.digests, result.merged, result.cancelled) == (1, 2, 2)
+    digest = db.query(WhatsAppMessage).filter(WhatsAppMessage.message_type == WhatsAppMessageType.DIGEST.value).one()
+    assert digest.message_text.startswith("You have 2 pending invoices")
+    statuses = {message.invoice_id: message.status for message in db.query(WhatsAppMessage).filter(
+        WhatsAppMessage.invoice_id.isnot(None)
+    )}
+    assert statuses[paid.id] == statuses[deleted.id] == WhatsAppMessageStatus.CANCELLED.value
+    assert db.query(OutboxMessage).count() == 1  # The digest's send
+
+
+def test_nothing_sent_when_every_invoice_is_settled(db, merchant):
+    for invoice in _queue_reminders(db, merchant, 2):
+        invoice.status = InvoiceStatus.PAID.value
+    db.flush()
+
+    result = coalesce_due_messages(db)
+
+    assert (result.digests, result.released, result.cancelled) == (0, 0, 2)
+    assert db.query(OutboxMessage).count() == 0
+
+
+def test_invoice_and_followup_reminders_are_merged(client, db, merchant, auth_headers):
+    customer = make_customer(db, merchant)
+    first = client.post(
+        "/api/v1/invoices", json={"customer_id": str(customer.id), "amount": 500, "due_date": "2026-12-01"},
+        headers=auth_headers,
+    ).json()
+    client.post(
+        "/api/v1/invoices", json={"customer_id": str(customer.id), "amount": 700, "due_date": "2026-12-01"},
+        headers=auth_headers,
+    )
+    client.post(f"/api/v1/invoices/{first['id']}/send-followup", headers=auth_headers)
+
+    rows = db.query(OutboxMessage).filter(OutboxMessage.merchant_id == merchant.id).all()
+    assert len(rows) == 3
+    assert {row.coalesce_key for row in rows} == {f"{merchant.id}:{customer.id}"}
+    for row in rows:
+        row.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.flush()
+
+    result = coalesce_due_messages(db)
+
+    assert (result.digests, result.merged) == (1, 3)
+    digest = db.query(WhatsAppMessage).filter(WhatsAppMessage.message_type == WhatsAppMessageType.DIGEST.value).one()
+    assert digest.message_text.startswith("You have 2 pending invoices")
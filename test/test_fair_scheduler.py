@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import redis
+from sqlalchemy import text
+
+from app.celery_app import celery_app
+from app.core import redis as redis_module
+from app.core.config import settings
+from app.models.outbox_message import OutboxMessage
+from app.services import outbox_service
+from app.services.fair_scheduler import fair_share_order, plan_weight
+from factories import make_merchant
+
+
+def _enqueue(db, merchant, count, queue="bulk"):
+    start = datetime.utcnow() - timedelta(minutes=5)
+    rows = [
+        OutboxMessage(
+            merchant_id=merchant.id if merchant else None,
+            task_name="app.tasks.whatsapp.send_whatsapp_message",
+            queue=queue,
+            available_at=start + timedelta(seconds=n),
+        )
+        for n in range(count)
+    ]
+    db.add_all(rows)
+    db.flush()
+    return rows
+
+
+def test_queue_depth_is_read_from_the_broker(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://cache-host:6379/0")
+    monkeypatch.setattr(settings, "CELERY_BROKER_URL", "redis://broker-host:6379/3")
+    monkeypatch.setattr(redis_module, "_client", None)
+    monkeypatch.setattr(redis_module, "_broker_client", None)
+
+    connection = redis_module.get_broker_redis().connection_pool.connection_kwargs
+
+    assert (connection["host"], connection["db"]) == ("broker-host", 3)
+
+
+def test_small_tenant_is_not_stuck_behind_a_backlog():
+    order = fair_share_order({"big": [f"big-{n}" for n in range(100)], "small": ["small-0", "small-1"]}, {})
+
+    assert order[:4] == ["big-0", "small-0", "big-1", "small-1"]
+    assert order[4:] == [f"big-{n}" for n in range(2, 100)]
+
+
+def test_weights_give_proportional_slots():
+    order = fair_share_order({"trial": ["t"] * 10, "pro": ["p"] * 10}, {"trial": 1, "pro": 4})
+
+    # Ties go to the tenant listed first; pro then gets four slots per trial slot
+    assert "".join(order[:10]) == "tpppptpppp"
+    assert order.count("p") == order.count("t") == 10
+
+
+def test_each_tenant_keeps_its_own_order():
+    order = fair_share_order({"a": [1, 2, 3], "b": [10, 20]}, {"a": 2, "b": 0})
+
+    assert [item for item in order if item < 10] == [1, 2, 3]
+    assert [item for item in order if item >= 10] == [10, 20]
+
+
+def test_plan_weight(monkeypatch):
+    monkeypatch.setattr(settings, "FAIR_SHARE_PLAN_WEIGHTS", {"trial": 1, "pro": 4, "broken": 0})
+
+    assert (plan_weight("pro"), plan_weight(None), plan_weight("unknown"), plan_weight("broken")) == (4, 1, 1, 1)
+
+
+def test_claim_takes_a_weighted_quantum_from_each_merchant(db, monkeypatch):
+    monkeypatch.setattr(settings, "FAIR_SHARE_QUANTUM", 3)
+    big = make_merchant(db, plan="trial")
+    pro = make_merchant(db, plan="pro")
+    big_rows = _enqueue(db, big, 50)
+    pro_rows = _enqueue(db, pro, 50)
+    unowned = _enqueue(db, None, 5)
+
+    claimed = [row for row, _ in outbox_service.claim_outbox_batch(db, 100)]
+
+    assert [row for row in claimed if row.merchant_id == big.id] == big_rows[:3]
+    assert [row for row in claimed if row.merchant_id == pro.id] == pro_rows[:12]
+    assert [row for row in claimed if row.merchant_id is None] == unowned[:3]
+    # Heads of every backlog come first
+    assert {row.merchant_id for row in claimed[:3]} == {big.id, pro.id, None}
+
+
+def test_claim_skips_rows_not_yet_available(db):
+    merchant = make_merchant(db)
+    ready = _enqueue(db, merchant, 2)
+    later = _enqueue(db, merchant, 1)[0]
+    later.available_at = datetime.utcnow() + timedelta(minutes=5)
+    db.flush()
+
+    assert [row for row, _ in outbox_service.claim_outbox_batch(db, 100)] == ready
+
+
+class _DownBroker:
+    def llen(self, queue):
+        raise redis.ConnectionError("broker is down")
+
+
+def test_unreadable_broker_backs_off_instead_of_raising(db, monkeypatch):
+    monkeypatch.setattr(outbox_service, "get_broker_redis", lambda: _DownBroker())
+
+    def send_task(*args, **kwargs):
+        raise ConnectionError("broker is down")
+
+    monkeypatch.setattr(celery_app, "send_task", send_task)
+    rows = _enqueue(db, make_merchant(db), 2)
+
+    result = outbox_service.relay_outbox_batch(db, batch_size=10)
+
+    assert (result.claimed, result.published, result.failed) == (2, 0, 2)
+    assert all(row.attempts == 1 and row.available_at > datetime.utcnow() for row in rows)
+
+
+def test_enqueued_task_is_claimable_whatever_the_session_timezone(db):
+    # NOW() in a session ahead of UTC would date the row hours into the future
+    db.execute(text("SET LOCAL TIME ZONE 'Asia/Kolkata'"))
+    merchant = make_merchant(db)
+    row = outbox_service.enqueue_task(db, "app.tasks.whatsapp.send_whatsapp_message", merchant_id=merchant.id)
+    db.flush()
+
+    assert [claimed for claimed, _ in outbox_service.claim_outbox_batch(db, 10)] == [row]
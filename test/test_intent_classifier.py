@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.models.payment_confirmation import PaymentConfirmation
+from app.models.whatsapp_message import WhatsAppMessage
+from app.services.inbound_message_service import classify_inbound_messages
+from app.services.intent_classifier import (
+    CachingIntentClassifier,
+    IntentClassifier,
+    KeywordIntentClassifier,
+    normalize_text,
+)
+from app.utils.enums import PaymentIntent, WhatsAppDirection, WhatsAppMessageStatus, WhatsAppMessageType
+from factories import make_customer
+
+
+def test_classifier_without_classify_batch_cannot_be_created():
+    class IncompleteClassifier(IntentClassifier):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteClassifier()
+
+
+def test_cached_batch_keeps_order_and_classifies_each_text_once():
+    classifier = CachingIntentClassifier(KeywordIntentClassifier())
+    texts = [normalize_text(text) for text in ("Paid via GPay", "will pay tomorrow", "Paid via GPay")]
+
+    predictions = classifier.classify_batch(texts)
+
+    assert [prediction.intent for prediction in predictions] == [
+        PaymentIntent.PAID.value, PaymentIntent.WILL_PAY_LATER.value, PaymentIntent.PAID.value
+    ]
+    assert (classifier.hits, classifier.misses) == (1, 2)
+
+
+@pytest.mark.parametrize("text", [
+    "Payment not done",
+    "payment is not done yet",
+    "not paid yet",
+    "I haven't paid",
+    "didn't send the money",
+    "paid nahi hua",
+])
+def test_negated_payment_claims_are_not_paid(text):
+    prediction = KeywordIntentClassifier().classify(normalize_text(text))
+
+    assert prediction.intent != PaymentIntent.PAID.value
+
+
+@pytest.mark.parametrize("text", ["Paid via GPay", "Payment done", "UTR 412345678901", "bhej diya"])
+def test_payment_claims_clear_confirmation_threshold(text):
+    prediction = KeywordIntentClassifier().classify(normalize_text(text))
+
+    assert prediction.intent == PaymentIntent.PAID.value
+    assert prediction.confidence >= Decimal(str(settings.INTENT_CONFIRMATION_MIN_CONFIDENCE))
+
+
+@pytest.mark.parametrize("text", ["ok done", "settled", "upi"])
+def test_ambiguous_phrases_stay_below_confirmation_threshold(text):
+    prediction = KeywordIntentClassifier().classify(normalize_text(text))
+
+    assert prediction.confidence < Decimal(str(settings.INTENT_CONFIRMATION_MIN_CONFIDENCE))
+
+
+def test_only_confident_payment_claims_create_confirmations(db, merchant):
+    customer = make_customer(db, merchant)
+    for text in ("Paid via GPay", "ok done", "Payment not done"):
+        db.add(WhatsAppMessage(
+            merchant_id=merchant.id,
+            customer_id=customer.id,
+            direction=WhatsAppDirection.INBOUND.value,
+            message_type=WhatsAppMessageType.CUSTOMER_MESSAGE.value,
+            status=WhatsAppMessageStatus.RECEIVED.value,
+            message_text=text,
+        ))
+    db.flush()
+
+    result = classify_inbound_messages(db, classifier=KeywordIntentClassifier())
+
+    assert result.classified == 3
+    assert result.confirmations_created == 1
+    confirmations = db.query(PaymentConfirmation).filter(PaymentConfirmation.merchant_id == merchant.id).all()
+    assert [confirmation.customer_message for confirmation in confirmations] == ["Paid via GPay"]
@@ -0,0 +1,57 @@
+from factories import make_customer, make_invoice, make_whatsapp_message, seed_customers_with_invoices
+
+
+def test_create_invoice(client, db, merchant, auth_headers):
+    customer = make_customer(db, merchant)
+
+    response = client.post(
+        "/api/v1/invoices", json={"customer_id": str(customer.id), "amount": "750.00"}, headers=auth_headers
+    )
+
+    assert response.status_code == 201
+
+
+def test_list_invoices(client, db, merchant, auth_headers):
+    seed_customers_with_invoices(db, merchant, customers=5, invoices_per_customer=2)
+
+    response = client.get("/api/v1/invoices", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 10
+    assert all(invoice["customer_name"] for invoice in response.json())
+
+
+def test_get_invoice_with_messages(client, db, merchant, auth_headers):
+    invoice = make_invoice(db, make_customer(db, merchant))
+    for _ in range(3):
+        make_whatsapp_message(db, invoice)
+
+    assert client.get(f"/api/v1/invoices/{invoice.id}", headers=auth_headers).status_code == 200
+    response = client.get(f"/api/v1/invoices/{invoice.id}/whatsapp-messages", headers=auth_headers)
+    assert len(response.json()) == 3
+
+
+def test_update_and_delete_invoice(client, db, merchant, auth_headers):
+    invoice = make_invoice(db, make_customer(db, merchant))
+    url = f"/api/v1/invoices/{invoice.id}"
+
+    assert client.put(url, json={"description": "June fees"}, headers=auth_headers).status_code == 200
+    assert client.delete(url, headers=auth_headers).status_code == 204
+
+
+def test_invoice_actions(client, db, merchant, auth_headers):
+    invoice = make_invoice(db, make_customer(db, merchant))
+    url = f"/api/v1/invoices/{invoice.id}"
+
+    assert client.post(f"{url}/send-followup", headers=auth_headers).status_code == 201
+    assert client.post(f"{url}/pause-reminder", headers=auth_headers).status_code == 200
+    assert client.post(f"{url}/unpause-reminder", headers=auth_headers).status_code == 200
+    assert client.post(f"{url}/mark-paid", headers=auth_headers).status_code == 200
+
+
+def test_public_invoice(client, db, merchant):
+    invoice = make_invoice(db, make_customer(db, merchant))
+
+    response = client.get(f"/api/v1/invoices/public/{invoice.id}")
+
+    assert response.status_code == 200
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from app.models.auth import OTP
+from factories import make_payment_confirmation, next_phone, seed_customers_with_invoices
+
+
+def test_register(client, db):
+    phone = next_phone()
+    db.add(OTP(
+        phone=phone,
+        otp_code="123456",
+        expires_at=datetime.utcnow() + timedelta(minutes=5),
+        is_verified="true",
+    ))
+
+    response = client.post("/api/v1/merchants/register", json={"business_name": "New Tuitions", "phone": phone})
+
+    assert response.status_code == 201
+
+
+def test_get_and_update_profile(client, auth_headers):
+    assert client.get("/api/v1/merchants/me", headers=auth_headers).status_code == 200
+
+    response = client.put("/api/v1/merchants/me", json={"business_city": "Pune"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["business_city"] == "Pune"
+
+
+def test_dashboard(client, db, merchant, auth_headers):
+    for _, invoices in seed_customers_with_invoices(db, merchant):
+        make_payment_confirmation(db, invoices[0])
+
+    response = client.get("/api/v1/merchants/dashboard", headers=auth_headers)
+
+    assert response.status_code == 200
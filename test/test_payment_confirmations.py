@@ -0,0 +1,21 @@
+from factories import make_payment_confirmation, seed_customers_with_invoices
+
+
+def test_list_confirmations(client, db, merchant, auth_headers):
+    for _, invoices in seed_customers_with_invoices(db, merchant):
+        make_payment_confirmation(db, invoices[0])
+
+    response = client.get("/api/v1/payment-confirmations", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+
+def test_approve_and_decline(client, db, merchant, auth_headers):
+    (_, (first, second)), = seed_customers_with_invoices(db, merchant, customers=1)
+    approve = make_payment_confirmation(db, first)
+    decline = make_payment_confirmation(db, second)
+
+    assert client.get(f"/api/v1/payment-confirmations/{approve.id}", headers=auth_headers).status_code == 200
+    assert client.post(f"/api/v1/payment-confirmations/{approve.id}/approve", headers=auth_headers).status_code == 200
+    assert client.post(f"/api/v1/payment-confirmations/{decline.id}/decline", headers=auth_headers).status_code == 200
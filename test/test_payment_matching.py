@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from app.services.payment_matching_service import (
+    CandidateInvoice,
+    MerchantInvoiceIndex,
+    extract_amounts,
+    match_confirmation,
+    match_confirmations,
+)
+from factories import make_customer, make_invoice, make_payment_confirmation
+
+NOW = datetime(2026, 3, 15, 12, 0)
+
+
+def _invoice(customer_id, amount, age_days=0):
+    return CandidateInvoice(uuid4(), customer_id, Decimal(amount), NOW - timedelta(days=age_days))
+
+
+def test_extract_amounts():
+    assert extract_amounts("Paid ₹1,500.50 via UPI ref 412345678901") == [Decimal("1500.50")]
+    assert extract_amounts("sent 500 and 250") == [Decimal("500"), Decimal("250")]
+    assert extract_amounts(None) == []
+
+
+def test_extract_amounts_ignores_dates():
+    assert extract_amounts("paid 5000 on 12/03") == [Decimal("5000")]
+    assert extract_amounts("paid 5000 on 12-03-2026") == [Decimal("5000")]
+    assert extract_amounts("paid 5000 on 12.03.2026") == [Decimal("5000")]
+    assert extract_amounts("transferred on 2026-03-12") == []
+    assert extract_amounts("Rs 12.03 paid") == [Decimal("12.03")]
+
+
+def test_matches_senders_invoice_by_amount():
+    customer = uuid4()
+    wanted = _invoice(customer, "5000", age_days=10)
+    index = MerchantInvoiceIndex([wanted, _invoice(customer, "800", age_days=10)])
+
+    match = match_confirmation(index, customer, "paid 5000", NOW)
+
+    assert match.invoice_id == wanted.id
+    assert match.confidence >= Decimal("0.5")
+
+
+def test_known_sender_never_matches_another_customers_invoice():
+    sender, other = uuid4(), uuid4()
+    own = _invoice(sender, "1200", age_days=200)
+    index = MerchantInvoiceIndex([own, _invoice(other, "5000")])
+
+    assert match_confirmation(index, sender, "paid 5000", NOW).invoice_id == own.id
+    assert match_confirmation(index, uuid4(), "paid 5000", NOW) is None
+
+
+def test_unknown_sender_matches_by_amount():
+    invoice = _invoice(uuid4(), "5000")
+    index = MerchantInvoiceIndex([invoice, _invoice(uuid4(), "700")])
+
+    match = match_confirmation(index, None, "paid 5000", NOW)
+
+    assert match.invoice_id == invoice.id
+
+
+def test_date_does_not_pick_invoice_by_amount():
+    customer = uuid4()
+    index = MerchantInvoiceIndex([_invoice(customer, "12", age_days=90), _invoice(customer, "3", age_days=90)])
+
+    assert match_confirmation(index, customer, "paid on 12/03", NOW) is None
+
+
+def test_match_confirmations_stays_within_customer(db, merchant):
+    sender = make_customer(db, merchant)
+    other = make_customer(db, merchant)
+    make_invoice(db, other, amount=Decimal("5000.00"))
+    confirmation = make_payment_confirmation(db, make_invoice(db, sender, status="PAID"), customer_message="paid 5000")
+    confirmation.invoice_id = None
+
+    assert match_confirmations(db, [confirmation]) == 0
+    assert confirmation.invoice_id is None
+
+    own = make_invoice(db, sender, amount=Decimal("1200.00"))
+
+    assert match_confirmations(db, [confirmation]) == 1
+    assert confirmation.invoice_id == own.id
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, RedisCircuitBreaker
+from app.core.config import settings
+from app.core.rate_limit import RedisTokenBucket
+from app.tasks import whatsapp
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis()
+
+
+def test_token_bucket_allows_a_burst_then_waits(fake_redis):
+    bucket = RedisTokenBucket("ratelimit:test", rate=2, capacity=3, redis_client=fake_redis)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    wait = bucket.try_acquire()
+
+    assert 0 < wait <= 0.5  # One token every 1 / rate seconds
+
+
+def test_token_bucket_refills_over_time(fake_redis):
+    bucket = RedisTokenBucket("ratelimit:test", rate=2, capacity=3, redis_client=fake_redis)
+    for _ in range(3):
+        bucket.try_acquire()
+
+    # One second ago: two tokens have been refilled since
+    refilled_at = int(fake_redis.hget(bucket.key, "ts")) - 1000
+    fake_redis.hset(bucket.key, "ts", refilled_at)
+
+    assert [bucket.try_acquire() for _ in range(2)] == [0, 0]
+    assert bucket.try_acquire() > 0
+
+
+def _breaker(fake_redis):
+    return RedisCircuitBreaker("test", failure_threshold=3, failure_window=60, reset_timeout=30, redis_client=fake_redis)
+
+
+def _reset_timeout_lapses(breaker):
+    breaker.redis.delete(breaker.open_key)
+
+
+def test_breaker_opens_at_the_failure_threshold(fake_redis):
+    breaker = _breaker(fake_redis)
+
+    assert [breaker.record_failure() for _ in range(3)] == [False, False, True]
+    assert breaker.state() == OPEN
+    assert not breaker.allow_request()
+    assert breaker.opened_total() == 1
+
+
+def test_half_open_breaker_lets_one_probe_through_and_closes_on_success(fake_redis):
+    breaker = _breaker(fake_redis)
+    for _ in range(3):
+        breaker.record_failure()
+    _reset_timeout_lapses(breaker)
+
+    assert breaker.state() == HALF_OPEN
+    assert [breaker.allow_request(), breaker.allow_request()] == [True, False]
+    assert breaker.record_success()
+    assert breaker.state() == CLOSED
+    assert breaker.failures() == 0
+
+
+def test_failed_probe_reopens_the_breaker(fake_redis):
+    breaker = _breaker(fake_redis)
+    for _ in range(3):
+        breaker.record_failure()
+    _reset_timeout_lapses(breaker)
+    assert breaker.allow_request()
+
+    # Re-opening an open breaker does not count as a new opening
+    assert not breaker.record_failure()
+    assert breaker.state() == OPEN
+    assert breaker.opened_total() == 1
+
+
+def test_success_while_closed_keeps_counting_failures(fake_redis):
+    breaker = _breaker(fake_redis)
+    breaker.record_failure()
+
+    assert not breaker.record_success()
+    assert breaker.state() == CLOSED
+    assert breaker.failures() == 1
+
+
+class _ClosedBreaker:
+    def allow_request(self):
+        return True
+
+
+class _EmptyBucket:
+    def acquire(self, timeout):
+        return False
+
+
+def test_rate_limited_send_waits_on_the_send_schedule(monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(whatsapp, "get_provider_breaker", lambda: _ClosedBreaker())
+    monkeypatch.setattr(whatsapp, "get_provider_rate_limiter", lambda: _EmptyBucket())
+    monkeypatch.setattr(whatsapp, "schedule_task", lambda *args, **kwargs: scheduled.append(args))
+    monkeypatch.setattr(whatsapp, "send_whatsapp_text", lambda *args: pytest.fail("sent without a token"))
+
+    whatsapp.send_whatsapp_message("9000000000", "Invoice reminder", whatsapp_message_id="message-1")
+
+    (task_name, args, kwargs, _, due_at), = scheduled
+    assert (task_name, args, kwargs) == (
+        whatsapp.send_whatsapp_message.name, ["9000000000", "Invoice reminder"], {"whatsapp_message_id": "message-1"}
+    )
+    wait = timedelta(seconds=settings.WHATSAPP_RATE_LIMIT_MAX_WAIT_SECONDS)
+    assert datetime.utcnow() < due_at <= datetime.utcnow() + wait
@@ -0,0 +1,26 @@
+from fastapi.routing import APIRoute
+
+from query_budgets import QUERY_BUDGETS, budget_for
+
+
+def _endpoints(app):
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            for method in route.methods:
+                yield f"{method} {route.path_format}"
+
+
+def test_every_endpoint_has_a_budget(api_app):
+    missing = sorted(endpoint for endpoint in _endpoints(api_app) if budget_for(endpoint) is None)
+    assert not missing, f"Declare query budgets in test/query_budgets.py for: {missing}"
+
+
+def test_no_budget_for_removed_endpoints(api_app):
+    endpoints = set(_endpoints(api_app))
+    stale = sorted(
+        endpoint
+        for budgets in QUERY_BUDGETS.values()
+        for endpoint in budgets
+        if endpoint not in endpoints
+    )
+    assert not stale, f"Remove budgets of endpoints that no longer exist: {stale}"
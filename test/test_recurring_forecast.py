@@ -0,0 +1,118 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from app.services.recurring_forecast_service import TemplateColumns, forecast_monthly_revenue
+
+
+def _templates(*rows):
+    """Build template columns from (next_generation_date, day_of_month, amount_paise, end_date) rows."""
+    next_dates, days, amounts, end_dates = zip(*rows) if rows else ((), (), (), ())
+    return TemplateColumns(
+        next_generation_dates=np.array(next_dates, dtype="datetime64[D]"),
+        days_of_month=np.array(days, dtype=np.int64),
+        amounts_paise=np.array(amounts, dtype=np.int64),
+        end_dates=np.array([d if d is not None else "NaT" for d in end_dates], dtype="datetime64[D]"),
+    )
+
+
+def _counts(forecast):
+    return [month.invoice_count for month in forecast]
+
+
+def test_no_templates_forecasts_empty_months():
+    forecast = forecast_monthly_revenue(_templates(), date(2026, 1, 10), months=3)
+
+    assert [month.month for month in forecast] == [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)]
+    assert _counts(forecast) == [0, 0, 0]
+    assert all(month.projected_amount == 0 for month in forecast)
+
+
+def test_open_ended_template_generates_every_month():
+    forecast = forecast_monthly_revenue(
+        _templates((date(2026, 1, 15), 15, 123_45, None)), date(2026, 1, 10), months=4
+    )
+
+    assert _counts(forecast) == [1, 1, 1, 1]
+    assert [month.projected_amount for month in forecast] == [Decimal("123.45")] * 4
+
+
+def test_overdue_template_generates_this_month():
+    forecast = forecast_monthly_revenue(
+        _templates((date(2025, 11, 5), 5, 100_00, None)), date(2026, 1, 10), months=2
+    )
+
+    assert _counts(forecast) == [1, 1]
+
+
+def test_future_start_skips_earlier_months():
+    forecast = forecast_monthly_revenue(
+        _templates((date(2026, 3, 1), 1, 100_00, None)), date(2026, 1, 10), months=4
+    )
+
+    assert _counts(forecast) == [0, 0, 1, 1]
+
+
+def test_day_31_is_clamped_to_month_end():
+    # February's period falls on the 28th, so an end date of the 28th still includes it
+    clamped = forecast_monthly_revenue(
+        _templates((date(2026, 1, 31), 31, 100_00, date(2026, 2, 28))), date(2026, 1, 10), months=4
+    )
+    before_clamp = forecast_monthly_revenue(
+        _templates((date(2026, 1, 31), 31, 100_00, date(2026, 2, 27))), date(2026, 1, 10), months=4
+    )
+
+    assert _counts(clamped) == [1, 1, 0, 0]
+    assert _counts(before_clamp) == [1, 0, 0, 0]
+
+
+def test_day_31_is_clamped_in_leap_february():
+    forecast = forecast_monthly_revenue(
+        _templates((date(2028, 1, 31), 31, 100_00, date(2028, 2, 29))), date(2028, 1, 10), months=3
+    )
+
+    assert _counts(forecast) == [1, 1, 0]
+
+
+def test_end_date_cuts_off_later_periods():
+    forecast = forecast_monthly_revenue(
+        _templates((date(2026, 1, 20), 20, 50_00, date(2026, 3, 19))), date(2026, 1, 10), months=6
+    )
+
+    assert _counts(forecast) == [1, 1, 0, 0, 0, 0]
+
+
+def test_end_date_on_period_day_is_included():
+    forecast = forecast_monthly_revenue(
+        _templates((date(2026, 1, 20), 20, 50_00, date(2026, 3, 20))), date(2026, 1, 10), months=6
+    )
+
+    assert _counts(forecast) == [1, 1, 1, 0, 0, 0]
+
+
+def test_templates_are_summed_per_month():
+    forecast = forecast_monthly_revenue(
+        _templates(
+            (date(2026, 1, 15), 15, 100_01, None),
+            (date(2026, 2, 1), 1, 200_02, date(2026, 2, 1)),
+        ),
+        date(2026, 1, 10),
+        months=3,
+    )
+
+    assert _counts(forecast) == [1, 2, 1]
+    assert [month.projected_amount for month in forecast] == [
+        Decimal("100.01"),
+        Decimal("300.03"),
+        Decimal("100.01"),
+    ]
+
+
+def test_horizon_excludes_periods_past_last_month():
+    forecast = forecast_monthly_revenue(
+        _templates((date(2026, 1, 15), 15, 100_00, None)), date(2026, 1, 10), months=1
+    )
+
+    assert len(forecast) == 1
+    assert _counts(forecast) == [1]
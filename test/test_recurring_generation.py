@@ -0,0 +1,45 @@
+from datetime import date
+
+from app.models.invoice import Invoice
+from app.models.recurring_invoice import RecurringInvoice
+from app.services.recurring_invoice_service import generate_invoices_from_templates, missed_periods
+from factories import make_customer, make_recurring_invoice
+
+
+def test_missed_periods_clamp_to_month_end():
+    assert missed_periods(date(2026, 1, 31), 31, today=date(2026, 4, 30)) == [
+        date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)
+    ]
+    assert missed_periods(date(2028, 1, 30), 30, today=date(2028, 3, 1)) == [date(2028, 1, 30), date(2028, 2, 29)]
+
+
+def test_missed_periods_stop_at_today_end_date_and_limit():
+    start = date(2026, 1, 5)
+
+    assert missed_periods(start, 5, today=date(2026, 4, 4)) == [date(2026, 1, 5), date(2026, 2, 5), date(2026, 3, 5)]
+    assert missed_periods(start, 5, today=date(2026, 4, 5))[-1] == date(2026, 4, 5)
+    assert missed_periods(start, 5, today=date(2026, 6, 1), end_date=date(2026, 2, 5)) == [start, date(2026, 2, 5)]
+    assert missed_periods(start, 5, today=date(2026, 6, 1), limit=2) == [start, date(2026, 2, 5)]
+    assert missed_periods(date(2026, 7, 5), 5, today=date(2026, 6, 1)) == []
+
+
+def test_backfill_is_idempotent_on_rerun(db, merchant):
+    today = date(2026, 4, 10)
+    template = make_recurring_invoice(
+        db, make_customer(db, merchant), start_date=date(2026, 1, 5), next_generation_date=date(2026, 1, 5)
+    )
+
+    first = generate_invoices_from_templates(db, today=today, backfill=True)
+    # A rerun over the same periods, as after a crash before the template update
+    db.query(RecurringInvoice).filter(RecurringInvoice.id == template.id).update(
+        {"next_generation_date": date(2026, 1, 5)}
+    )
+    second = generate_invoices_from_templates(db, today=today, backfill=True)
+
+    assert (first.invoices, first.existing) == (4, 0)
+    assert (second.invoices, second.existing) == (0, 4)
+    periods = [row.period_date for row in db.query(Invoice.period_date).filter(
+        Invoice.recurring_invoice_id == template.id
+    ).order_by(Invoice.period_date)]
+    assert periods == [date(2026, 1, 5), date(2026, 2, 5), date(2026, 3, 5), date(2026, 4, 5)]
+    assert db.get(RecurringInvoice, template.id).next_generation_date == date(2026, 5, 5)
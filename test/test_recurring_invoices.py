@@ -0,0 +1,42 @@
+from datetime import date
+
+from factories import make_customer, make_recurring_invoice
+
+
+def test_create_recurring_invoice(client, db, merchant, auth_headers):
+    customer = make_customer(db, merchant)
+
+    response = client.post(
+        "/api/v1/recurring-invoices",
+        json={
+            "customer_id": str(customer.id),
+            "amount": "1200.00",
+            "day_of_month": 10,
+            "start_date": date.today().isoformat(),
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 201
+
+
+def test_list_and_forecast(client, db, merchant, auth_headers):
+    for _ in range(5):
+        make_recurring_invoice(db, make_customer(db, merchant))
+
+    response = client.get("/api/v1/recurring-invoices", headers=auth_headers)
+    assert len(response.json()) == 5
+
+    response = client.get("/api/v1/recurring-invoices/forecast?months=6", headers=auth_headers)
+    assert response.json()["total_invoices"] > 0
+
+
+def test_template_lifecycle(client, db, merchant, auth_headers):
+    template = make_recurring_invoice(db, make_customer(db, merchant))
+    url = f"/api/v1/recurring-invoices/{template.id}"
+
+    assert client.get(url, headers=auth_headers).status_code == 200
+    assert client.put(url, json={"description": "Monthly fees"}, headers=auth_headers).status_code == 200
+    assert client.post(f"{url}/pause", headers=auth_headers).status_code == 200
+    assert client.post(f"{url}/resume", headers=auth_headers).status_code == 200
+    assert client.delete(url, headers=auth_headers).status_code == 204
@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services.batch_job_service import JobRun
+from app.services.recurring_invoice_service import GenerationResult
+from app.tasks import recurring
+
+
+@pytest.fixture
+def sharded_calls(monkeypatch):
+    """Replace the shard coordinator and return its recorded calls."""
+    calls = []
+
+    def generate_sharded(shard_count, executor, today, chunk_size=None, backfill=False, timeout=3600):
+        calls.append((shard_count, executor, today, backfill))
+        return recurring.ShardedGeneration(total=GenerationResult(invoices=7))
+
+    monkeypatch.setattr(recurring, "generate_sharded", generate_sharded)
+    return calls
+
+
+def test_scheduled_run_is_sharded(monkeypatch, sharded_calls):
+    monkeypatch.setattr(settings, "RECURRING_GENERATION_SHARDS", 4)
+    monkeypatch.setattr(settings, "RECURRING_GENERATION_EXECUTOR", "celery")
+    run = JobRun(name="generate_recurring_invoices", previous_watermark=(date.today() - timedelta(days=3)).isoformat())
+
+    recurring._generate(None, run)
+
+    assert sharded_calls == [(4, "celery", date.today(), True)]
+    assert run.rows_processed == 7
+    assert run.watermark == date.today().isoformat()
+
+
+def test_failed_shard_fails_scheduled_run(monkeypatch):
+    monkeypatch.setattr(settings, "RECURRING_GENERATION_SHARDS", 2)
+    monkeypatch.setattr(
+        recurring,
+        "generate_sharded",
+        lambda *args, **kwargs: recurring.ShardedGeneration(
+            total=GenerationResult(invoices=3), failures=[(1, RuntimeError("boom"))]
+        ),
+    )
+    run = JobRun(name="generate_recurring_invoices")
+
+    with pytest.raises(RuntimeError, match="1 of 2 shards failed"):
+        recurring._generate(None, run)
+
+    assert run.rows_processed == 3
+    assert run.watermark is None
@@ -0,0 +1,64 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from app.core import request_capture
+from app.core.config import settings
+from factories import make_customer, make_invoice
+
+
+@pytest.fixture
+def captured(monkeypatch, tmp_path):
+    """Turn request capture on and return a function reading the records."""
+    monkeypatch.setattr(settings, "REQUEST_CAPTURE_ENABLED", True)
+    writer = request_capture.CaptureWriter(str(tmp_path), max_bytes=1_000_000, backup_count=1)
+    monkeypatch.setattr(request_capture, "_capture_writer", writer)
+
+    def records():
+        writer.flush()
+        return [json.loads(line) for path in tmp_path.glob("requests-*.jsonl") for line in path.open()]
+
+    return records
+
+
+def test_shape():
+    today = date(2026, 3, 31)
+
+    assert request_capture.shape("UNPAID") == "UNPAID"
+    assert request_capture.shape("50") == 50
+    assert request_capture.shape("9876543210") == "<int>"
+    assert request_capture.shape("1500.50") == "<number>"
+    assert request_capture.shape("2b1f6c1e-8d1a-4f7e-9a53-3f2d8c0b9e11") == "<uuid>"
+    assert request_capture.shape("2026-03-01", today) == "<date:-30>"
+    assert request_capture.shape("Ravi Kumar") == "<str>"
+    assert request_capture.shape(["a", "b"]) == "<2 items>"
+
+
+def test_capture_is_anonymized(client, db, merchant, auth_headers, captured):
+    customer = make_customer(db, merchant)
+    invoice = make_invoice(db, customer)
+    start = (date.today() - timedelta(days=7)).isoformat()
+
+    client.get(
+        f"/api/v1/invoices?status=UNPAID&limit=50&start_date={start}&customer_id={customer.id}",
+        headers=auth_headers,
+    )
+    client.post(
+        "/api/v1/invoices",
+        json={"customer_id": str(customer.id), "amount": "750.00", "description": "Tuition for Ravi"},
+        headers=auth_headers,
+    )
+    client.get(f"/api/v1/invoices/public/{invoice.id}")
+
+    listing, created, public = sorted(captured(), key=lambda record: record["ts"])
+    assert listing["route"] == "/api/v1/invoices"
+    assert listing["query"] == {"status": "UNPAID", "limit": 50, "start_date": "<date:-7>", "customer_id": "<uuid>"}
+    assert listing["merchant"] == request_capture.merchant_hash(str(merchant.id))
+    assert created["body"] == {"customer_id": "<uuid>", "amount": "<number>", "description": "<str>"}
+    assert created["status"] == 201
+    assert public["path_params"] == {"invoice_id": "<uuid>"}
+    assert public["merchant"] is None
+
+    text = json.dumps([listing, created, public])
+    assert str(customer.id) not in text and str(merchant.id) not in text and "Ravi" not in text
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.api.v1 import merchants
+from app.core import request_profiler
+from app.core.config import settings
+
+
+@pytest.fixture
+def profiles(monkeypatch, tmp_path):
+    """Enable the admin API and return a function reading the profile index."""
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-secret")
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_INTERVAL_MS", 0.5)
+
+    def index():
+        request_profiler.flush()
+        path = tmp_path / "profiles.jsonl"
+        return [json.loads(line) for line in path.open()] if path.exists() else []
+
+    return index
+
+
+def test_categorize():
+    endpoint = merchants.get_my_profile.__code__
+
+    assert request_profiler.categorize([endpoint, Session.execute.__code__]) == "sqlalchemy"
+    assert request_profiler.categorize([endpoint, BaseModel.model_validate.__code__]) == "pydantic"
+    # Standard library called from our code is our time
+    assert request_profiler.categorize([endpoint, json.dumps.__code__]) == "app"
+    assert request_profiler.categorize([json.dumps.__code__]) == "other"
+
+
+def test_profile_requested_by_header(client, merchant, auth_headers, profiles, tmp_path):
+    response = client.get(
+        "/api/v1/merchants/me",
+        headers={**auth_headers, "X-Profile": "1", "X-Admin-Key": "admin-secret"},
+    )
+
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    (summary,) = profiles()
+    assert summary["profile_id"] == profile_id
+    assert summary["route"] == "/api/v1/merchants/me"
+    assert set(summary["categories_ms"]) == set(request_profiler.CATEGORIES)
+    folded = (tmp_path / f"{profile_id}.folded").read_text()
+    for line in folded.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+
+
+def test_header_needs_admin_key(client, merchant, auth_headers, profiles):
+    response = client.get("/api/v1/merchants/me", headers={**auth_headers, "X-Profile": "1", "X-Admin-Key": "guess"})
+
+    assert "X-Profile-Id" not in response.headers
+    assert profiles() == []
+
+
+def test_admin_api_requires_key(client, monkeypatch):
+    assert client.get("/api/v1/admin/profiling").status_code == 404
+
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-secret")
+    assert client.get("/api/v1/admin/profiling").status_code == 401
+    assert client.put(
+        "/api/v1/admin/profiling", json={"sample_rate": 0.1}, headers={"X-Admin-Key": "guess"}
+    ).status_code == 401
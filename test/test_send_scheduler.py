@@ -0,0 +1,45 @@
+from datetime import datetime, time
+
+import pytest
+
+from app.core.config import settings
+from app.services.send_scheduler import next_send_time
+
+OFFICE_HOURS = (time(9, 0), time(18, 0))
+NIGHT = (time(21, 0), time(6, 0))
+
+
+@pytest.mark.parametrize("window", [(None, None), (time(9, 0), None), (time(9, 0), time(9, 0))])
+def test_no_window_sends_now(window):
+    assert next_send_time(datetime(2026, 10, 19, 2, 0), *window, "Asia/Kolkata") is None
+
+
+@pytest.mark.parametrize(
+    "now, window, expected",
+    [
+        # 13:30 IST, inside office hours
+        (datetime(2026, 10, 19, 8, 0), OFFICE_HOURS, None),
+        # 07:30 IST: held until 09:00 IST the same day
+        (datetime(2026, 10, 19, 2, 0), OFFICE_HOURS, datetime(2026, 10, 19, 3, 30)),
+        # 18:30 IST: held until 09:00 IST the next day
+        (datetime(2026, 10, 19, 13, 0), OFFICE_HOURS, datetime(2026, 10, 20, 3, 30)),
+        # Exactly at the end of the window: it is closed
+        (datetime(2026, 10, 19, 12, 30), OFFICE_HOURS, datetime(2026, 10, 20, 3, 30)),
+        # A window crossing midnight: 01:30 IST is inside, 15:30 IST waits for 21:00 IST
+        (datetime(2026, 10, 19, 20, 0), NIGHT, None),
+        (datetime(2026, 10, 19, 10, 0), NIGHT, datetime(2026, 10, 19, 15, 30)),
+    ],
+)
+def test_send_window_in_local_time(now, window, expected):
+    assert next_send_time(now, *window, "Asia/Kolkata") == expected
+
+
+def test_window_opening_after_a_daylight_saving_change():
+    # Midnight EST on the day clocks go forward: 09:00 is EDT (UTC-4), not EST
+    assert next_send_time(datetime(2026, 3, 8, 5, 0), *OFFICE_HOURS, "America/New_York") == datetime(2026, 3, 8, 13, 0)
+
+
+def test_default_timezone(monkeypatch):
+    monkeypatch.setattr(settings, "DEFAULT_TIMEZONE", "UTC")
+
+    assert next_send_time(datetime(2026, 10, 19, 7, 0), *OFFICE_HOURS) == datetime(2026, 10, 19, 9, 0)
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app.celery_app import celery_app
+from app.core import tracing
+from app.core.config import settings
+from app.core.database import engine
+from app.models.outbox_message import OutboxMessage
+from app.services.outbox_service import relay_outbox_batch
+from factories import make_customer
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+@pytest.fixture
+def spans(monkeypatch, tmp_path):
+    """Turn tracing on and return a function reading the exported spans."""
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    exporter = tracing.FileSpanExporter(str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(tracing, "_span_exporter", exporter)
+    tracing.install(engine)
+
+    def exported():
+        exporter.flush()
+        with open(exporter.path, encoding="utf-8") as store:
+            return [json.loads(line) for line in store]
+
+    return exported
+
+
+def test_parse_traceparent():
+    context = tracing.parse_traceparent(TRACEPARENT)
+
+    assert context == tracing.SpanContext(TRACE_ID, "00f067aa0ba902b7", sampled=True)
+    assert context.traceparent == TRACEPARENT
+    assert tracing.parse_traceparent(f"00-{'0' * 32}-00f067aa0ba902b7-01") is None
+    assert tracing.parse_traceparent("not-a-traceparent") is None
+
+
+def test_exporter_without_export_cannot_be_created():
+    class IncompleteExporter(tracing.SpanExporter):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteExporter()
+
+
+def test_trace_continues_from_request_to_task(client, db, merchant, auth_headers, spans, monkeypatch):
+    # Publish the invoice reminder straight away instead of holding it for a digest
+    monkeypatch.setattr(settings, "WHATSAPP_DIGEST_WINDOW_SECONDS", 0)
+    customer = make_customer(db, merchant)
+
+    response = client.post(
+        "/api/v1/invoices",
+        json={"customer_id": str(customer.id), "amount": "750.00"},
+        headers={**auth_headers, "traceparent": TRACEPARENT},
+    )
+
+    assert response.status_code == 201
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+    row = db.query(OutboxMessage).one()
+    assert tracing.extract(row.headers).trace_id == TRACE_ID
+
+    published = []
+    monkeypatch.setattr(celery_app, "send_task", lambda name, **options: published.append(options))
+    relay_outbox_batch(db)
+
+    assert tracing.extract(published[0]["headers"]).trace_id == TRACE_ID
+    names = {span["name"] for span in spans() if span["trace_id"] == TRACE_ID}
+    assert {"HTTP POST /api/v1/invoices", "db.query", "outbox.enqueue", "outbox.wait", "outbox.publish"} <= names
@@ -0,0 +1,57 @@
+import pytest
+
+from app.core.config import settings
+from app.models.whatsapp_message import WhatsAppMessage
+from app.utils.enums import WhatsAppMessageStatus, WhatsAppMessageType
+from factories import make_customer, make_invoice, make_whatsapp_message
+
+STATUS_URL = "/api/v1/webhooks/whatsapp/status"
+SECRET = "s3cret"
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(settings, "WHATSAPP_WEBHOOK_SECRET", SECRET)
+
+
+def _receipt(client, provider_message_id, status, secret=SECRET):
+    headers = {"X-Webhook-Secret": secret} if secret is not None else {}
+    return client.post(STATUS_URL, json={"provider_message_id": provider_message_id, "status": status}, headers=headers)
+
+
+def test_receipts_only_move_status_forward(client, db, merchant):
+    invoice = make_invoice(db, make_customer(db, merchant))
+    digest = make_whatsapp_message(db, invoice, message_type=WhatsAppMessageType.DIGEST.value, provider_message_id="sim-1")
+    merged = make_whatsapp_message(db, invoice, digest_message_id=digest.id)
+
+    read = _receipt(client, "sim-1", "READ")
+    late_delivery = _receipt(client, "sim-1", "DELIVERED")
+
+    assert read.json() == {"updated": True}
+    assert late_delivery.json() == {"updated": False}
+    statuses = {message.id: message.status for message in db.query(WhatsAppMessage)}
+    assert statuses == {digest.id: WhatsAppMessageStatus.READ.value, merged.id: WhatsAppMessageStatus.READ.value}
+
+
+def test_unknown_message_and_invalid_status(client, db, merchant):
+    invoice = make_invoice(db, make_customer(db, merchant))
+    make_whatsapp_message(db, invoice, provider_message_id="sim-2")
+
+    assert _receipt(client, "sim-unknown", "DELIVERED").status_code == 404
+    assert _receipt(client, "sim-2", "RECEIVED").status_code == 400
+
+
+def test_webhook_secret(client):
+    assert _receipt(client, "sim-3", "DELIVERED", secret=None).status_code == 401
+    assert _receipt(client, "sim-3", "DELIVERED", secret="wrong").status_code == 401
+    assert _receipt(client, "sim-3", "DELIVERED").status_code == 404
+
+
+def test_webhook_refused_without_configured_secret(client, db, merchant, monkeypatch):
+    monkeypatch.setattr(settings, "WHATSAPP_WEBHOOK_SECRET", None)
+    invoice = make_invoice(db, make_customer(db, merchant))
+    message = make_whatsapp_message(db, invoice, provider_message_id="sim-4")
+
+    assert _receipt(client, "sim-4", "READ", secret=None).status_code == 404
+    assert _receipt(client, "sim-4", "READ", secret="").status_code == 404
+    assert db.get(WhatsAppMessage, message.id).status == WhatsAppMessageStatus.SENT.value